@@ -0,0 +1 @@
+"""Benchmarks for the pipeline's hot paths, run by hand: python -m benchmarks.<name>."""
@@ -0,0 +1,381 @@
+"""Time and measure the transformation and output hot paths, and compare against a baseline.
+
+Each case runs one pipeline function on a synthetic frame of a given number of rows, shaped
+like the frame that function sees in the sectors view. Rows count the frame going in. For
+every case and size the suite reports:
+    - the best and median wall time over --repeat runs
+    - peak memory: how far traced Python and numpy memory rose during one extra run, plus the
+      peak of Arrow's own pool, which tracemalloc cannot see
+    - allocations: memory blocks still held by Python and numpy when the call returns, from
+      tracemalloc. It cannot count blocks allocated and freed during the call, so this is what
+      the call leaves behind (mostly its result), not how often it allocated along the way
+
+--save writes the results as a JSON baseline; --compare reruns and checks each case against
+that baseline, exiting with status 1 if any got slower or used more memory by more than
+--threshold. Baselines are only comparable on the machine that wrote them, which the
+comparison warns about.
+
+    python -m benchmarks.suite --rows 10000 100000 --save
+    python -m benchmarks.suite --rows 10000 100000 --compare --threshold 0.25
+    python -m benchmarks.suite --only widen_currency_price write_partitioned_dataset
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from functools import cache
+from importlib.metadata import version
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks import synthetic
+from benchmarks.widen_currency_price import INDEX_COLS, synthetic_sectors_frame
+from src.data.analysis_tools.outputs import (
+    optimize_dataframe_types,
+    parquet_to_stdout,
+    write_partitioned_dataset,
+)
+from src.data.analysis_tools.transformations import (
+    add_currencies_and_prices,
+    add_recipient_classifications,
+    add_share_of_reference_total,
+    build_crs_recipient_group_totals,
+    convert_values_to_units,
+    get_crs_recipient_classifications,
+    get_group_total,
+    index_recipient_classifications,
+    widen_currency_price,
+)
+from src.data.config import EU_COUNTRIES, PATHS, SECTORS_TIME, logger
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "suite.json"
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+
+# Differences below these are noise whatever the ratio, e.g. 2ms on a 5ms case.
+MIN_SECONDS = 0.02
+MIN_MIB = 2.0
+
+YEARS = range(SECTORS_TIME["start"], SECTORS_TIME["end"] + 1)
+
+# The sectors view has about 100 rows per donor/recipient partition.
+ROWS_PER_PARTITION = 100
+
+
+# ============================================================================
+# Inputs
+# ============================================================================
+
+
+@cache
+def _activities(n_rows: int) -> pd.DataFrame:
+    """CRS-shaped rows in USD current, as the sectors view reads them."""
+    activities = synthetic.sample_activities(n_rows, YEARS)
+    activities["indicator_name"] = np.where(
+        activities["purpose_code"] % 3 == 0, "Imputed multilateral", "Bilateral"
+    )
+    return activities
+
+
+@cache
+def _classification_index():
+    # Classifications come from the synthetic CRS, which install points oda_data at.
+    return index_recipient_classifications(get_crs_recipient_classifications(list(YEARS)))
+
+
+@cache
+def _classified(n_rows: int) -> pd.DataFrame:
+    return add_recipient_classifications(
+        _activities(n_rows).copy(), _classification_index(), "benchmark"
+    )
+
+
+@cache
+def _long(n_rows: int) -> pd.DataFrame:
+    """Rows once per currency/price pair, with a share repeated, as widening sees them."""
+    n_keys = max(n_rows // 8, 1)
+    n_donors, n_recipients = _partition_grid(n_keys)
+    return synthetic_sectors_frame(
+        n_keys, 0.05, n_donors=n_donors, n_recipients=n_recipients
+    ).head(n_rows)
+
+
+def _partition_grid(n_rows: int) -> tuple[int, int]:
+    """Donor and recipient counts giving about ROWS_PER_PARTITION rows per pair."""
+    n_partitions = max(n_rows // ROWS_PER_PARTITION, 4)
+    n_donors = max(int(np.sqrt(n_partitions * 110 / 190)), 2)
+    return n_donors, max(n_partitions // n_donors, 2)
+
+
+@cache
+def _wide(n_rows: int) -> pd.DataFrame:
+    """The widened frame with slugs, as shares and unit conversion see it."""
+    n_donors, n_recipients = _partition_grid(n_rows)
+    wide = widen_currency_price(
+        synthetic_sectors_frame(n_rows, 0.0, n_donors=n_donors, n_recipients=n_recipients),
+        INDEX_COLS,
+    )
+    for entity in ("donor", "recipient"):
+        wide[f"{entity}_slug"] = (
+            wide[f"{entity}_name"].astype("object").str.lower().str.replace(" ", "-")
+        )
+    return wide
+
+
+@cache
+def _publishable(n_rows: int) -> pd.DataFrame:
+    """The wide frame in units with a share column, as the writers see it."""
+    wide = add_share_of_reference_total(
+        _wide(n_rows).copy(), "donor_name", "Donor 0", ["year", "recipient_name"], "pct_total"
+    )
+    return convert_values_to_units(wide)
+
+
+# ============================================================================
+# Cases
+# ============================================================================
+
+
+@dataclass(frozen=True)
+class Case:
+    """A function to measure, and how to build its arguments for a frame of n rows.
+
+    args is called before every run and is not timed, so functions that modify their input
+    get a fresh copy each time.
+    """
+
+    func: Callable
+    args: Callable[[int], tuple]
+
+
+def _to_devnull(df: pd.DataFrame) -> None:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        parquet_to_stdout(df)
+
+
+def _write_partitioned(df: pd.DataFrame) -> None:
+    write_partitioned_dataset(df, "benchmark", ["donor_slug", "recipient_slug"])
+
+
+CASES: dict[str, Case] = {
+    "add_currencies_and_prices": Case(
+        add_currencies_and_prices,
+        lambda n: (_activities(n)[["year", "donor_code", "recipient_code", "purpose_code",
+                                   "value"]],),
+    ),
+    "get_group_total": Case(
+        get_group_total,
+        lambda n: (_activities(n), EU_COUNTRIES, ["year", "recipient_code", "purpose_code"],
+                   "donor", True, "EU27 countries"),
+    ),
+    "build_crs_recipient_group_totals": Case(
+        build_crs_recipient_group_totals,
+        lambda n: (_classified(n), ["year", "donor_code", "purpose_code", "indicator_name"]),
+    ),
+    "add_recipient_classifications": Case(
+        add_recipient_classifications,
+        lambda n: (_activities(n).copy(), _classification_index(), "benchmark"),
+    ),
+    "widen_currency_price": Case(
+        widen_currency_price, lambda n: (_long(n).copy(), INDEX_COLS)
+    ),
+    "add_share_of_reference_total": Case(
+        add_share_of_reference_total,
+        lambda n: (_wide(n), "donor_name", "Donor 0", ["year", "recipient_name"], "pct_total"),
+    ),
+    "convert_values_to_units": Case(convert_values_to_units, lambda n: (_wide(n).copy(),)),
+    "optimize_dataframe_types": Case(optimize_dataframe_types, lambda n: (_publishable(n),)),
+    "parquet_to_stdout": Case(_to_devnull, lambda n: (_publishable(n),)),
+    "write_partitioned_dataset": Case(_write_partitioned, lambda n: (_publishable(n),)),
+}
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+
+def _mib(n_bytes: int) -> float:
+    return round(n_bytes / 2**20, 1)
+
+
+def _measure_memory(case: Case, n_rows: int) -> dict:
+    """Peak memory and blocks left allocated by one run, traced on its own."""
+    args = case.args(n_rows)
+    pool = pa.proxy_memory_pool(pa.default_memory_pool())
+    previous_pool = pa.default_memory_pool()
+    pa.set_memory_pool(pool)
+
+    tracemalloc.start()
+    try:
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        start_blocks = len(tracemalloc.take_snapshot().traces)
+        result = case.func(*args)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        end_blocks = len(tracemalloc.take_snapshot().traces)
+    finally:
+        tracemalloc.stop()
+        pa.set_memory_pool(previous_pool)
+    del result
+
+    return {
+        "peak_mib": _mib(peak_bytes - start_bytes),
+        "arrow_peak_mib": _mib(pool.max_memory() or 0),
+        "allocations": end_blocks - start_blocks,
+    }
+
+
+def run_case(case: Case, n_rows: int, repeat: int) -> dict:
+    """Time case at n_rows over repeat runs, then measure its memory on one more."""
+    times = []
+    for _ in range(repeat):
+        args = case.args(n_rows)
+        rows_in = len(next(a for a in args if isinstance(a, pd.DataFrame)))
+        start = time.perf_counter()
+        case.func(*args)
+        times.append(time.perf_counter() - start)
+        del args
+
+    return {
+        "rows_in": rows_in,
+        "best_s": round(min(times), 4),
+        "median_s": round(statistics.median(times), 4),
+        **_measure_memory(case, n_rows),
+    }
+
+
+def _environment() -> dict:
+    return {
+        "machine": platform.node(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        **{package: version(package) for package in ("numpy", "pandas", "pyarrow")},
+    }
+
+
+def run_suite(names: list[str], rows: list[int], repeat: int) -> dict:
+    """Run the named cases at each row count."""
+    results: dict[str, dict] = {}
+    for name in names:
+        for n_rows in rows:
+            result = run_case(CASES[name], n_rows, repeat)
+            results.setdefault(name, {})[str(n_rows)] = result
+            print(
+                f"{name:<34} {n_rows:>10,} rows  best {result['best_s']:>8.3f}s  "
+                f"median {result['median_s']:>8.3f}s  peak {result['peak_mib']:>8.1f} MiB  "
+                f"arrow {result['arrow_peak_mib']:>7.1f} MiB  "
+                f"allocations {result['allocations']:>9,}",
+                flush=True,
+            )
+
+    return {
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "environment": _environment(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+# ============================================================================
+# Baselines
+# ============================================================================
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Cases that got slower or used more memory than the baseline by more than threshold.
+
+    Time is compared on the best run, which background load on the machine disturbs least;
+    memory on both peaks. Cases or sizes missing from either side are skipped.
+
+    Returns:
+        One line per regression, empty if there are none.
+    """
+    checks = [("best_s", MIN_SECONDS, "s"), ("peak_mib", MIN_MIB, " MiB"),
+              ("arrow_peak_mib", MIN_MIB, " MiB")]
+    regressions = []
+    for name, sizes in current["results"].items():
+        for n_rows, result in sizes.items():
+            before = baseline["results"].get(name, {}).get(n_rows)
+            if before is None:
+                continue
+            for metric, floor, unit in checks:
+                now, then = result[metric], before[metric]
+                if now - then > max(then * threshold, floor):
+                    regressions.append(
+                        f"{name} at {int(n_rows):,} rows: {metric} {then}{unit} -> {now}{unit} "
+                        f"(+{(now / then - 1) if then else float('inf'):.0%})"
+                    )
+    return regressions
+
+
+def _save(report: dict, path: Path) -> None:
+    """Write the report as the baseline, keeping baseline entries this run did not cover."""
+    if path.exists():
+        kept = json.loads(path.read_text())["results"]
+        for name, sizes in report["results"].items():
+            kept.setdefault(name, {}).update(sizes)
+        report = {**report, "results": kept}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Saved baseline to {path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS,
+                        help="row counts to run each case at")
+    parser.add_argument("--only", nargs="+", choices=list(CASES), default=list(CASES),
+                        metavar="CASE", help="cases to run, default all")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case and size")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE,
+                        help="baseline JSON to save to or compare against")
+    parser.add_argument("--save", action="store_true", help="save the results as the baseline")
+    parser.add_argument("--compare", action="store_true",
+                        help="compare against the baseline; exit 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative increase counted as a regression")
+    args = parser.parse_args()
+
+    # Offline, and quiet: the functions log every coverage gap and duplicate they meet.
+    synthetic.install(scale=0.02)
+    logger.setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        PATHS.CDN_FILES = Path(scratch)
+        report = run_suite(args.only, args.rows, args.repeat)
+
+    if args.compare:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["environment"] != report["environment"]:
+            print("Warning: the baseline was recorded in a different environment:\n"
+                  f"  baseline {baseline['environment']}\n  current  {report['environment']}")
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if not regressions:
+            print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+    if args.save:
+        _save(report, args.baseline)
+
+    if args.compare and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,558 @@
+"""Synthetic OECD data, and stand-ins for every OECD and pydeflate entry point the views call.
+
+With these installed, all four view builders run offline: no network, no CRS bulk file. Run a
+builder through this module, with a scale factor and the builder's own arguments, e.g.
+
+    python -m benchmarks.synthetic 0.1 src/data/scripts/sectors_view.py --shards 3
+
+and the stand-ins are installed before the builder is loaded (see install). Nothing under
+src knows about them, so a production build cannot end up on synthetic data. The scale
+applies to the transaction-level sources, the CRS and the imputed multilateral spending, where 1 is
+roughly production volume: about 250,000 CRS activities a year at their peak. The DAC1 and
+DAC2A tables are donor x recipient x year grids, so their size is fixed by those dimensions,
+as it is in production.
+
+The data is shaped like the real thing where the builders' costs depend on it:
+    - donors, recipients and purpose codes are the real ones, from config and oda_data
+    - donor size is Zipf-distributed, and each donor concentrates on its own recipients, so
+      the donor x recipient x purpose grid is sparse in the way the CRS is
+    - amounts are log-normal in USD millions with a small share of negative flows
+    - activities repeat keys, as CRS rows do, so every groupby has work to do
+    - a sliver of CRS rows lack a region or income group, as some real transactions do
+
+Every value is a pure function of the seed, the scale and the row's identity, so separate
+reads agree with each other: a donor shard reads exactly that donor's rows of a full read.
+"""
+
+import argparse
+import concurrent.futures
+import importlib
+import runpy
+import sys
+import zlib
+from functools import cache
+from pathlib import Path
+from types import FunctionType, SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+# Scale set by install; the stand-ins read it on every call.
+_scale: float = 1.0
+
+SEED = 20_240_101
+
+# CRS activities a year at scale 1 once reporting matured; earlier years taper off.
+CRS_ROWS_PER_YEAR = 250_000
+IMPUTED_ROWS_PER_YEAR = 150_000
+
+# Multilateral channels the imputed spending is routed through, the EU's among them.
+MULTILATERAL_CHANNELS = [41_114, 41_122, 41_302, 44_001, 44_002, 46_002, 46_003, 47_122,
+                         42_001, 42_003, 42_004]
+
+# CRS region and income-group values, in the CRS's own wording.
+CRS_REGIONS = [
+    "South of Sahara", "North of Sahara", "Africa", "South & Central Asia", "Far East Asia",
+    "Middle East", "Asia", "Caribbean & Central America", "South America", "America",
+    "Europe", "Oceania", "Developing countries, unspecified",
+]
+CRS_INCOME_GROUPS = ["LDCs", "Other LICs", "LMICs", "UMICs", "MADCTs",
+                     "Part I unallocated by income"]
+
+GENDER_SCORES = {"principal": 0.05, "significant": 0.30, "not_targeted": 0.40,
+                 "not_screened": 0.25}
+
+FUND_FLOWS = {
+    "net_disbursement": "Disbursements, net",
+    "grant_equivalent": "Grant equivalents",
+    "net_disbursement_grant": "Disbursements, grants",
+    "gross_disbursement": "Disbursements, gross",
+    "commitment": "Commitments",
+}
+
+
+# ============================================================================
+# Deterministic randomness
+# ============================================================================
+
+
+def _mix(*keys) -> np.ndarray:
+    """Hash integer keys (scalars or equal-length arrays) to uint64, with splitmix64."""
+    h = np.full(np.broadcast(*[np.asarray(k) for k in keys]).shape, SEED, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for key in keys:
+            h ^= np.asarray(key).astype(np.uint64)
+            h += np.uint64(0x9E3779B97F4A7C15)
+            h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            h ^= h >> np.uint64(31)
+    return h
+
+
+def _uniform(*keys) -> np.ndarray:
+    """Uniform [0, 1) numbers determined by the keys."""
+    return (_mix(*keys) >> np.uint64(11)).astype("float64") / float(1 << 53)
+
+
+def _lognormal(median: float, sigma: float, *keys) -> np.ndarray:
+    """Log-normal amounts determined by the keys, by Box-Muller on two hashed uniforms."""
+    u1 = np.maximum(_uniform(*keys, 1), 1e-12)
+    u2 = _uniform(*keys, 2)
+    normal = np.sqrt(-2 * np.log(u1)) * np.cos(2 * np.pi * u2)
+    return median * np.exp(sigma * normal)
+
+
+def _label(text: str) -> int:
+    """A stable integer for a string key, for hashing alongside codes."""
+    return zlib.crc32(text.encode())
+
+
+def _zipf_weights(n: int, exponent: float, salt: int) -> np.ndarray:
+    """Zipf weights over n items in a seeded random order."""
+    ranks = np.argsort(_uniform(np.arange(n), salt)) + 1
+    weights = 1.0 / ranks**exponent
+    return weights / weights.sum()
+
+
+# ============================================================================
+# Dimensions
+# ============================================================================
+
+
+@cache
+def _dimensions() -> SimpleNamespace:
+    """The real donors, recipients and purpose codes, with each entity's synthetic traits."""
+    from oda_data.tools import sector_lists
+
+    from src.data.config import CRS_PROVIDERS, CRS_RECIPIENTS
+
+    donors = np.array(sorted(CRS_PROVIDERS), dtype="int64")
+    recipients = np.array(sorted(CRS_RECIPIENTS), dtype="int64")
+    purposes = np.array(
+        sorted({int(c) for codes in sector_lists.get_sector_groups().values() for c in codes}),
+        dtype="int64",
+    )
+
+    # Each donor spreads its activities over the recipients by their overall popularity,
+    # reweighted by a sparse donor-specific focus, so most donors reach few recipients.
+    popularity = _zipf_weights(len(recipients), 0.9, salt=1)
+    focus = -np.log(
+        np.maximum(_uniform(donors[:, None], recipients[None, :], 3), 1e-12)
+    ) ** 3
+    recipient_weights = popularity[None, :] * focus
+    recipient_weights /= recipient_weights.sum(axis=1, keepdims=True)
+
+    return SimpleNamespace(
+        donors=donors,
+        donor_names=dict(CRS_PROVIDERS),
+        donor_weights=_zipf_weights(len(donors), 1.1, salt=2),
+        recipients=recipients,
+        recipient_names=dict(CRS_RECIPIENTS),
+        recipient_weights=recipient_weights,
+        purposes=purposes,
+        purpose_weights=_zipf_weights(len(purposes), 1.0, salt=4),
+    )
+
+
+def _rows_in_year(year: int, per_year: int) -> int:
+    """Rows for one year at the installed scale, tapering towards the early 1990s."""
+    maturity = np.clip((year - 1985) / 35, 0.15, 1.1)
+    return int(per_year * maturity * _scale)
+
+
+def _sample(year: int, n: int, salt: int) -> pd.DataFrame:
+    """n activities for one year: donor, recipient and purpose codes, and an amount."""
+    dims = _dimensions()
+    rng = np.random.default_rng([SEED, salt, year, int(_scale * 1000)])
+
+    donor_idx = rng.choice(len(dims.donors), size=n, p=dims.donor_weights)
+    recipient_idx = np.empty(n, dtype="int64")
+    for d in np.unique(donor_idx):
+        rows = np.flatnonzero(donor_idx == d)
+        recipient_idx[rows] = rng.choice(
+            len(dims.recipients), size=len(rows), p=dims.recipient_weights[d]
+        )
+
+    value = rng.lognormal(mean=np.log(0.08), sigma=2.2, size=n)
+    value[rng.random(n) < 0.02] *= -1
+
+    return pd.DataFrame(
+        {
+            "year": np.full(n, year, dtype="int64"),
+            "donor_code": dims.donors[donor_idx],
+            "recipient_code": dims.recipients[recipient_idx],
+            "purpose_code": rng.choice(dims.purposes, size=n, p=dims.purpose_weights),
+            "value": value,
+        }
+    )
+
+
+def _recipient_classification(codes: pd.Series, year: pd.Series) -> tuple[list, list]:
+    """CRS region and income group per row: fixed per recipient, income drifting by year."""
+    region = np.array(CRS_REGIONS, dtype=object)[
+        (_mix(codes.to_numpy(), 5) % np.uint64(len(CRS_REGIONS))).astype("int64")
+    ]
+    income = np.array(CRS_INCOME_GROUPS, dtype=object)[
+        (_mix(codes.to_numpy(), year.to_numpy() // 8, 6) % np.uint64(len(CRS_INCOME_GROUPS)))
+        .astype("int64")
+    ]
+    return region, income
+
+
+@cache
+def _crs_year(year: int, scale: float) -> pd.DataFrame:
+    """One year of the synthetic CRS, with the columns the views read."""
+    dims = _dimensions()
+    crs = _sample(year, _rows_in_year(year, CRS_ROWS_PER_YEAR), salt=10)
+
+    region, income = _recipient_classification(crs["recipient_code"], crs["year"])
+    blank = _uniform(np.arange(len(crs)), year, 7) < 0.01
+    region[blank] = None
+    income[blank] = None
+
+    return crs.rename(columns={"value": "usd_disbursement"}).assign(
+        donor_name=lambda d: d["donor_code"].map(dims.donor_names),
+        recipient_name=lambda d: d["recipient_code"].map(dims.recipient_names),
+        recipient_region=region,
+        incomegroup_name=income,
+        category=np.where(_uniform(np.arange(len(crs)), year, 8) < 0.9, 10, 60),
+        usd_commitment=lambda d: d["usd_disbursement"] * 1.1,
+        gender=np.array(list(GENDER_SCORES), dtype=object)[
+            np.searchsorted(
+                np.cumsum(list(GENDER_SCORES.values())),
+                _uniform(np.arange(len(crs)), year, 9),
+                side="right",
+            ).clip(max=len(GENDER_SCORES) - 1)
+        ],
+    )
+
+
+@cache
+def _imputed_year(year: int, scale: float) -> pd.DataFrame:
+    """One year of synthetic imputed multilateral spending by purpose and channel."""
+    imputed = _sample(year, _rows_in_year(year, IMPUTED_ROWS_PER_YEAR), salt=20)
+    channels = np.array(MULTILATERAL_CHANNELS, dtype="int64")
+    return imputed.assign(
+        channel_code=channels[
+            (_mix(np.arange(len(imputed)), year, 21) % np.uint64(len(channels))).astype("int64")
+        ]
+    )
+
+
+def sample_activities(n_rows: int, years) -> pd.DataFrame:
+    """About n_rows CRS-shaped activities spread evenly over years, for benchmarks.
+
+    The same donor, recipient and purpose mix as the synthetic CRS, but sized directly rather
+    than by the installed scale.
+
+    Returns:
+        year, donor_code, donor_name, recipient_code, purpose_code and value, in USD millions.
+    """
+    years = _years(years)
+    activities = pd.concat(
+        [_sample(year, max(n_rows // len(years), 1), salt=40) for year in years],
+        ignore_index=True,
+    )
+    activities.insert(2, "donor_name", activities["donor_code"].map(_dimensions().donor_names))
+    return activities
+
+
+def _years(years) -> list[int]:
+    return [int(y) for y in ([years] if isinstance(years, int) else years)]
+
+
+def _concat_years(reader, years) -> pd.DataFrame:
+    return pd.concat([reader(year, _scale) for year in _years(years)], ignore_index=True)
+
+
+# ============================================================================
+# Stand-ins: oda_data
+# ============================================================================
+
+
+class CRSData:
+    """Stand-in for oda_data.CRSData: reads the synthetic CRS, honouring filters and columns.
+
+    Like the real reader, requested columns the data lacks are silently dropped.
+    """
+
+    def __init__(self, years=None, providers=None, recipients=None, **_):
+        self.years = years
+        self.providers = providers
+        self.recipients = recipients
+        # Nothing here is a bulk download, so crs_bulk_fingerprint finds no usable file.
+        missing = Path("/nonexistent")
+        self.bulk_cache = SimpleNamespace(
+            base_dir=missing, manifest_path=missing / "manifest.json", ttl_seconds=0
+        )
+
+    def read(self, using_bulk_download=True, additional_filters=None, columns=None, **_):
+        crs = _concat_years(_crs_year, self.years)
+        filters = list(additional_filters or [])
+        if self.providers is not None:
+            filters.append(("donor_code", "in", list(self.providers)))
+        if self.recipients is not None:
+            filters.append(("recipient_code", "in", list(self.recipients)))
+        for column, op, values in filters:
+            if op != "in":
+                raise NotImplementedError(f"Synthetic CRS filter {op!r} on {column}")
+            crs = crs[crs[column].isin(values)]
+        if columns is not None:
+            crs = crs[[c for c in columns if c in crs.columns]]
+        return crs.reset_index(drop=True)
+
+
+def bilateral_policy_marker(
+    years, providers=None, recipients=None, measure="gross_disbursement", marker="gender",
+    marker_score="principal", **_,
+) -> pd.DataFrame:
+    """Stand-in for oda_data.bilateral_policy_marker, from the synthetic CRS's gender scores."""
+    crs = CRSData(years=years, providers=providers, recipients=recipients).read()
+    crs = crs[crs["gender"] == marker_score]
+    return crs[["year", "donor_code", "donor_name", "recipient_code", "gender"]].assign(
+        value=crs["usd_disbursement"]
+    ).reset_index(drop=True)
+
+
+def imputed_multilateral_by_purpose(years, providers=None, **_) -> pd.DataFrame:
+    """Stand-in for oda_data's imputed_multilateral_by_purpose, in USD millions."""
+    imputed = _concat_years(_imputed_year, years)
+    if providers is not None:
+        imputed = imputed[imputed["donor_code"].isin(list(providers))]
+    return imputed.reset_index(drop=True)
+
+
+class OECDClient:
+    """Stand-in for oda_data.OECDClient, for DAC1 and DAC2A indicators.
+
+    One amount per indicator name, donor, year (and recipient) and measure, so codes the DAC
+    renumbered but which share a name report the same figure, as the financing view checks.
+    Grants come out below the headline measure, so non-grants stay positive.
+    """
+
+    def __init__(
+        self, years=None, providers=None, recipients=None, measure="net_disbursement", **_
+    ):
+        self.years = _years(years)
+        self.providers = list(providers) if providers is not None else None
+        self.recipients = list(recipients) if recipients is not None else None
+        self.measure = [measure] if isinstance(measure, str) else list(measure)
+
+    def get_indicators(self, indicators) -> pd.DataFrame:
+        indicators = [indicators] if isinstance(indicators, str) else list(indicators)
+        return pd.concat(
+            [self._indicator(code, measure) for code in indicators for measure in self.measure],
+            ignore_index=True,
+        )
+
+    def _indicator(self, code: str, measure: str) -> pd.DataFrame:
+        from src.data.config import ALL_DONORS, ALL_FINANCING_INDICATORS, ALL_RECIPIENTS
+
+        donors = np.array(self.providers or sorted(ALL_DONORS), dtype="int64")
+        by_recipient = code.startswith("DAC2A")
+        recipients = np.array(
+            (self.recipients or sorted(ALL_RECIPIENTS)) if by_recipient else [0], dtype="int64"
+        )
+        grid = np.stack(
+            np.meshgrid(self.years, donors, recipients, indexing="ij"), axis=-1
+        ).reshape(-1, 3)
+        year, donor, recipient = grid[:, 0], grid[:, 1], grid[:, 2]
+
+        name = _label(ALL_FINANCING_INDICATORS.get(code, code))
+        # Donors report most of their grid; recipient-level data is far sparser.
+        size = np.maximum(_uniform(donor, 30), 0.05)
+        present = _uniform(name, year, donor, recipient, 31) < (size if by_recipient else 0.9)
+
+        if code == "DAC1.40.1":  # GNI
+            amount = _lognormal(400_000.0, 1.2, donor, 32) * (1 + 0.03 * (year - 1990))
+        else:
+            amount = _lognormal(2.0 if by_recipient else 800.0, 1.6, name, year, donor,
+                                recipient, 33)
+            if measure == "net_disbursement_grant":
+                amount = amount * (0.6 + 0.35 * _uniform(name, year, donor, 34))
+
+        rows = pd.DataFrame(
+            {
+                "year": year,
+                "donor_code": donor,
+                "one_indicator": code,
+                "fund_flows": FUND_FLOWS.get(measure, measure),
+                "value": amount,
+            }
+        )
+        if by_recipient:
+            rows.insert(2, "recipient_code", recipient)
+            rows.insert(3, "recipient_name", pd.Series(recipient).map(dict(ALL_RECIPIENTS)))
+        rows.insert(2, "donor_name", pd.Series(donor).map(_donor_names()))
+        return rows[present].reset_index(drop=True)
+
+
+@cache
+def _donor_names() -> dict:
+    from src.data.config import ALL_DONORS, EU_TOTAL
+
+    return dict(ALL_DONORS) | dict(EU_TOTAL)
+
+
+def get_eui_plus_bilateral_providers_indicator(client: OECDClient, indicator) -> pd.DataFrame:
+    """Stand-in for oda_data's EU27 + institutions reader: the institutions' rows scaled by
+    the share of their spending not funded by member states, as the real one does."""
+    from src.data.config import EU_INSTITUTIONS
+
+    rows = client.get_indicators(indicator)
+    institutions = rows["donor_code"].isin(list(EU_INSTITUTIONS))
+    rows.loc[institutions, "value"] *= 0.6
+    return rows
+
+
+# ============================================================================
+# Stand-ins: pydeflate
+# ============================================================================
+
+
+def _rate(data: pd.DataFrame, id_column: str, *salt) -> np.ndarray:
+    """A rate per donor and year, between 0.5 and 2."""
+    return 0.5 + 1.5 * _uniform(
+        data[id_column].to_numpy(dtype="int64"), data["year"].to_numpy(dtype="int64"), *salt
+    )
+
+
+def oecd_dac_exchange(data, *, target_currency, id_column="donor_code", **_) -> pd.DataFrame:
+    """Stand-in for pydeflate.oecd_dac_exchange: one synthetic rate per donor and year."""
+    data = data.copy()
+    data["value"] = (data["value"] * _rate(data, id_column, _label(target_currency))).round(6)
+    return data
+
+
+def oecd_dac_deflate(
+    data, *, base_year, target_currency, id_column="donor_code", **_
+) -> pd.DataFrame:
+    """Stand-in for pydeflate.oecd_dac_deflate: one synthetic deflator per donor and year."""
+    data = data.copy()
+    rate = _rate(data, id_column, _label(target_currency), base_year)
+    data["value"] = (data["value"] / rate).round(6)
+    return data
+
+
+# ============================================================================
+# Stand-ins: the build's own environment
+# ============================================================================
+
+
+def _data_version() -> str:
+    """Stand-in for checkpoints._data_version: synthetic data is a function of seed and scale,
+    so those identify it, and its checkpoints are never taken for a real build's."""
+    return f"synthetic-{SEED}-{_scale}"
+
+
+def _install_in_worker(scale: float, initializer, initargs: tuple) -> None:
+    install(scale)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+class ProcessPoolExecutor(concurrent.futures.ProcessPoolExecutor):
+    """Stand-in for concurrent.futures.ProcessPoolExecutor: the stand-ins are installed in
+    every worker before it runs anything, spawned workers included, which start from a fresh
+    interpreter and would otherwise reach for the real OECD readers."""
+
+    def __init__(self, *args, initializer=None, initargs=(), **kwargs):
+        super().__init__(
+            *args,
+            initializer=_install_in_worker,
+            initargs=(_scale, initializer, initargs),
+            **kwargs,
+        )
+
+
+# ============================================================================
+# Installation
+# ============================================================================
+
+_ENTRY_POINTS = {
+    ("oda_data", "CRSData"): CRSData,
+    ("oda_data", "OECDClient"): OECDClient,
+    ("oda_data", "bilateral_policy_marker"): bilateral_policy_marker,
+    (
+        "oda_data.indicators.research.sector_imputations",
+        "imputed_multilateral_by_purpose",
+    ): imputed_multilateral_by_purpose,
+    (
+        "oda_data.indicators.research.eu",
+        "get_eui_plus_bilateral_providers_indicator",
+    ): get_eui_plus_bilateral_providers_indicator,
+    ("pydeflate", "oecd_dac_exchange"): oecd_dac_exchange,
+    ("pydeflate", "oecd_dac_deflate"): oecd_dac_deflate,
+    ("src.data.analysis_tools.checkpoints", "_data_version"): _data_version,
+    ("concurrent.futures", "ProcessPoolExecutor"): ProcessPoolExecutor,
+}
+
+
+def install(scale: float) -> None:
+    """Swap every entry point the views call for its synthetic stand-in.
+
+    Each real object is replaced in the module it comes from, then wherever it is already
+    bound by name (see _namespaces), so modules imported before this ran have their copies
+    rebound too. Later imports get the stand-ins directly.
+
+    Args:
+        scale: Multiple of production volume for the transaction-level sources.
+    """
+    from src.data.config import logger
+
+    global _scale
+    _scale = float(scale)
+    logger.warning("Using synthetic OECD data at %sx scale", scale)
+
+    modules = {module: importlib.import_module(module) for module, _ in _ENTRY_POINTS}
+    namespaces = _namespaces()
+    for (module_name, name), fake in _ENTRY_POINTS.items():
+        real = getattr(modules[module_name], name)
+        if real is fake:
+            continue
+        setattr(modules[module_name], name, fake)
+        for namespace in namespaces:
+            if namespace.get(name) is real:
+                namespace[name] = fake
+
+
+def _namespaces() -> list[dict]:
+    """Every namespace an entry point may already be bound in.
+
+    That is each loaded module's, and the globals of the functions it holds where they differ.
+    They do for a script a spawned worker re-runs: multiprocessing runs it with runpy and copies
+    the result into a new __mp_main__ module, leaving its functions on the original globals.
+    """
+    namespaces = {}
+    for module in list(sys.modules.values()):
+        namespace = getattr(module, "__dict__", None)
+        if not isinstance(namespace, dict):
+            continue
+        namespaces[id(namespace)] = namespace
+        for value in list(namespace.values()):
+            if isinstance(value, FunctionType):
+                namespaces.setdefault(id(value.__globals__), value.__globals__)
+    return list(namespaces.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run a view builder offline, on synthetic OECD data."
+    )
+    parser.add_argument("scale", type=float, help="multiple of production volume, e.g. 0.1")
+    parser.add_argument("script", help="the builder to run, e.g. src/data/scripts/sectors_view.py")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="the builder's own arguments")
+    options = parser.parse_args()
+
+    install(options.scale)
+    # As if the builder had been run itself: its arguments in sys.argv, its module __main__.
+    sys.argv = [options.script, *options.args]
+    runpy.run_path(options.script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    # Installed from benchmarks.synthetic rather than this __main__ copy of it, so the stand-ins
+    # pickle by a name a worker process can import.
+    from benchmarks.synthetic import main as run
+
+    run()
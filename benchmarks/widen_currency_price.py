@@ -0,0 +1,95 @@
+"""Time widen_currency_price against widen_currency_price_scatter on a sectors-sized frame.
+
+The frame is synthetic but shaped like the long sectors frame before the pivot: categorical
+labels, eight currency/price pairs per key, and a share of keys repeated so the duplicate
+summing path runs too. Both implementations are checked to agree before anything is timed.
+
+    python -m benchmarks.widen_currency_price --keys 2000000 --duplicates 0.05
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data.analysis_tools.transformations import (
+    CURRENCY_PRICE_PAIRS,
+    widen_currency_price,
+    widen_currency_price_scatter,
+)
+from src.data.config import logger
+
+INDEX_COLS = ("year", "donor_name", "recipient_name", "indicator_name", "sub_sector")
+
+
+def synthetic_sectors_frame(
+    n_keys: int,
+    duplicate_share: float,
+    seed: int = 0,
+    n_donors: int = 110,
+    n_recipients: int = 190,
+) -> pd.DataFrame:
+    """One row per key and currency/price pair, plus repeats of a share of those rows."""
+    rng = np.random.default_rng(seed)
+
+    def labels(prefix: str, n: int) -> pd.Categorical:
+        return pd.Categorical.from_codes(
+            rng.integers(0, n, n_keys), [f"{prefix} {i}" for i in range(n)]
+        )
+
+    keys = pd.DataFrame(
+        {
+            "year": rng.integers(2013, 2025, n_keys).astype("int16"),
+            "donor_name": labels("Donor", n_donors),
+            "recipient_name": labels("Recipient", n_recipients),
+            "indicator_name": labels("Indicator", 2),
+            "sub_sector": labels("Sub-sector", 70),
+        }
+    ).drop_duplicates(ignore_index=True)
+
+    n_pairs = len(CURRENCY_PRICE_PAIRS)
+    long = keys.loc[keys.index.repeat(n_pairs)].reset_index(drop=True)
+    long["currency"] = pd.Categorical([c for c, _ in CURRENCY_PRICE_PAIRS] * len(keys))
+    long["price"] = pd.Categorical([p for _, p in CURRENCY_PRICE_PAIRS] * len(keys))
+
+    repeats = long.sample(frac=duplicate_share, random_state=seed)
+    long = pd.concat([long, repeats], ignore_index=True)
+    long["value"] = rng.lognormal(0, 3, len(long))
+
+    return long
+
+
+def _timed(func, *args) -> tuple[pd.DataFrame, float]:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=2_000_000, help="distinct index keys")
+    parser.add_argument("--duplicates", type=float, default=0.05, help="share of rows repeated")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per implementation")
+    args = parser.parse_args()
+
+    df = synthetic_sectors_frame(args.keys, args.duplicates)
+    print(f"{len(df):,} long rows, {df.memory_usage(deep=True).sum() / 2**20:,.0f} MiB")
+
+    # Both log every duplicate check; that is noise here.
+    logger.setLevel(logging.ERROR)
+
+    pivoted, _ = _timed(widen_currency_price, df.copy(), INDEX_COLS)
+    scattered, _ = _timed(widen_currency_price_scatter, df, INDEX_COLS)
+    pd.testing.assert_frame_equal(scattered, pivoted)
+    print(f"Outputs identical: {len(pivoted):,} wide rows")
+
+    for name, func in (("pivot", widen_currency_price), ("scatter", widen_currency_price_scatter)):
+        # widen_currency_price rounds df["value"] in place, so every run gets its own copy.
+        times = [_timed(func, df.copy(), INDEX_COLS)[1] for _ in range(args.repeat)]
+        print(f"{name:>8}: best {min(times):6.2f}s  median {sorted(times)[len(times) // 2]:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
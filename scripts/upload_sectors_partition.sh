@@ -4,6 +4,10 @@ set -euo pipefail
 
 LOCAL_DIR=${1:-"cdn_files/sectors_view"}
 GCS_PATH=${2:-"gs://data-apps-one-data/sources/sectors_view"}
+# Written by the builder beside the dataset: the partitions added, changed and removed since
+# the last build, and whether that list is complete.
+CHANGES_FILE=${3:-"${LOCAL_DIR}_changes.json"}
+JOBS=${JOBS:-8}
 
 if ! command -v gsutil >/dev/null 2>&1; then
     echo "Error: gsutil is not installed or not on PATH." >&2
@@ -15,10 +19,48 @@ if [ ! -d "${LOCAL_DIR}" ]; then
     exit 1
 fi
 
-echo "Clearing existing data in '${GCS_PATH}'..."
-gsutil -m rm -r "${GCS_PATH}/**" 2>/dev/null || true
+# Prints the partition paths under one key of the changes file, one per line.
+changed_partitions() {
+    python3 -c 'import json, sys; print(*json.load(open(sys.argv[1]))[sys.argv[2]], sep="\n")' \
+        "${CHANGES_FILE}" "$1"
+}
 
-echo "Uploading '${LOCAL_DIR}' → '${GCS_PATH}'"
-gsutil -m rsync -r -d "${LOCAL_DIR}" "${GCS_PATH}"
+complete=false
+if [ -f "${CHANGES_FILE}" ]; then
+    complete=$(python3 -c 'import json, sys; print(str(json.load(open(sys.argv[1]))["complete"]).lower())' \
+        "${CHANGES_FILE}")
+fi
+
+if [ "${complete}" != "true" ]; then
+    # No record of what changed since the bucket was last written, so replace all of it.
+    echo "Clearing existing data in '${GCS_PATH}'..."
+    gsutil -m rm -r "${GCS_PATH}/**" 2>/dev/null || true
+
+    echo "Uploading '${LOCAL_DIR}' → '${GCS_PATH}'"
+    gsutil -m rsync -r -d "${LOCAL_DIR}" "${GCS_PATH}"
+
+    echo "Upload complete."
+    exit 0
+fi
+
+removed=$(changed_partitions removed)
+if [ -n "${removed}" ]; then
+    echo "Removing $(wc -l <<< "${removed}") partitions from '${GCS_PATH}'..."
+    sed "s|^|${GCS_PATH}/|; s|$|/**|" <<< "${removed}" | gsutil -m rm -I
+fi
+
+upload=$( (changed_partitions added; changed_partitions changed) | sed '/^$/d')
+if [ -n "${upload}" ]; then
+    echo "Uploading $(wc -l <<< "${upload}") added or changed partitions to '${GCS_PATH}'..."
+    # -d within each partition, so a partition written as fewer files than before loses the rest.
+    xargs -P "${JOBS}" -I {} gsutil -q rsync -r -d "${LOCAL_DIR}/{}" "${GCS_PATH}/{}" <<< "${upload}"
+fi
+
+# The partition index describes every partition, so it is replaced whatever changed. Uploaded
+# after the partitions, so it never lists one the bucket does not have yet.
+if [ -f "${LOCAL_DIR}/_index.json" ]; then
+    echo "Uploading the partition index..."
+    gsutil -q cp "${LOCAL_DIR}/_index.json" "${GCS_PATH}/_index.json"
+fi
 
 echo "Upload complete."
@@ -0,0 +1,177 @@
+"""Stage checkpoints, so a long view build that fails can resume where it stopped.
+
+A build is declared as a list of Stages, each producing one frame from the frames of the
+stages it names as inputs. With checkpointing on, every frame is written as it is produced, to
+an Arrow IPC file under the cache directory; a resumed run then loads what it can rather than
+rebuilding it, and runs only the stages whose output is missing.
+
+Each frame is keyed by a hash of everything it was built from: the pipeline's code and the
+versions of the libraries it leans on, the source data (the CRS bulk file's fingerprint where
+there is one), and the keys of the stage's inputs. A change to any of them gives every stage
+downstream of it a new key, so a resumed run never mixes frames built from different code or
+data. Without a bulk file to fingerprint, data is assumed unchanged within a UTC day.
+
+Resuming works back from the frame the caller asks for, so only checkpoints that are still
+needed are read: a build that failed while writing its output reloads the last frame alone.
+"""
+
+import hashlib
+import json
+import shutil
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from importlib.metadata import version
+from pathlib import Path
+
+import pandas as pd
+
+from src.data.analysis_tools.outputs import (
+    crs_bulk_fingerprint,
+    read_arrow_ipc,
+    write_arrow_ipc,
+)
+from src.data.analysis_tools.profiling import stage
+from src.data.config import PATHS, logger
+
+# Libraries whose upgrade can change what a stage produces.
+_VERSIONED_PACKAGES = ("oda_data", "pydeflate", "pandas", "pyarrow")
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of a build: a frame computed from the frames of the stages named in inputs."""
+
+    name: str
+    run: Callable[..., pd.DataFrame]
+    inputs: tuple[str, ...] = ()
+
+
+def code_version(script: Path) -> str:
+    """Hash the code a view's frames depend on: its script, the shared modules, the libraries."""
+    sources = [
+        script,
+        PATHS.SRC / "data" / "config.py",
+        *sorted((PATHS.SRC / "data" / "analysis_tools").glob("*.py")),
+    ]
+    digest = hashlib.sha256()
+    for path in sources:
+        digest.update(path.read_bytes())
+    for package in _VERSIONED_PACKAGES:
+        digest.update(version(package).encode())
+    return digest.hexdigest()[:16]
+
+
+def _data_version() -> str:
+    """Identify the source data: the CRS bulk file where there is one, else the day."""
+    return crs_bulk_fingerprint() or datetime.now(UTC).date().isoformat()
+
+
+class StageCheckpoints:
+    """Run a build's stages, saving each frame and, when resuming, loading saved ones.
+
+    Args:
+        view: View name, the checkpoints' directory under PATHS.DATA / "checkpoints".
+        stages: The build's stages, each after every stage it takes input from.
+        script: The view's script, hashed into the keys with the shared modules.
+        save: Write every frame the build produces as a checkpoint.
+        resume: Load checkpoints from an earlier run instead of running their stages.
+            Implies save, so a run resumed and failing again keeps its progress too.
+    """
+
+    def __init__(
+        self,
+        view: str,
+        stages: list[Stage],
+        script: Path,
+        save: bool = False,
+        resume: bool = False,
+    ):
+        self.directory = PATHS.DATA / "checkpoints" / view
+        self.stages = {s.name: s for s in stages}
+        self.save = save or resume
+        self.resume = resume
+
+        base = [view, code_version(script), _data_version()] if self.save else [view]
+        self.keys: dict[str, str] = {}
+        for s in stages:
+            unknown = [name for name in s.inputs if name not in self.keys]
+            if unknown:
+                raise ValueError(f"Stage {s.name!r} takes input from later or unknown stages: "
+                                 f"{unknown}")
+            identity = [*base, s.name, *(self.keys[name] for name in s.inputs)]
+            self.keys[s.name] = hashlib.sha256(json.dumps(identity).encode()).hexdigest()[:16]
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f"{name}-{self.keys[name]}.arrow"
+
+    def build(self, target: str) -> pd.DataFrame:
+        """Produce the target stage's frame, running or loading whatever it depends on.
+
+        Frames are released as soon as the last stage needing them has run, as a build
+        written out by hand would del them.
+        """
+        needed = self._needed(target)
+        consumers = {name: 0 for name in needed}
+        for name in needed:
+            if not self._resumable(name):
+                for input_name in self.stages[name].inputs:
+                    consumers[input_name] += 1
+
+        if self.resume:
+            loaded = [name for name in needed if self._resumable(name)]
+            logger.info(
+                "Resuming from checkpoints: %s", ", ".join(loaded) if loaded else "none found"
+            )
+
+        frames: dict[str, pd.DataFrame] = {}
+        for name in needed:
+            if self._resumable(name):
+                with stage(f"Loading {name} checkpoint") as s:
+                    frames[name] = s.output(read_arrow_ipc(self._path(name)))
+                continue
+
+            s = self.stages[name]
+            frames[name] = s.run(*(frames[input_name] for input_name in s.inputs))
+            for input_name in s.inputs:
+                consumers[input_name] -= 1
+                if consumers[input_name] == 0 and input_name != target:
+                    del frames[input_name]
+            if self.save:
+                self._write(name, frames[name])
+
+        return frames[target]
+
+    def _resumable(self, name: str) -> bool:
+        return self.resume and self._path(name).exists()
+
+    def _needed(self, target: str) -> list[str]:
+        """The stages to run or load for target, in build order.
+
+        A stage whose checkpoint will be loaded needs none of its inputs.
+        """
+        needed, pending = set(), [target]
+        while pending:
+            name = pending.pop()
+            if name in needed:
+                continue
+            needed.add(name)
+            if not self._resumable(name):
+                pending.extend(self.stages[name].inputs)
+        return [name for name in self.stages if name in needed]
+
+    def _write(self, name: str, df: pd.DataFrame) -> None:
+        """Checkpoint one frame, replacing any from earlier keys."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(name)
+        # Written aside and renamed, so a build killed mid-write never leaves a truncated file.
+        write_arrow_ipc(df, path.with_suffix(".tmp")).replace(path)
+        for stale in self.directory.glob(f"{name}-*.arrow"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Remove the view's checkpoints, once the build they were for has finished."""
+        if self.save and self.directory.exists():
+            logger.info("Removing checkpoints at %s", self.directory)
+            shutil.rmtree(self.directory)
@@ -0,0 +1,121 @@
+"""One read of the CRS bulk file, shared by everything a build needs from it.
+
+The sectors build reads the CRS twice over the same years: the bilateral disbursements by
+purpose, and the recipient classifications (when the derived-table cache cannot serve them).
+Each read scans the 1.1 GB bulk file. A CrsScan collects what each consumer needs as a named
+request, then reads once for all of them: the union of their columns, with the filters they
+share pushed down into the parquet read. Each consumer then gets its own rows and columns of
+that one frame.
+
+A filter is only pushed down when every request filters the same column, and then on the
+union of their values; anything narrower is applied per consumer afterwards. The read itself
+goes through crs_store.read_crs, so it comes from the compacted store where there is one and
+from CRSData.read otherwise, and either way returns the rows a direct CRSData.read would.
+"""
+
+import pandas as pd
+
+from src.data.analysis_tools.crs_store import read_crs
+from src.data.config import logger
+
+
+class CrsScan:
+    """Requests on the CRS for some years, read together the first time one is read.
+
+    A request made after the shared read has happened is read on its own when it is read,
+    so a consumer is never served columns or rows the shared read did not cover. The shared
+    frame is released once every request made before it was read has been served.
+
+    Args:
+        years: Years every request covers.
+    """
+
+    def __init__(self, years):
+        self.years = sorted({years} if isinstance(years, int) else set(years))
+        self._requests: dict[str, tuple[list[str], list[tuple]]] = {}
+        self._late: set[str] = set()
+        self._rows: pd.DataFrame | None = None
+        self._read = False
+
+    def request(self, name: str, columns: list[str], filters: list[tuple] = ()) -> None:
+        """Register what one consumer needs.
+
+        Args:
+            name: Name the consumer reads it back by.
+            columns: Columns it needs. As with CRSData.read, columns the CRS lacks are left
+                out rather than raising, so consumers check for what they rely on.
+            filters: (column, "in", values) filters on its rows.
+        """
+        for column, op, _ in filters:
+            if op != "in":
+                raise ValueError(f"Only 'in' filters can be shared, not {op!r} on {column}")
+        self._requests[name] = (list(columns), list(filters))
+        if self._read:
+            self._late.add(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._requests
+
+    def discard(self, name: str) -> None:
+        """Withdraw a request that turned out not to be needed, e.g. served from a cache."""
+        self._requests.pop(name, None)
+        self._late.discard(name)
+        self._release_if_served()
+
+    def read(self, name: str) -> pd.DataFrame:
+        """The rows and columns one request asked for.
+
+        Raises:
+            KeyError: If nothing was requested under name, or it has already been read.
+        """
+        columns, filters = self._requests[name]
+        if name in self._late:
+            self._late.discard(name)
+            del self._requests[name]
+            logger.info("CRS request %r came after the shared read, so it is read on its own",
+                        name)
+            return _read_crs(self.years, columns, filters)
+
+        if not self._read:
+            self._rows = self._read_shared()
+            self._read = True
+
+        rows = self._rows
+        del self._requests[name]
+        self._release_if_served()
+
+        keep = pd.Series(True, index=rows.index)
+        for column, _, values in filters:
+            keep &= rows[column].isin(values)
+        return rows.loc[keep, [c for c in columns if c in rows.columns]].reset_index(drop=True)
+
+    def _release_if_served(self) -> None:
+        if self._read and not set(self._requests) - self._late:
+            self._rows = None
+
+    def _read_shared(self) -> pd.DataFrame:
+        """Read the union of the requests' columns, with the filters all of them share."""
+        requests = list(self._requests.values())
+        columns = list(dict.fromkeys(
+            [c for cols, _ in requests for c in cols]
+            + [column for _, filters in requests for column, _, _ in filters]
+        ))
+
+        shared = set.intersection(*({column for column, _, _ in f} for _, f in requests))
+        pushed = [
+            (column, "in", sorted({
+                v for _, filters in requests for c, _, values in filters if c == column
+                for v in values
+            }))
+            for column in sorted(shared)
+        ]
+
+        logger.info(
+            "Reading the CRS once for %s: %s columns, filtered on %s",
+            ", ".join(self._requests), len(columns), ", ".join(sorted(shared)) or "nothing",
+        )
+        return _read_crs(self.years, columns, pushed)
+
+
+def _read_crs(years: list[int], columns: list[str], filters: list[tuple]) -> pd.DataFrame:
+    return read_crs(years, columns, filters)
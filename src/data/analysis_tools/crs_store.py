@@ -0,0 +1,216 @@
+"""A local copy of the CRS bulk file, laid out for the reads the dashboard makes.
+
+The bulk file is one 1.1 GB parquet file whose row groups follow no key the dashboard filters
+on, so every read decodes the year, donor and recipient columns of all of it to find its rows.
+compact_crs rewrites it once per download as a dataset partitioned by year and donor_code,
+each partition sorted by recipient and purpose, and keeping only the columns the dashboard
+reads (STORE_COLUMNS). A read restricted to some years or donors then opens only their
+partitions, and row-group statistics skip most of the rest.
+
+Rows oda_data leaves out of a CRSData read (core contributions to multilaterals, bi_multi 2)
+are left out of the store too, so read_crs returns what CRSData.read would. It falls back to
+CRSData.read whenever the store cannot answer: before the store has been compacted for the
+current bulk file, or for a column the store does not keep.
+"""
+
+import shutil
+from collections.abc import Iterator
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.data.analysis_tools.outputs import crs_bulk_fingerprint, crs_bulk_path
+from src.data.config import PATHS, logger
+
+# One store per bulk download, beside oda_data's own cache so CI restores them together.
+STORE_DIR: Path = PATHS.DATA / "crs_store"
+
+# Every column the dashboard reads from or filters the CRS on.
+STORE_COLUMNS: list[str] = [
+    "year",
+    "donor_code",
+    "donor_name",
+    "recipient_code",
+    "recipient_name",
+    "recipient_region",
+    "incomegroup_name",
+    "purpose_code",
+    "category",
+    "usd_disbursement",
+]
+
+PARTITION_COLUMNS: list[str] = ["year", "donor_code"]
+
+# Sort order within a partition, so row-group statistics narrow recipient filters.
+_SORT_COLUMNS: list[str] = ["recipient_code", "purpose_code"]
+
+# Small enough that a partition's recipient statistics skip most of it.
+_ROWS_PER_GROUP = 64_000
+
+# The directory hive partitioning reads back as a null partition value.
+_NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Holds the full schema, partition columns included, with their types in the bulk file.
+_SCHEMA_FILE = "_common_metadata"
+
+
+def compact_crs() -> Path | None:
+    """Write the store for the current bulk file, unless it already exists.
+
+    Written into a directory beside the final one and renamed into place once complete, so a
+    compaction killed part way leaves no store, rather than a partial one reads would trust.
+    Stores for earlier downloads are removed.
+
+    Returns:
+        The store's directory, or None when there is no usable bulk file to compact.
+    """
+    bulk_path, fingerprint = crs_bulk_path(), crs_bulk_fingerprint()
+    if bulk_path is None or fingerprint is None:
+        logger.warning("No CRS bulk file to compact")
+        return None
+
+    store = STORE_DIR / fingerprint
+    if not (store / _SCHEMA_FILE).exists():
+        _write_store(bulk_path, store)
+
+    for stale in STORE_DIR.iterdir():
+        if stale != store:
+            shutil.rmtree(stale, ignore_errors=True)
+    return store
+
+
+def _write_store(bulk_path: Path, store: Path) -> None:
+    bulk = pq.ParquetFile(bulk_path)
+    names = bulk.schema_arrow.names
+    columns = [c for c in STORE_COLUMNS if c in names]
+    schema = pa.schema([bulk.schema_arrow.field(c) for c in columns])
+
+    by_year, tmp = store.with_name(f"{store.name}.by_year"), store.with_name(f"{store.name}.tmp")
+    for directory in (by_year, tmp):
+        shutil.rmtree(directory, ignore_errors=True)
+    by_year.mkdir(parents=True)
+
+    # One streaming pass splits the bulk file by year, then each year is sorted on its own,
+    # so neither pass holds more than a year of the projected columns. Every file is written
+    # with pq.write_table or a ParquetWriter: ds.write_dataset's thread pool could hang the
+    # process at exit once the store was written.
+    logger.info("Compacting the CRS bulk file: %s of its columns", len(columns))
+    writers: dict[int, pq.ParquetWriter] = {}
+    try:
+        for table in _kept_batches(bulk, columns):
+            years = table["year"]
+            # Rows without a year could never match a read, which always filters on it.
+            for year in pc.unique(years.drop_null()).to_pylist():
+                if year not in writers:
+                    writers[year] = pq.ParquetWriter(by_year / f"{year}.parquet", schema)
+                writers[year].write_table(table.filter(pc.equal(years, year)))
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    for year in sorted(writers):
+        table = pq.read_table(by_year / f"{year}.parquet").drop_columns(["year"])
+        _write_year(
+            table.sort_by([(c, "ascending") for c in ["donor_code", *_SORT_COLUMNS]]),
+            tmp / f"year={year}",
+        )
+    shutil.rmtree(by_year)
+
+    # Written last, so its presence marks the store complete.
+    pq.write_metadata(schema, tmp / _SCHEMA_FILE)
+    shutil.rmtree(store, ignore_errors=True)
+    tmp.replace(store)
+    logger.info("Compacted CRS store written to %s", store)
+
+
+def _kept_batches(bulk: pq.ParquetFile, columns: list[str]) -> Iterator[pa.Table]:
+    """The bulk file's columns a batch at a time, with the rows CRSData.read keeps: all but
+    core contributions, null bi_multi included."""
+    filtered = "bi_multi" in bulk.schema_arrow.names
+    read = [*columns, "bi_multi"] if filtered else columns
+    for batch in bulk.iter_batches(columns=read):
+        table = pa.Table.from_batches([batch])
+        if filtered:
+            bi_multi = table["bi_multi"]
+            table = table.filter(
+                pc.or_kleene(pc.not_equal(bi_multi, 2), pc.is_null(bi_multi))
+            ).drop_columns(["bi_multi"])
+        yield table
+
+
+def _write_year(table: pa.Table, directory: Path) -> None:
+    """Write one year's rows, sorted by donor, as one file per donor_code partition.
+
+    Laid out as hive partitioning reads it back, the donor code in the directory name and not
+    in the file; rows without a donor go under the partitioning's null directory.
+    """
+    counts = pc.value_counts(table["donor_code"])
+    start = 0
+    for donor, n_rows in zip(
+        counts.field("values").to_pylist(), counts.field("counts").to_pylist()
+    ):
+        partition = directory / f"donor_code={_NULL_PARTITION if donor is None else donor}"
+        partition.mkdir(parents=True)
+        pq.write_table(
+            table.slice(start, n_rows).drop_columns(["donor_code"]),
+            partition / "part-0.parquet",
+            compression="zstd",
+            row_group_size=_ROWS_PER_GROUP,
+        )
+        start += n_rows
+
+
+def _partitioning(schema: pa.Schema, columns: list[str]) -> ds.Partitioning:
+    """Hive partitioning on columns, typed as they are in the bulk file."""
+    return ds.partitioning(pa.schema([schema.field(c) for c in columns]), flavor="hive")
+
+
+def read_crs(
+    years: list[int], columns: list[str], filters: list[tuple] = ()
+) -> pd.DataFrame:
+    """Read CRS rows from the store, as CRSData.read with the bulk download would.
+
+    Args:
+        years: Years to read.
+        columns: Columns to return. As with CRSData.read, columns the CRS lacks are left out.
+        filters: Further (column, op, value) filters, in parquet's filter syntax.
+
+    Returns:
+        The matching rows, in the store's order when read from it.
+    """
+    store = _current_store()
+    needed = {*columns, *(column for column, _, _ in filters)}
+    if store is None or not needed <= set(STORE_COLUMNS):
+        from oda_data import CRSData
+
+        return CRSData(years=years).read(
+            using_bulk_download=True, additional_filters=list(filters) or None, columns=columns
+        )
+
+    schema = pq.read_schema(store / _SCHEMA_FILE)
+    dataset = ds.dataset(
+        store,
+        schema=schema,
+        format="parquet",
+        partitioning=_partitioning(schema, PARTITION_COLUMNS),
+    )
+    expression = pq.filters_to_expression([("year", "in", list(years)), *filters])
+    return dataset.to_table(
+        columns=[c for c in columns if c in schema.names], filter=expression
+    ).to_pandas()
+
+
+def _current_store() -> Path | None:
+    """The store compacted from the current bulk file, if there is one."""
+    fingerprint = crs_bulk_fingerprint()
+    if fingerprint is None:
+        return None
+    store = STORE_DIR / fingerprint
+    if not (store / _SCHEMA_FILE).exists():
+        logger.info("No compacted CRS store for this bulk file, so reading the bulk file")
+        return None
+    return store
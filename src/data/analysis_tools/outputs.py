@@ -10,14 +10,23 @@ DataFrame and returns a DataFrame belongs in ``transformations``; anything that
 entity is labelled belongs in ``naming``.
 """
 
+import hashlib
 import json
+import os
 import shutil
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+from importlib.metadata import version
+from itertools import pairwise
 from pathlib import Path
+from typing import BinaryIO
+from urllib.parse import quote
 
+import numpy as np
 import pandas as pd
 import pyarrow as pa
-import pyarrow.dataset as ds
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
 from oda_data import set_data_path
 from pydeflate import set_pydeflate_path
@@ -98,21 +107,40 @@ def set_cache_dir(
 
 def parquet_to_stdout(df: pd.DataFrame) -> None:
     """Write the frame to stdout as parquet, which is how Observable loaders return data."""
-    table, value_cols = dataframe_to_arrow_table(df)
+    write_parquet(df, sys.stdout.buffer)
+
+
+def write_parquet(df: pd.DataFrame, sink: BinaryIO) -> None:
+    """Write the frame as the single parquet file a loader returns, to a binary file.
+
+    parquet_to_stdout writes it where Observable reads a loader's output; src/data/build.py
+    writes it straight into Observable's cache instead.
+
+    The frame is converted and written one row group at a time, straight to the sink, so at
+    most one row group is held in Arrow alongside the frame. Converting it whole and encoding
+    it into an in-memory buffer held the frame up to three times over: the narrowed copy, the
+    Arrow table and the encoded file. The file is the same either way.
+    """
+    options = get_parquet_write_options()
+    rows_per_group = options.pop("row_group_size")
+
+    # Every row group is converted to the schema of the whole frame, its label columns given
+    # the categories of the whole column, so that each converts to the same dictionary type.
+    categories = _label_categories(df)
+    schema = _arrow_schema(df, categories)
+    value_cols = [name for name in schema.names if name.startswith(("value_", "pct"))]
 
     # Byte-stream-split reorders the bytes of each value so the compressor sees runs of similar
     # exponents; it is worth applying to the numeric columns only.
-    bss_cols = {c: True for c in value_cols}
-
-    buf = pa.BufferOutputStream()
-    pq.write_table(
-        table,
-        buf,
-        use_byte_stream_split=bss_cols,
-        **get_parquet_write_options(),
-    )
-
-    sys.stdout.buffer.write(buf.getvalue().to_pybytes())
+    with pq.ParquetWriter(
+        sink, schema, use_byte_stream_split={c: True for c in value_cols}, **options
+    ) as writer:
+        # One pass even for an empty frame, so the file still carries the schema.
+        for start in range(0, max(len(df), 1), rows_per_group):
+            table, _ = dataframe_to_arrow_table(
+                df.iloc[start : start + rows_per_group], categories, schema
+            )
+            writer.write_table(table)
 
 
 # ============================================================================
@@ -120,7 +148,9 @@ def parquet_to_stdout(df: pd.DataFrame) -> None:
 # ============================================================================
 
 
-def optimize_dataframe_types(df: pd.DataFrame) -> pd.DataFrame:
+def optimize_dataframe_types(
+    df: pd.DataFrame, categories: dict[str, pd.CategoricalDtype] | None = None
+) -> pd.DataFrame:
     """Narrow the dtypes so the published parquet stays small.
 
     Values arrive from convert_values_to_units already as integers in units; anything still
@@ -131,6 +161,8 @@ def optimize_dataframe_types(df: pd.DataFrame) -> pd.DataFrame:
 
     Args:
         df: Wide frame ready to be written.
+        categories: Categories to give label columns, by column, for a frame that is one
+            slice of a larger one. By default each takes the values it holds.
 
     Returns:
         The frame with narrowed dtypes.
@@ -145,19 +177,22 @@ def optimize_dataframe_types(df: pd.DataFrame) -> pd.DataFrame:
     if "year" in df.columns:
         df["year"] = df["year"].astype("Int16")
 
+    categories = categories or {}
     for col in LABEL_COLUMNS:
-        if col in df.columns and df[col].dtype.name != "category":
+        if col in categories:
+            df[col] = df[col].astype(categories[col])
+        elif col in df.columns and df[col].dtype.name != "category":
             df[col] = df[col].astype("category")
 
     return df
 
 
 def get_parquet_write_options() -> dict:
-    """Compression and encoding settings for the single-file parquet written to stdout.
+    """Compression and encoding settings for the parquet files the pipeline publishes.
 
-    write_partitioned_dataset deliberately does not reuse these: the paging and row-group keys
-    below are arguments to pq.write_table, while the dataset writer takes its row-group sizing
-    from ds.write_dataset instead.
+    Written as pq.write_table arguments, which is how write_partitioned_dataset writes each
+    partition. write_parquet streams through pq.ParquetWriter instead, which takes all but
+    row_group_size; that is the slice it converts and writes at a time.
     """
     return {
         "compression": "zstd",
@@ -169,95 +204,587 @@ def get_parquet_write_options() -> dict:
     }
 
 
-def dataframe_to_arrow_table(df: pd.DataFrame) -> tuple[pa.Table, list[str]]:
-    """Narrow the dtypes and convert to an Arrow table.
+def dataframe_to_arrow_table(
+    df: pd.DataFrame,
+    categories: dict[str, pd.CategoricalDtype] | None = None,
+    schema: pa.Schema | None = None,
+) -> tuple[pa.Table, list[str]]:
+    """Convert to an Arrow table with the dtypes optimize_dataframe_types narrows to.
+
+    The table is built a column at a time from the frame's own arrays, each converted straight
+    to its Arrow type: numeric columns from their numpy buffers, shared rather than copied
+    where the type already matches, and label columns from their categorical codes. Narrowing
+    a copy of the frame first and converting that held the frame twice on top of the table.
+    The table is the same either way, pandas metadata included.
 
     Args:
         df: Wide frame ready to be written.
+        categories: Categories to give label columns, by column, as in
+            optimize_dataframe_types.
+        schema: Schema to convert to, for a frame that is one slice of a larger one. By
+            default the frame's own.
 
     Returns:
         The Arrow table, and the names of the value columns, which the writers pass to
         pyarrow as byte-stream-split candidates.
     """
-    df = optimize_dataframe_types(df)
-    value_cols = [c for c in df.columns if c.startswith(("value_", "pct"))]
+    categories = categories or {}
+    labels = {
+        col: _categorical(df[col], categories.get(col)) for col in LABEL_COLUMNS if col in df
+    }
+    if schema is None:
+        schema = _arrow_schema(df, {col: values.dtype for col, values in labels.items()})
+
+    arrays = [
+        pa.array(labels[field.name], type=field.type)
+        if field.name in labels
+        else pa.array(df[field.name], type=field.type, from_pandas=True)
+        for field in schema
+    ]
+    value_cols = [name for name in schema.names if name.startswith(("value_", "pct"))]
+
+    return pa.Table.from_arrays(arrays, schema=schema), value_cols
+
+
+def _categorical(values: pd.Series, dtype: pd.CategoricalDtype | None) -> pd.Categorical:
+    """A label column as a categorical, with dtype's categories or else those it holds."""
+    if isinstance(values.dtype, pd.CategoricalDtype) and dtype in (None, values.dtype):
+        return values.array
+    return pd.Categorical(values, dtype=dtype)
+
+
+def _label_categories(df: pd.DataFrame) -> dict[str, pd.CategoricalDtype]:
+    """The categories each label column is given, from the values it holds."""
+    return {col: _categorical(df[col], None).dtype for col in LABEL_COLUMNS if col in df}
+
+
+def _arrow_schema(df: pd.DataFrame, categories: dict[str, pd.CategoricalDtype]) -> pa.Schema:
+    """The schema of the frame optimize_dataframe_types returns, without narrowing the frame.
+
+    Taken from an empty narrowed frame, so the types and pandas metadata are what
+    pa.Table.from_pandas would give the narrowed frame.
+    """
+    prototype = optimize_dataframe_types(df.iloc[:0], categories)
+    schema = pa.Schema.from_pandas(prototype, preserve_index=False)
+    # An empty object column says nothing of what it holds, so infer those from the values,
+    # and convert again for the pandas metadata to describe them.
+    for col in prototype.columns[prototype.dtypes == object]:
+        i = schema.get_field_index(col)
+        inferred = pa.infer_type(df[col].to_numpy(), from_pandas=True)
+        schema = schema.set(i, schema.field(i).with_type(inferred))
+    return pa.Table.from_pandas(prototype, schema=schema, preserve_index=False).schema
+
+
+# Written inside each partitioned dataset, and published with it, listing what every partition
+# holds so readers can tell which to fetch without listing the bucket or opening the files.
+INDEX_FILE = "_index.json"
+
+# Label columns the index lists each partition's distinct values of, where the data has them.
+_INDEXED_LABELS: tuple[str, ...] = ("indicator_name", "sector_name")
 
-    return pa.Table.from_pandas(df, preserve_index=False), value_cols
+# The layout ds.write_dataset gave the published datasets, kept so paths do not move: a
+# partition's rows go in files of at most this many, part-0.parquet, part-1.parquet and so on,
+# in row groups of get_parquet_write_options' row_group_size.
+_MAX_ROWS_PER_FILE = 1_000_000
+
+# The directory hive partitioning names, and reads back, for a null partition value.
+_NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
 
 
 def write_partitioned_dataset(
     df: pd.DataFrame,
     base_dir: str,
     partition_cols: list[str],
-) -> None:
+    clear_existing: bool = True,
+    previous_hashes: dict[str, str] | None = None,
+    jobs: int | None = None,
+) -> dict[str, str]:
     """Write the frame as a Hive-partitioned parquet dataset, for views too big for one file.
 
+    Every partition's rows are hashed as they will be written, so a build can tell which
+    partitions changed since the last one; see partition_changes. Given the hashes of the
+    partitions already on disk, partitions whose rows hash the same are left as they are and
+    only the others are written.
+
+    The dataset's index (INDEX_FILE; see read_partition_index) is brought up to date with
+    every partition the frame covers, written or not.
+
     Args:
         df: Wide frame ready to be written.
         base_dir: Directory name, created under PATHS.CDN_FILES.
         partition_cols: Columns to partition by, e.g. the donor and recipient slugs. The
             frontend addresses partitions by these values, so they have to be URL-safe.
+        clear_existing: Whether to remove the dataset already there first. Pass False to add
+            the partitions of one part of a dataset written a part at a time; partitions the
+            frame also covers are still replaced.
+        previous_hashes: Hashes of the partitions on disk, from read_partition_manifest, to
+            rewrite only the partitions that changed. Nothing is cleared when given.
+        jobs: Partitions to write at once, each on its own thread. Defaults to one per core.
+
+    Returns:
+        Each partition's content hash, by its path relative to the dataset.
     """
     missing = [col for col in partition_cols if col not in df.columns]
     if missing:
         raise ValueError(f"Partition columns absent from the data: {missing}")
 
-    optimized = optimize_dataframe_types(df)
+    table, _ = dataframe_to_arrow_table(df)
+
+    # Arrow cannot sort by a dictionary-typed column, so sort and partition on the values of
+    # any label column the dataset is partitioned by.
+    for col in partition_cols:
+        field = table.schema.field(col)
+        if pa.types.is_dictionary(field.type):
+            field = field.with_type(field.type.value_type)
+            table = table.set_column(
+                table.schema.get_field_index(col), field, table[col].cast(field.type)
+            )
 
-    # Sort by the partition columns so each fragment written covers only a few partitions.
-    # Unsorted input makes every fragment span every partition, and pyarrow then refuses the
-    # write for exceeding its per-fragment partition ceiling.
-    optimized = optimized.sort_values(partition_cols, kind="stable")
+    # Sort by the partition columns so each partition's rows are one slice of the table.
+    # Arrow's sort is stable, so rows keep their order within a partition.
+    order = pc.sort_indices(table, sort_keys=[(col, "ascending") for col in partition_cols])
+    table = table.take(order)
 
-    table = pa.Table.from_pandas(optimized, preserve_index=False)
+    bounds, hashes = _partition_hashes(df, order.to_numpy(), table, partition_cols)
 
     output_dir = PATHS.CDN_FILES / base_dir
-    if output_dir.exists():
+    written = range(len(hashes))
+    if previous_hashes is not None:
+        written = [
+            i for i, (path, digest) in enumerate(hashes.items())
+            if previous_hashes.get(path) != digest or not (output_dir / path).is_dir()
+        ]
+        logger.info(
+            "%s of %s partitions unchanged since the last build",
+            f"{len(hashes) - len(written):,}", f"{len(hashes):,}",
+        )
+    elif clear_existing and output_dir.exists():
         logger.info("Clearing existing partitioned dataset at %s", output_dir)
         shutil.rmtree(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Take each partition column's type from the table, so both string slugs and numeric
-    # codes work. Forcing int32 here silently ruled out name-based partitioning.
-    partition_fields = []
-    for col in partition_cols:
-        field = table.schema.field(col)
-        # Dictionary-typed partition keys make pyarrow hang in teardown across thousands of
-        # partitions, so partition on the underlying values instead.
-        if pa.types.is_dictionary(field.type):
-            field = field.with_type(field.type.value_type)
-            table = table.set_column(
-                table.schema.get_field_index(col), field, table[col].cast(field.type)
+    logger.info("Writing %s partitions to %s", f"{len(written):,}", output_dir)
+    paths = list(hashes)
+    _write_partitions(
+        table.drop_columns(partition_cols),
+        [(output_dir / paths[i], bounds[i], bounds[i + 1]) for i in written],
+        jobs or os.cpu_count() or 1,
+    )
+
+    # Started afresh along with the dataset; otherwise the partitions of this frame replace
+    # their entries in the index already on disk.
+    fresh = previous_hashes is None and clear_existing
+    index = {} if fresh else read_partition_index(base_dir) or {}
+    for path, summary in zip(paths, _partition_summaries(table, bounds)):
+        summary["bytes"] = sum(f.stat().st_size for f in (output_dir / path).iterdir())
+        index[path] = summary
+    _write_partition_index(base_dir, index)
+
+    return hashes
+
+
+def _write_partitions(
+    content: pa.Table, partitions: list[tuple[Path, int, int]], jobs: int
+) -> None:
+    """Write each partition's rows into its directory, jobs at a time.
+
+    Each partition is a slice of the sorted table, so nothing is copied before it is encoded,
+    and pq.write_table releases the GIL while it encodes and compresses, so partitions are
+    written on threads. ds.write_dataset wrote them through one writer, which left most of
+    the zstd work on one core, and its thread pool could hang the process at exit.
+
+    Args:
+        content: The sorted table, without its partition columns.
+        partitions: Each partition's directory, and where its rows start and end in content.
+        jobs: Partitions to write at once.
+    """
+
+    def write(partition: tuple[Path, int, int]) -> None:
+        directory, start, end = partition
+        # As ds.write_dataset's delete_matching did: whatever the partition held is replaced.
+        if directory.exists():
+            shutil.rmtree(directory)
+        directory.mkdir(parents=True)
+        for i, first in enumerate(range(start, end, _MAX_ROWS_PER_FILE)):
+            pq.write_table(
+                content.slice(first, min(_MAX_ROWS_PER_FILE, end - first)),
+                directory / f"part-{i}.parquet",
+                **get_parquet_write_options(),
             )
-        partition_fields.append(field)
-    partition_schema = pa.schema(partition_fields)
-
-    # The same codec as get_parquet_write_options, but only the keys make_write_options
-    # accepts: row-group sizing is set on ds.write_dataset below instead.
-    parquet_format = ds.ParquetFileFormat()
-    file_options = parquet_format.make_write_options(
-        compression="zstd",
-        compression_level=15,
-        use_dictionary=True,
-        write_statistics=True,
+
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="partitions") as pool:
+        # Consumed here, so the first partition that fails raises.
+        for _ in pool.map(write, partitions):
+            pass
+
+
+def _partition_hashes(
+    df: pd.DataFrame, order: np.ndarray, table: pa.Table, partition_cols: list[str]
+) -> tuple[np.ndarray, dict[str, str]]:
+    """Hash each partition's rows, in order, with the schema they are written with.
+
+    Rows are hashed from the frame, a column at a time, rather than from the table, whose
+    label columns hash only by decoding them.
+
+    Args:
+        df: Frame being written.
+        order: Position in df of each row of table.
+        table: The frame as written, sorted by partition_cols.
+        partition_cols: Columns the dataset is partitioned by.
+
+    Returns:
+        Where each partition's rows start in table, followed by the number of rows, and each
+        partition's hash by its Hive path, e.g. "donor_slug=france/recipient_slug=kenya", in
+        the same order.
+    """
+    content = [field for field in table.schema if field.name not in partition_cols]
+    # The schema goes into every hash: a column added or widened changes every file. Label
+    # columns count by their values, so a dictionary outgrowing its index type does not.
+    schema = json.dumps(
+        [
+            [field.name, str(getattr(field.type, "value_type", field.type))]
+            for field in content
+        ]
+    ).encode()
+    row_hashes = np.zeros(len(df), dtype="uint64")
+    for field in content:
+        column = pd.util.hash_pandas_object(df[field.name], index=False).to_numpy()
+        row_hashes = row_hashes * np.uint64(1_000_003) ^ column
+    row_hashes = row_hashes[order]
+
+    # A partition starts at the first row, and wherever a partition column's value changes,
+    # to or from null included; the sort puts a column's nulls together, after its values.
+    boundary = np.zeros(table.num_rows, dtype=bool)
+    boundary[:1] = True
+    for col in partition_cols:
+        after, before = table[col][1:], table[col][:-1]
+        changed = pc.coalesce(
+            pc.not_equal(after, before), pc.xor(pc.is_null(after), pc.is_null(before))
+        )
+        boundary[1:] |= changed.to_numpy(zero_copy_only=False)
+    starts = np.flatnonzero(boundary)
+    bounds = np.r_[starts, table.num_rows]
+
+    keys = [table[col].take(starts).to_pylist() for col in partition_cols]
+    hashes = {}
+    for i, (start, end) in enumerate(pairwise(bounds)):
+        path = "/".join(_hive_segment(col, values[i]) for col, values in zip(partition_cols, keys))
+        digest = hashlib.sha256(schema + row_hashes[start:end].tobytes()).hexdigest()[:16]
+        hashes[path] = digest
+
+    return bounds, hashes
+
+
+def _hive_segment(col: str, value: object) -> str:
+    """One level of a partition's path, as ds.write_dataset's hive partitioning named it."""
+    if value is None:
+        return f"{col}={_NULL_PARTITION}"
+    return f"{col}={quote(str(value), safe='')}"
+
+
+def _partition_summaries(table: pa.Table, bounds: np.ndarray) -> list[dict]:
+    """What each partition of the sorted table holds, for the index, in partition order.
+
+    Args:
+        table: The frame as written, sorted by the partition columns.
+        bounds: Where each partition starts in table, followed by the number of rows.
+
+    Returns:
+        Each partition's rows, year range as [first, last], and the distinct values of each
+        indexed label column it has, sorted.
+    """
+    starts, counts = bounds[:-1], np.diff(bounds)
+    summaries = [{"rows": int(n)} for n in counts]
+    if not summaries:
+        return summaries
+
+    if "year" in table.column_names:
+        years = table["year"].to_numpy().astype("float64")
+        first, last = np.fmin.reduceat(years, starts), np.fmax.reduceat(years, starts)
+        for summary, lo, hi in zip(summaries, first, last):
+            summary["years"] = None if np.isnan(lo) else [int(lo), int(hi)]
+
+    partition_ids = np.repeat(np.arange(len(counts)), counts)
+    for col in [c for c in _INDEXED_LABELS if c in table.column_names]:
+        column = table[col].combine_chunks()
+        if not pa.types.is_dictionary(column.type):
+            column = column.dictionary_encode()
+        # Codes are renumbered in the order of the values they stand for: a dictionary keeps
+        # the order its values were first met in, or a categorical's, neither of them sorted.
+        order = pc.sort_indices(column.dictionary).to_numpy()
+        names = column.dictionary.take(order).to_pylist()
+        rank = np.empty(len(order), dtype="int64")
+        rank[order] = np.arange(len(order))
+        valid = column.is_valid().to_numpy(zero_copy_only=False)
+        codes = rank[column.indices.to_numpy(zero_copy_only=False)[valid]]
+        # One (partition, value) pair per distinct value in a partition, in partition order
+        # and in value order within each.
+        pairs = np.unique(partition_ids[valid] * len(names) + codes)
+        for summary in summaries:
+            summary[col] = []
+        for partition, code in zip(*np.divmod(pairs, max(len(names), 1))):
+            summaries[partition][col].append(names[code])
+
+    return summaries
+
+
+def read_partition_index(base_dir: str) -> dict[str, dict] | None:
+    """The index of a partitioned dataset on disk, if it has one.
+
+    Returns:
+        What each partition holds, by its path relative to the dataset: "rows", "bytes" on
+        disk, "years" as [first, last], and the distinct values of each of _INDEXED_LABELS
+        the data has.
+    """
+    path = PATHS.CDN_FILES / base_dir / INDEX_FILE
+    if not path.exists():
+        return None
+    index = json.loads(path.read_text())
+    return {
+        partition: {
+            key: [index["labels"][key][i] for i in value] if key in index["labels"] else value
+            for key, value in summary.items()
+        }
+        for partition, summary in index["partitions"].items()
+    }
+
+
+def _write_partition_index(base_dir: str, partitions: dict[str, dict]) -> None:
+    """Write a dataset's index, as read_partition_index returns it, atomically.
+
+    Label values are written once, under "labels", and each partition lists the positions
+    of its own in those lists: the same few indicators and sectors recur across thousands of
+    partitions.
+    """
+    labels = {
+        col: sorted({name for summary in partitions.values() for name in summary.get(col, ())})
+        for col in _INDEXED_LABELS
+        if any(col in summary for summary in partitions.values())
+    }
+    positions = {col: {name: i for i, name in enumerate(names)} for col, names in labels.items()}
+    index = {
+        "written_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "labels": labels,
+        "partitions": {
+            partition: {
+                key: [positions[key][name] for name in value] if key in labels else value
+                for key, value in summary.items()
+            }
+            for partition, summary in sorted(partitions.items())
+        },
+    }
+
+    # Written aside and renamed, so a reader never sees half an index.
+    path = PATHS.CDN_FILES / base_dir / INDEX_FILE
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(index, separators=(",", ":")))
+    tmp.replace(path)
+
+
+def _manifest_path(base_dir: str, kind: str) -> Path:
+    # Beside the dataset rather than in it, so uploading the dataset does not publish them.
+    return PATHS.CDN_FILES / f"{base_dir}_{kind}.json"
+
+
+def read_partition_manifest(base_dir: str) -> dict[str, str] | None:
+    """The partition hashes recorded when the dataset on disk was written, if there is one."""
+    path = _manifest_path(base_dir, "manifest")
+    if not path.exists() or not (PATHS.CDN_FILES / base_dir).is_dir():
+        return None
+    return json.loads(path.read_text())["partitions"]
+
+
+def partition_changes(
+    base_dir: str, hashes: dict[str, str], previous_hashes: dict[str, str] | None
+) -> dict:
+    """Finish a dataset written with write_partitioned_dataset: record it, and what changed.
+
+    Partitions the previous build had but this one does not are removed from disk, and from
+    the dataset's index. The new hashes are saved as the manifest the next build compares
+    against, and what changed is saved beside it as {base_dir}_changes.json for the uploader.
+
+    Args:
+        base_dir: The dataset's directory under PATHS.CDN_FILES.
+        hashes: Every partition's hash, from all the write_partitioned_dataset calls that
+            wrote the dataset.
+        previous_hashes: The manifest from before the build, or None if there was none.
+
+    Returns:
+        Partition paths "added", "changed" and "removed", and "complete": whether the lists
+        describe the whole difference from the last build. Without a manifest to compare
+        against they do not, and the uploader has to sync everything.
+    """
+    previous = previous_hashes or {}
+    changes = {
+        "complete": previous_hashes is not None,
+        "added": sorted(path for path in hashes if path not in previous),
+        "changed": sorted(
+            path for path in hashes if path in previous and previous[path] != hashes[path]
+        ),
+        "removed": sorted(path for path in previous if path not in hashes),
+    }
+
+    output_dir = PATHS.CDN_FILES / base_dir
+    for path in changes["removed"]:
+        shutil.rmtree(output_dir / path, ignore_errors=True)
+        parent = (output_dir / path).parent
+        if parent != output_dir and parent.is_dir() and not any(parent.iterdir()):
+            parent.rmdir()
+
+    index = read_partition_index(base_dir)
+    if index is not None and index.keys() - hashes.keys():
+        _write_partition_index(
+            base_dir, {path: summary for path, summary in index.items() if path in hashes}
+        )
+
+    logger.info(
+        "Partitions added: %s, changed: %s, removed: %s, unchanged: %s",
+        f"{len(changes['added']):,}", f"{len(changes['changed']):,}",
+        f"{len(changes['removed']):,}",
+        f"{len(hashes) - len(changes['added']) - len(changes['changed']):,}",
     )
 
-    # pyarrow's default ceiling is 1024 partitions per fragment; raise it to what the data
-    # actually needs so a legitimate dataset is never silently capped.
-    n_partitions = optimized.groupby(partition_cols, observed=True, dropna=False).ngroups
-    logger.info("Writing %s partitions to %s", f"{n_partitions:,}", output_dir)
-
-    # Write partitioned dataset
-    ds.write_dataset(
-        data=table,
-        base_dir=str(output_dir),
-        format="parquet",
-        partitioning=ds.partitioning(partition_schema, flavor="hive"),
-        basename_template="part-{i}.parquet",
-        file_options=file_options,
-        existing_data_behavior="delete_matching",
-        max_partitions=max(1_024, n_partitions + 1),
-        max_rows_per_file=1_000_000,
-        max_rows_per_group=100_000,
-        min_rows_per_group=100_000,
+    _manifest_path(base_dir, "manifest").write_text(
+        json.dumps({"written_at": datetime.now(UTC).isoformat(timespec="seconds"),
+                    "partitions": hashes}, indent=2)
     )
+    _manifest_path(base_dir, "changes").write_text(json.dumps(changes, indent=2))
+
+    return changes
+
+
+# ============================================================================
+# Derived-table cache
+# ============================================================================
+
+# Tables the pipeline derives from an oda_data bulk file, kept beside oda_data's own cache so
+# CI restores them with it.
+DERIVED_CACHE_DIR: Path = PATHS.DATA / "derived"
+
+# Parquet schema metadata key holding the caller's description of what a cached table covers.
+_COVERAGE_KEY = b"oda_dashboard.coverage"
+
+
+def crs_bulk_path() -> Path | None:
+    """The CRS bulk file oda_data would read right now, or None if it would download one first.
+
+    That is None when there is none downloaded yet, or the one there is was downloaded by
+    another oda_data version or is older than oda_data's time to live.
+    """
+    return _crs_bulk()[0]
+
+
+def crs_bulk_fingerprint() -> str | None:
+    """Identify the CRS bulk file oda_data would read right now.
+
+    Built from oda_data's own record of the download (when, and by which oda_data version) and
+    the file's size and modification time, so it changes whenever oda_data refreshes the file.
+
+    Returns:
+        A short hash, or None when there is no usable bulk file (see crs_bulk_path).
+    """
+    return _crs_bulk()[1]
+
+
+def _crs_bulk() -> tuple[Path | None, str | None]:
+    """The usable CRS bulk file and its fingerprint, or (None, None)."""
+    from oda_data import CRSData
+
+    bulk_cache = CRSData().bulk_cache
+    try:
+        record = json.loads(bulk_cache.manifest_path.read_text())["CRSData_bulk"]
+        path = bulk_cache.base_dir / record["filename"]
+        stat = path.stat()
+        downloaded = datetime.fromisoformat(record["downloaded_at"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+    if record.get("version") != version("oda_data"):
+        return None, None
+    if datetime.now(UTC) - downloaded > timedelta(seconds=bulk_cache.ttl_seconds):
+        return None, None
+
+    identity = [record["downloaded_at"], record["version"], stat.st_size, stat.st_mtime_ns]
+    return path, hashlib.sha256(json.dumps(identity).encode()).hexdigest()[:16]
+
+
+def read_derived_table(name: str, fingerprint: str) -> tuple[pd.DataFrame, dict] | None:
+    """Read a table cached by write_derived_table for this fingerprint, if there is one.
+
+    Args:
+        name: Name the table was cached under.
+        fingerprint: Fingerprint of the source it must have been derived from.
+
+    Returns:
+        The table and the coverage it was written with, or None on a miss.
+    """
+    path = DERIVED_CACHE_DIR / f"{name}-{fingerprint}.parquet"
+    if not path.exists():
+        return None
+
+    try:
+        table = pq.read_table(path)
+        coverage = json.loads(table.schema.metadata[_COVERAGE_KEY])
+    except (OSError, KeyError, ValueError, pa.ArrowException) as e:
+        logger.warning("Ignoring unreadable cache file %s: %s", path, e)
+        return None
+
+    return table.to_pandas(), coverage
+
+
+def write_derived_table(df: pd.DataFrame, name: str, fingerprint: str, coverage: dict) -> None:
+    """Cache a table derived from a source, replacing any derived from earlier versions of it.
+
+    Args:
+        df: Table to cache.
+        name: Name to cache it under, unique per table and per selection it was derived for.
+        fingerprint: Fingerprint of the source it was derived from.
+        coverage: JSON-serialisable description of what the table covers, e.g. its years,
+            returned by read_derived_table so callers can tell what they can serve from it.
+    """
+    DERIVED_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = DERIVED_CACHE_DIR / f"{name}-{fingerprint}.parquet"
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = (table.schema.metadata or {}) | {_COVERAGE_KEY: json.dumps(coverage).encode()}
+
+    # Written aside and renamed, so a build killed mid-write never leaves a truncated file.
+    tmp_path = path.with_suffix(".tmp")
+    pq.write_table(table.replace_schema_metadata(metadata), tmp_path, compression="zstd")
+    tmp_path.replace(path)
+
+    for stale in DERIVED_CACHE_DIR.glob(f"{name}-*.parquet"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+
+
+# ============================================================================
+# Arrow IPC scratch files
+# ============================================================================
+
+
+def write_arrow_ipc(df: pd.DataFrame, path: Path) -> Path:
+    """Write a frame as an uncompressed Arrow IPC file, for another process to map.
+
+    Used to hand frames between the processes of one build: unlike a pickle, the file is
+    mapped by the reader rather than copied through a pipe, and unlike parquet it needs no
+    decoding. Pandas metadata rides along, so categoricals and nullable integers come back as
+    they went in.
+
+    Args:
+        df: Frame to write.
+        path: File to write it to.
+
+    Returns:
+        path, for handing straight to read_arrow_ipc.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return path
+
+
+def read_arrow_ipc(path: Path) -> pd.DataFrame:
+    """Read a frame written by write_arrow_ipc, mapping the file rather than reading it in."""
+    with pa.memory_map(str(path)) as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
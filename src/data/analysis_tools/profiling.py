@@ -0,0 +1,193 @@
+"""Per-stage timings and memory for the view builders, and the run report they add up to.
+
+Each builder wraps its stages in ``stage`` (or its readers in ``profiled``), which logs the
+stage as it starts, as the builders always have, and records what it cost: wall and CPU time,
+how far it pushed the process's peak RSS, and the rows and memory of the frames going in and
+coming out. ``write_run_report`` then writes the records to a JSON beside the view options and
+logs them as a table, so a regression or the stage pushing a runner out of memory shows up in
+the build log rather than as an unexplained kill.
+
+Records are kept per thread, so views built concurrently in one process each report their own
+stages; peak RSS is the process's, so theirs overlap. Stages run in the sectors view's worker
+processes are not in the parent's report; the stage wrapping the pool accounts for them as a
+whole.
+"""
+
+import json
+import resource
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from functools import wraps
+
+import pandas as pd
+
+from src.data.config import PATHS, logger
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+_MAXRSS_PER_MIB = 1024 * 1024 if sys.platform == "darwin" else 1024
+
+# Each thread's records and nesting depth; see _records.
+_local = threading.local()
+
+
+def _records() -> list["StageRecord"]:
+    if not hasattr(_local, "stages"):
+        _local.stages, _local.depth = [], 0
+    return _local.stages
+
+
+@dataclass
+class StageRecord:
+    """What one stage cost.
+
+    peak_rss_delta_mib is how far the stage raised the process's high-water mark, so a stage
+    that stays under an earlier peak shows 0 however much it allocated. Frame memory is
+    shallow: object columns count their pointers, not their strings, which keeps measuring
+    cheap on frames of tens of millions of rows. Peak RSS is the figure to trust.
+    """
+
+    name: str
+    depth: int
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_mib: float = 0.0
+    peak_rss_delta_mib: float = 0.0
+    rows_in: int | None = None
+    rows_out: int | None = None
+    frame_in_mib: float | None = None
+    frame_out_mib: float | None = None
+    _frame_out: pd.DataFrame | None = field(default=None, repr=False)
+
+    def output(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Note df as the stage's result, and hand it back for assignment."""
+        self._frame_out = df
+        return df
+
+
+def _peak_rss_mib() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / _MAXRSS_PER_MIB
+
+
+def _frame_mib(df: pd.DataFrame) -> float:
+    return round(df.memory_usage(index=True, deep=False).sum() / 2**20, 1)
+
+
+@contextmanager
+def stage(name: str, df: pd.DataFrame | None = None) -> Iterator[StageRecord]:
+    """Log a stage and record its cost, for the run report.
+
+    Args:
+        name: Stage name, logged as "<name>..." when the stage starts.
+        df: The frame the stage starts from, if any, for its rows and memory in. The frame
+            it produces is noted with ``.output(df)`` on the yielded record.
+
+    Yields:
+        The stage's record, filled in when the block exits, whether or not it raises.
+    """
+    logger.info("%s...", name)
+    records = _records()
+    record = StageRecord(name=name, depth=_local.depth)
+    if df is not None:
+        record.rows_in, record.frame_in_mib = len(df), _frame_mib(df)
+    records.append(record)
+
+    rss_before = _peak_rss_mib()
+    wall, cpu = time.perf_counter(), time.process_time()
+    _local.depth += 1
+    try:
+        yield record
+    finally:
+        _local.depth -= 1
+        record.wall_s = round(time.perf_counter() - wall, 3)
+        record.cpu_s = round(time.process_time() - cpu, 3)
+        record.peak_rss_mib = round(_peak_rss_mib(), 1)
+        record.peak_rss_delta_mib = round(record.peak_rss_mib - rss_before, 1)
+        if record._frame_out is not None:
+            record.rows_out = len(record._frame_out)
+            record.frame_out_mib = _frame_mib(record._frame_out)
+            record._frame_out = None
+
+
+def profiled(name: str) -> Callable:
+    """Decorate a function returning a frame to record it as a stage.
+
+    The first DataFrame among its arguments, if any, is taken as the frame in.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            frames = [a for a in (*args, *kwargs.values()) if isinstance(a, pd.DataFrame)]
+            with stage(name, frames[0] if frames else None) as record:
+                result = func(*args, **kwargs)
+                if isinstance(result, pd.DataFrame):
+                    record.output(result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def write_run_report(view: str) -> None:
+    """Write this process's stage records as {view}_run_report.json and log them as a table.
+
+    The report sits beside the view's options in PATHS.TOOLS. Records are cleared afterwards,
+    so a thread building more than one view reports each on its own.
+
+    Args:
+        view: View name, e.g. "sectors_view".
+    """
+    records = [
+        {k: v for k, v in asdict(record).items() if not k.startswith("_")}
+        for record in _records()
+    ]
+    top_level = [r for r in records if r["depth"] == 0]
+    report = {
+        "view": view,
+        "finished_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "wall_s": round(sum(r["wall_s"] for r in top_level), 3),
+        "cpu_s": round(sum(r["cpu_s"] for r in top_level), 3),
+        "peak_rss_mib": round(_peak_rss_mib(), 1),
+        "stages": records,
+    }
+
+    path = PATHS.TOOLS / f"{view}_run_report.json"
+    logger.info("Saving run report to %s", path)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    logger.info("%s", _summary_table(report))
+    _records().clear()
+
+
+def _summary_table(report: dict) -> str:
+    """The report as a fixed-width table, nested stages indented under their parent."""
+
+    def count(value: int | None) -> str:
+        return "" if value is None else f"{value:,}"
+
+    lines = [
+        f"Run report for {report['view']}:",
+        (
+            f"{'stage':<48} {'wall s':>8} {'cpu s':>8} {'peak MiB':>9} {'+MiB':>7} "
+            f"{'rows in':>12} {'rows out':>12}"
+        ),
+    ]
+    for r in report["stages"]:
+        name = ("  " * r["depth"] + r["name"])[:48]
+        lines.append(
+            f"{name:<48} {r['wall_s']:>8.2f} {r['cpu_s']:>8.2f} {r['peak_rss_mib']:>9.0f} "
+            f"{r['peak_rss_delta_mib']:>7.0f} {count(r['rows_in']):>12} "
+            f"{count(r['rows_out']):>12}".rstrip()
+        )
+    lines.append(
+        f"{'total':<48} {report['wall_s']:>8.2f} {report['cpu_s']:>8.2f} "
+        f"{report['peak_rss_mib']:>9.0f}"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,116 @@
+"""Inputs several views fetch, fetched once when the views are built in one process.
+
+Each loader run on its own reads its inputs itself, and nothing here changes that. When
+src/data/build.py builds several views in one process it turns sharing on, and the fetches
+that more than one view makes are then kept for the rest of the build: the recipient
+classifications, the pydeflate conversion factors, and donor GNI. Views built concurrently
+wait for a fetch another view has already started rather than starting their own.
+
+A fetch takes part by keeping what it fetched in a slot (see slot), or, for a plain function of
+hashable arguments, through the shared decorator. Frames are handed out as copies, since the
+views modify what they are given.
+"""
+
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any
+
+import pandas as pd
+
+from src.data.config import logger
+
+# None while sharing is off, else the values kept so far by key.
+_values: dict | None = None
+_locks: dict = {}
+_guard = threading.Lock()
+
+
+class Slot:
+    """Where one input is kept: value is None until something has been kept in it."""
+
+    def __init__(self, value: Any = None, keep: bool = True):
+        self.value = value
+        self._keep = keep
+
+    def set(self, value: Any) -> None:
+        """Keep value, if sharing is on."""
+        if self._keep:
+            self.value = value
+
+
+@contextmanager
+def sharing() -> Iterator[None]:
+    """Keep shared inputs for the duration of the block, then release them."""
+    global _values
+    with _guard:
+        _values = {}
+    try:
+        yield
+    finally:
+        with _guard:
+            logger.info("Releasing %s shared inputs", len(_values))
+            _values = None
+            _locks.clear()
+
+
+@contextmanager
+def slot(key: tuple) -> Iterator[Slot]:
+    """The slot an input is kept in, held exclusively until the block exits.
+
+    With sharing off the slot is always empty and keeps nothing, so callers need no second
+    path. With it on, a second caller for the same key waits until the first has filled it.
+
+    Args:
+        key: Identifies the input, e.g. ("gni", 1990, 2025).
+    """
+    with _guard:
+        if _values is None:
+            lock = None
+        else:
+            lock = _locks.setdefault(key, threading.Lock())
+    if lock is None:
+        yield Slot(keep=False)
+        return
+
+    with lock:
+        kept = Slot(_values.get(key))
+        yield kept
+        if kept.value is not None:
+            _values[key] = kept.value
+
+
+def shared(func: Callable) -> Callable:
+    """Keep what func returns for each set of arguments, while sharing is on.
+
+    Arguments are keyed by value, with lists, ranges and sets taken as the values they hold,
+    so each must be hashable once converted. Returned frames are copied on the way out.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func.__qualname__, _hashable(args), _hashable(sorted(kwargs.items())))
+        with slot(key) as kept:
+            if kept.value is not None:
+                logger.info("%s served from the shared inputs", func.__name__)
+                return copied(kept.value)
+            value = func(*args, **kwargs)
+            kept.set(value)
+            # What is kept must stay as fetched, so the caller gets its own copy.
+            return value if kept.value is None else copied(value)
+
+    return wrapper
+
+
+def copied(value: Any) -> Any:
+    """A copy of a kept frame, or the value itself if it is not one."""
+    return value.copy() if isinstance(value, pd.DataFrame) else value
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, (list, tuple, range)):
+        return tuple(_hashable(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_hashable(v) for v in value))
+    return value
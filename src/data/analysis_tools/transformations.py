@@ -2,7 +2,8 @@
 
 Everything here takes one or more frames and returns a frame — currency conversion, group
 totals, the CRS classification join, the long-to-wide pivot, and the share columns. Nothing
-here writes an artifact, and nothing decides how an entity is labelled.
+here writes an artifact, and nothing decides how an entity is labelled; the one table cached
+on disk, the CRS classifications, goes through ``outputs`` to get there.
 
 The rule for what belongs elsewhere: writing artifacts is ``outputs``, labelling is ``naming``,
 constants are ``config``. Two functions here do fetch from the OECD — ``get_gni`` and
@@ -19,6 +20,11 @@ Sections, in order:
     7. Shares
 """
 
+import hashlib
+from collections.abc import Collection
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
 from oda_data import OECDClient
 from pydeflate import oecd_dac_deflate, oecd_dac_exchange, set_pydeflate_path
@@ -47,22 +53,85 @@ from src.data.config import (
     UNITS_PER_MILLION,
 )
 
+from src.data.analysis_tools.crs_scan import CrsScan
+from src.data.analysis_tools.outputs import (
+    crs_bulk_fingerprint,
+    read_derived_table,
+    write_derived_table,
+)
 from src.data.analysis_tools.naming import (
     apply_name_overrides,
     normalize_unspecified_names,
 )
+from src.data.analysis_tools.shared_inputs import shared, slot
 
 set_pydeflate_path(PATHS.PYDEFLATE)
 
 
-def convert_values_to_units(df: pd.DataFrame) -> pd.DataFrame:
+# Rows of a value column converted at a time: enough to amortise the per-chunk overhead,
+# few enough that the float64 working copies stay at a few MiB.
+_UNITS_CHUNK_ROWS: int = 1 << 20
+
+
+def _chunked_units(values: np.ndarray):
+    """Yield (start, stop, units) over values in millions, converted to rounded whole units.
+
+    Each chunk is widened to float64 before scaling, so the rounding sees every digit the
+    source had whatever the column's own float width. See the note on UNITS_PER_MILLION.
+    """
+    for start in range(0, len(values), _UNITS_CHUNK_ROWS):
+        stop = min(start + _UNITS_CHUNK_ROWS, len(values))
+        yield start, stop, np.round(values[start:stop].astype("float64") * UNITS_PER_MILLION)
+
+
+def _as_float_values(series: pd.Series) -> np.ndarray:
+    """A value column as floats: plain float columns without a copy, anything else (nullable
+    or integer) materialised once as float64 with NaN for missing."""
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind == "f":
+        return series.to_numpy()
+    return series.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def largest_in_units(series: pd.Series) -> float:
+    """The largest magnitude in a value column in millions, once converted to whole units.
+
+    The first of convert_values_to_units' two passes, for callers converting a dataset in
+    parts that must agree on which columns need Int64.
+
+    Raises:
+        ValueError: If the column holds infinite values, which have no integer form.
+    """
+    return _largest_in_units(_as_float_values(series), series.name)
+
+
+def _largest_in_units(values: np.ndarray, name: str) -> float:
+    """largest_in_units over a column already converted by _as_float_values."""
+    largest = 0.0
+    for _, _, units in _chunked_units(values):
+        magnitudes = np.abs(units)
+        if np.isinf(magnitudes).any():
+            raise ValueError(f"{name}: infinite values cannot be converted to units")
+        if not np.isnan(magnitudes).all():
+            largest = max(largest, float(np.nanmax(magnitudes)))
+
+    return largest
+
+
+def convert_values_to_units(df: pd.DataFrame, int64_cols: Collection[str] = ()) -> pd.DataFrame:
     """Convert every value column from millions to whole currency units.
 
     Integers in units compress far better in parquet than floats in millions, which matters for
     a dataset served over HTTP. Percentage columns are left alone.
 
+    Each column is streamed in chunks, twice: once to find its largest value and so whether it
+    fits Int32, then again to write the units straight into a preallocated integer buffer. No
+    full-length float copy is made, and the frame itself is converted in place.
+
     Args:
-        df: Wide frame whose value_* columns are in millions.
+        df: Wide frame whose value_* columns are in millions. Modified in place.
+        int64_cols: Value columns to store as Int64 even if this frame's values would fit
+            Int32, for frames written as parts of one dataset that must share a schema.
+            Columns that need Int64 get it whether listed or not.
 
     Returns:
         The frame with value_* columns as Int32, or Int64 where the range demands it.
@@ -71,22 +140,27 @@ def convert_values_to_units(df: pd.DataFrame) -> pd.DataFrame:
         This is the contract with the frontend: it divides value_* columns by
         UNITS_PER_MILLION to get back to millions.
     """
-    df = df.copy()
     promoted_to_int64 = []
     value_cols = [c for c in df.columns if c.startswith("value_")]
 
     for col in value_cols:
-        # UNITS_PER_MILLION is a float on purpose; an int multiplier silently coarsens the
-        # result to float32 precision. See the note on the constant before touching this line.
-        units = (df[col] * UNITS_PER_MILLION).round()
-        largest = units.abs().max()
+        # Converted once and read twice, so a nullable or integer column is only ever
+        # materialised as float64 the one time.
+        values = _as_float_values(df[col])
+        largest = _largest_in_units(values, col)
 
         # Int32 tops out at ~2.1 billion units, i.e. ~2,147 million.
-        if pd.notna(largest) and largest > INT32_MAX:
-            df[col] = units.astype("Int64")
+        dtype = "int64" if largest > INT32_MAX or col in int64_cols else "int32"
+        if dtype == "int64":
             promoted_to_int64.append(col)
-        else:
-            df[col] = units.astype("Int32")
+
+        data = np.empty(len(values), dtype=dtype)
+        missing = np.empty(len(values), dtype=bool)
+        for start, stop, units in _chunked_units(values):
+            missing[start:stop] = np.isnan(units)
+            data[start:stop] = np.where(missing[start:stop], 0, units)
+
+        df[col] = pd.Series(pd.arrays.IntegerArray(data, missing), index=df.index, copy=False)
 
     logger.info(
         "Converted %s value columns to units%s",
@@ -97,6 +171,7 @@ def convert_values_to_units(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+@shared
 def get_gni(start_year: int, end_year: int) -> pd.DataFrame:
     """Read donor GNI, with the aggregates the financing view needs.
 
@@ -124,28 +199,104 @@ def get_gni(start_year: int, end_year: int) -> pd.DataFrame:
 
     gni_df = apply_name_overrides(gni_df, AGGREGATE_DONORS, "donor")
 
-    eu27_df = get_group_total(gni_df, EU_COUNTRIES, ["year"], group_name="EU27 countries")
-    # Label must match the donor_name used by the views, or the GNI merge silently
-    # yields NaN. EU institutions have no GNI of their own, so the denominator for
-    # the EU27 + institutions aggregate is the member states' combined GNI.
-    eu27_eui_df = get_group_total(
-        gni_df, EU_COUNTRIES, ["year"], group_name="EU27 & EU Institutions"
-    )
-    bilateral_df = get_group_total(
+    groups_df = get_group_totals(
         gni_df,
-        BILATERAL_DONORS,
+        {
+            "EU27 countries": EU_COUNTRIES,
+            # Label must match the donor_name used by the views, or the GNI merge silently
+            # yields NaN. EU institutions have no GNI of their own, so the denominator for
+            # the EU27 + institutions aggregate is the member states' combined GNI.
+            "EU27 & EU Institutions": EU_COUNTRIES,
+            "All bilateral donors": BILATERAL_DONORS,
+        },
         ["year"],
-        group_name="All bilateral donors"
     )
 
     return (
-        pd.concat([gni_df, eu27_df, eu27_eui_df, bilateral_df])
+        pd.concat([gni_df, groups_df])
         .rename(columns={"value": "gni"})
         .drop(columns="donor_code")
     )
 
 
 
+def _factorize_rows(df: pd.DataFrame, cols: list[str]) -> tuple[np.ndarray, pd.DataFrame]:
+    """Number each row by its combination of cols, without building an index over the frame.
+
+    Each column is factorized on its own (free for categoricals) and folded into a running
+    mixed-radix code. The running code is only compacted when the next column would overflow
+    it, and once at the end, so a frame is hashed about once rather than once per column.
+
+    Args:
+        df: Frame to number.
+        cols: Columns whose combinations define the keys. Nulls are a key like any other.
+
+    Returns:
+        The key position of every row, in order of first appearance, and the distinct keys in
+        that order with their original dtypes.
+    """
+    codes, n_codes = np.zeros(len(df), dtype="int64"), 1
+    for col in cols:
+        col_codes, col_uniques = pd.factorize(df[col], use_na_sentinel=False)
+        radix = max(len(col_uniques), 1)
+        if n_codes * radix > 2**62:
+            codes, uniques = pd.factorize(codes)
+            n_codes = len(uniques)
+        codes, n_codes = codes * radix + col_codes, n_codes * radix
+    codes, _ = pd.factorize(codes)
+
+    first = np.full(codes.max() + 1 if len(codes) else 0, len(codes), dtype="int64")
+    np.minimum.at(first, codes, np.arange(len(codes)))
+    keys = df[cols].iloc[first].reset_index(drop=True)
+
+    return codes, keys
+
+
+def value_columns(df: pd.DataFrame) -> list[str]:
+    """The columns holding amounts: "value" in a long frame, one per pair in a wide one."""
+    return [c for c in df.columns if c == "value" or c.startswith("value_")]
+
+
+def sum_value_columns(
+    df: pd.DataFrame, group_cols: list[str], min_count: int = 0
+) -> pd.DataFrame:
+    """Sum every value column by group_cols, in a long frame or a wide one alike.
+
+    As with groupby().sum(), a group whose values are all NaN sums to 0 by default, which is
+    what the published tables have always shown. Pass min_count=1 to keep such groups NaN.
+
+    Args:
+        df: Frame with "value" or value_* columns.
+        group_cols: Columns to group by.
+        min_count: Non-NaN values a group needs for its sum not to be NaN.
+
+    Returns:
+        One row per group_cols combination, with the summed value columns.
+    """
+    return (
+        df.groupby(group_cols, dropna=False, observed=True)[value_columns(df)]
+        .sum(min_count=min_count)
+        .reset_index()
+    )
+
+
+def drop_empty_values(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop rows carrying no amount: every value column null or zero.
+
+    In a wide frame, zero cells become NaN as well, so each currency/price pair is treated as
+    its own row of the long layout would have been.
+
+    Args:
+        df: Frame with "value" or value_* columns.
+
+    Returns:
+        The rows with at least one non-null, non-zero value.
+    """
+    value_cols = value_columns(df)
+    df = df.assign(**{col: df[col].mask(df[col].eq(0)) for col in value_cols})
+    return df.loc[df[value_cols].notna().any(axis=1)]
+
+
 def _default_coverage_cols(df: pd.DataFrame, column: str) -> list[str]:
     """Pick the combinations to assess group coverage over.
 
@@ -178,6 +329,7 @@ def _warn_missing_group_members(
     code_col: str,
     coverage_cols: list[str],
     label: str,
+    present: pd.DataFrame | None = None,
 ) -> None:
     """Warn about group members missing from the data being aggregated.
 
@@ -191,9 +343,15 @@ def _warn_missing_group_members(
         code_col: Column holding the member codes.
         coverage_cols: Columns whose combinations are checked for completeness.
         label: Name of the total being built, used in the log message.
+        present: The distinct code and coverage combinations in df, where the caller has
+            already found them for several groups at once. Narrowed to this group here.
     """
     members = set(group_dict)
-    present = df.loc[df[code_col].isin(members), [code_col, *coverage_cols]].drop_duplicates()
+    if present is None:
+        present = df.loc[df[code_col].isin(members), [code_col, *coverage_cols]]
+    else:
+        present = present.loc[present[code_col].isin(members)]
+    present = present.drop_duplicates()
     found = set(present[code_col].dropna().unique())
 
     never = sorted(members - found)
@@ -235,14 +393,15 @@ def get_group_total(
         group_cols: list,
         column: str = "donor",
         check_all_keys: bool = True,
-        group_name: str = None,
-        group_code: str = None,
-        coverage_cols: list[str] = None,
+        group_name: str | None = None,
+        group_code: str | None = None,
+        coverage_cols: list[str] | None = None,
+        min_count: int = 0,
 ) -> pd.DataFrame:
     """Sum a group of donors or recipients into a single aggregate row per group_cols.
 
     Args:
-        df: Long-form frame with a "value" column.
+        df: Frame with "value" or value_* columns.
         group_dict: Mapping of {member code: member name} defining the group.
         group_cols: Columns to group by when summing.
         column: Entity being aggregated over, "donor" or "recipient".
@@ -252,6 +411,9 @@ def get_group_total(
         group_code: Value to assign to the aggregate's code column.
         coverage_cols: Combinations to check coverage over. Defaults to year plus the
             counterpart entity, e.g. year x recipient when aggregating donors.
+        min_count: Non-NaN values a total needs not to be NaN, as in sum_value_columns.
+            Pass 1 for a wide frame, whose NaN cells stand for rows the long layout would
+            not have had.
 
     Returns:
         The aggregated frame.
@@ -269,11 +431,8 @@ def get_group_total(
             group_name or f"{column} group total",
         )
 
-    df = (
-        df.loc[lambda d: d[code_col].isin(group_dict)]
-        .groupby(group_cols, observed=True, dropna=False)["value"]
-        .sum()
-        .reset_index()
+    df = sum_value_columns(
+        df.loc[lambda d: d[code_col].isin(group_dict)], group_cols, min_count=min_count
     )
 
     if group_name:
@@ -286,10 +445,194 @@ def get_group_total(
 
 
 
+def _expand_memberships(codes: pd.Series, groups: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+    """Pair every row with every group its code belongs to.
+
+    Args:
+        codes: Member code of each row.
+        groups: Member codes of each group, as {code: name}. Codes may be in several groups.
+
+    Returns:
+        Row positions and group positions, one pair per membership: a row whose code is in
+        two groups appears twice, a row in none does not appear.
+    """
+    membership = pd.DataFrame(
+        [(code, g) for g, members in enumerate(groups) for code in members],
+        columns=["code", "group"],
+    ).sort_values("code", kind="stable")
+
+    # Membership as a sparse code x group matrix, in compressed rows: the groups of the code at
+    # position c are group_of[offsets[c]:offsets[c + 1]].
+    member_codes = pd.Index(membership["code"].unique())
+    per_code = membership.groupby("code", sort=True).size().to_numpy()
+    offsets = np.concatenate([[0], np.cumsum(per_code)])
+    group_of = membership["group"].to_numpy()
+
+    code_ids = member_codes.get_indexer(codes)
+    rows = np.flatnonzero(code_ids >= 0)
+    code_ids = code_ids[rows]
+
+    # Repeat each row once per group its code belongs to; nth is the repeat's place among them.
+    repeats = per_code[code_ids]
+    row_of = np.repeat(rows, repeats)
+    nth = np.arange(len(row_of)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+
+    return row_of, group_of[np.repeat(offsets[code_ids], repeats) + nth]
+
+
+def _sum_into_buckets(
+    df: pd.DataFrame,
+    key_ids: np.ndarray,
+    keys: pd.DataFrame,
+    assignments: list[tuple[np.ndarray | None, np.ndarray]],
+    n_buckets: int,
+    min_count: int = 0,
+) -> pd.DataFrame:
+    """Sum the value columns into every (bucket, key) cell the rows are assigned to.
+
+    The reduction behind the batched group builders. A bucket is one output group, say a
+    region or a donor aggregate; a row can be added to any number of them. Most of the
+    n_buckets x n_keys cells are never filled, so nothing is allocated per cell: each
+    assignment is summed over the cells it touches alone, numbered compactly with np.unique,
+    and the assignments' partial sums are then combined the same way. Only one assignment's
+    cell numbers are ever held at a time.
+
+    Args:
+        df: Frame with "value" or value_* columns.
+        key_ids: Key position of every row, from _factorize_rows.
+        keys: The distinct keys those positions refer to.
+        assignments: Pairs of row positions (None for every row, in order) and the bucket
+            each of those rows is added to.
+        n_buckets: Number of buckets the assignments refer to.
+        min_count: Non-NaN values a cell needs for its sum not to be NaN, as in
+            sum_value_columns. By default a cell of NaN rows sums to 0.
+
+    Returns:
+        One row per bucket and key with anything assigned to it, bucket by bucket: the key
+        columns, the summed value columns, and the bucket position in a "bucket" column.
+    """
+    n_keys = len(keys)
+    value_cols = value_columns(df)
+    values = {col: df[col].to_numpy(dtype="float64", na_value=np.nan) for col in value_cols}
+
+    # Per assignment: the cells it touches, and the rows, sums and NaN counts in each.
+    cells, assigned = [], []
+    sums = {col: [] for col in value_cols}
+    missing = {col: [] for col in value_cols}
+
+    for rows, buckets in assignments:
+        touched, compact = np.unique(
+            buckets.astype("int64") * n_keys + (key_ids if rows is None else key_ids[rows]),
+            return_inverse=True,
+        )
+        cells.append(touched)
+        assigned.append(np.bincount(compact, minlength=len(touched)))
+        for col in value_cols:
+            col_values = values[col] if rows is None else values[col][rows]
+            nan = np.isnan(col_values)
+            if nan.any():
+                col_values = np.where(nan, 0.0, col_values)
+                missing[col].append(np.bincount(compact, weights=nan, minlength=len(touched)))
+            else:
+                missing[col].append(np.zeros(len(touched)))
+            sums[col].append(np.bincount(compact, weights=col_values, minlength=len(touched)))
+
+    occupied, compact = np.unique(
+        np.concatenate(cells) if cells else np.empty(0, "int64"), return_inverse=True
+    )
+
+    def combined(parts: list[np.ndarray]) -> np.ndarray:
+        weights = np.concatenate(parts) if parts else np.empty(0)
+        return np.bincount(compact, weights=weights, minlength=len(occupied))
+
+    n_assigned = combined(assigned)
+    totals = keys.iloc[occupied % n_keys].reset_index(drop=True)
+    for col in value_cols:
+        col_sums = combined(sums[col])
+        if min_count:
+            col_sums[n_assigned - combined(missing[col]) < min_count] = np.nan
+        dtype = df[col].dtype if pd.api.types.is_float_dtype(df[col]) else "float64"
+        totals[col] = col_sums.astype(dtype)
+    totals["bucket"] = occupied // n_keys
+
+    return totals
+
+
+def get_group_totals(
+    df: pd.DataFrame,
+    groups: dict[str, dict],
+    group_cols: list,
+    column: str = "donor",
+    check_all_keys: bool = True,
+    coverage_cols: list[str] | None = None,
+    min_count: int = 0,
+) -> pd.DataFrame:
+    """Sum several groups of donors or recipients in one pass, members may overlap.
+
+    Equivalent to calling get_group_total once per group and concatenating, without filtering
+    and grouping the frame once per group: rows are numbered by their group_cols combination
+    once, each row is repeated for every group its code belongs to, and every total is then a
+    single bincount per value column.
+
+    Args:
+        df: Frame with "value" or value_* columns.
+        groups: Mapping of {group name: {member code: member name}}. A code may belong to
+            any number of groups.
+        group_cols: Columns to group by when summing.
+        column: Entity being aggregated over, "donor" or "recipient".
+        check_all_keys: Log a warning naming members missing from the data, per group, as
+            get_group_total does.
+        coverage_cols: Combinations to check coverage over. Defaults to year plus the
+            counterpart entity.
+        min_count: Non-NaN values a total needs not to be NaN, as in sum_value_columns.
+            Pass 1 for a wide frame, whose NaN cells stand for rows the long layout would
+            not have had.
+
+    Returns:
+        One row per group and group_cols combination, naming its group in the name column,
+        groups in the order given.
+    """
+    code_col = f"{column}_code"
+    name_col = f"{column}_name"
+    names = list(groups)
+
+    rows = df.loc[df[code_col].isin(set().union(*groups.values()))]
+
+    if check_all_keys:
+        coverage_cols = (
+            coverage_cols if coverage_cols is not None else _default_coverage_cols(df, column)
+        )
+        present = rows[[code_col, *coverage_cols]].drop_duplicates()
+        for name in names:
+            _warn_missing_group_members(
+                df, groups[name], code_col, coverage_cols, name, present=present
+            )
+
+    if rows.empty:
+        return sum_value_columns(rows, group_cols, min_count=min_count).assign(
+            **{name_col: None}
+        )
+
+    key_ids, keys = _factorize_rows(rows, group_cols)
+    totals = _sum_into_buckets(
+        rows,
+        key_ids,
+        keys,
+        [_expand_memberships(rows[code_col], [groups[name] for name in names])],
+        len(names),
+        min_count=min_count,
+    )
+    totals[name_col] = np.asarray(names, dtype=object)[totals.pop("bucket")]
+
+    return totals
+
+
 # CRS column names carrying the classifications both CRS-based views group by.
 CRS_REGION_COL = "recipient_region"
 CRS_INCOME_COL = "incomegroup_name"
-_CONTINENT_COL = "_continent"
+
+# Name the classification read is requested under on a shared CrsScan.
+CLASSIFICATIONS_REQUEST = "recipient classifications"
 
 _CRS_CLASSIFICATION_COLUMNS = [
     "year",
@@ -300,16 +643,56 @@ _CRS_CLASSIFICATION_COLUMNS = [
 ]
 
 
-def _modal_value(series: pd.Series):
-    """Return the most common non-null value, ties broken by sort order for determinism."""
-    present = series.dropna()
-    if present.empty:
-        return pd.NA
-    return present.mode().sort_values().iloc[0]
+def modal_values(df: pd.DataFrame, keys: list[str], columns: list[str]) -> pd.DataFrame:
+    """Reduce each column to its most common non-null value per key.
+
+    For resolving labels the source repeats on every transaction, where some transactions
+    leave them blank and a few disagree. Rather than a Python function per group, every
+    (key, value) pair is counted in one groupby per column, sorted by count and then value,
+    and the first pair per key kept. Ties therefore go to the lowest value in sort order, so
+    the result never depends on row order. Keys where values disagree are logged.
+
+    Args:
+        df: Frame holding the key and label columns.
+        keys: Columns identifying what each label belongs to, e.g. recipient_code and year.
+        columns: Label columns to resolve.
+
+    Returns:
+        One row per distinct key, with each column's most common value, or null where the
+        key has no value for it.
+    """
+    resolved = df[keys].drop_duplicates().sort_values(keys, ignore_index=True)
+
+    for col in columns:
+        counts = (
+            df.loc[df[col].notna(), [*keys, col]]
+            .groupby([*keys, col], dropna=False, observed=True, sort=False)
+            .size()
+            .rename("_count")
+            .reset_index()
+        )
+
+        per_key = counts.groupby(keys, dropna=False, sort=False).size()
+        disagreeing = per_key.index[per_key.to_numpy() > 1]
+        if len(disagreeing):
+            examples = disagreeing.get_level_values(0) if len(keys) > 1 else disagreeing
+            logger.warning(
+                "%s (%s) combinations report more than one %s; taking the most common. "
+                "%s: %s",
+                len(disagreeing), ", ".join(keys), col, keys[0],
+                sorted(examples.unique().tolist())[:10],
+            )
+
+        modal = counts.sort_values(
+            ["_count", col], ascending=[False, True], kind="stable"
+        ).drop_duplicates(keys)
+        resolved = resolved.merge(modal[[*keys, col]], on=keys, how="left")
+
+    return resolved
 
 
 def get_crs_recipient_classifications(
-    years: range | list | int, recipients: list | None = None
+    years: range | list | int, recipients: list | None = None, scan: CrsScan | None = None
 ) -> pd.DataFrame:
     """Build the recipient name, region and income-group table the CRS views group by.
 
@@ -319,18 +702,98 @@ def get_crs_recipient_classifications(
     recipient's region or income group. Building one table here and joining it to every frame
     keeps them consistent: grouping one frame on a column another lacks is what double counts.
 
+    Scanning the bulk file for it is slow and the views ask for different year ranges, so the
+    table is cached per CRS bulk download (see outputs.crs_bulk_fingerprint). Every
+    recipient-year is classified from its own transactions alone, so years already cached are
+    served from the cache and only the others are read, then added to it. A refreshed bulk
+    download has a new fingerprint, which starts a new cache and removes the old one. Views
+    built in one process (see shared_inputs) share the table read for any of them.
+
     Args:
         years: Years to cover.
         recipients: Recipient codes to restrict to, or None for all.
+        scan: A CRS scan the build reads other things from too, so the years the cache cannot
+            serve are read in the same pass. It must not have been read from yet.
 
     Returns:
         One row per (recipient_code, year) with recipient name, region and income group.
     """
-    from oda_data import CRSData
+    years = sorted({years} if isinstance(years, int) else set(years))
+    # One cache per recipient selection: the same codes in any order share it.
+    selection = (
+        "all"
+        if recipients is None
+        else hashlib.sha256(str(sorted(set(recipients))).encode()).hexdigest()[:16]
+    )
 
-    raw = CRSData(years=years, recipients=recipients).read(
-        using_bulk_download=True, columns=_CRS_CLASSIFICATION_COLUMNS
+    # Views built together ask for overlapping years, so every year read is kept, and only the
+    # years nothing has read yet are read. Years are classified independently, so the new
+    # years' rows simply join the kept ones.
+    with slot(("crs_recipient_classifications", selection)) as kept:
+        classified, covered = kept.value or (None, [])
+        missing = [year for year in years if year not in set(covered)]
+        if not missing:
+            logger.info("Recipient classifications served from the shared inputs")
+        else:
+            fresh = _cached_crs_recipient_classifications(missing, recipients, selection, scan)
+            classified = pd.concat(
+                [classified, fresh.loc[fresh["year"].isin(missing)]], ignore_index=True
+            )
+            kept.set((classified, sorted({*covered, *missing})))
+
+    classified = classified.loc[classified["year"].isin(years)].sort_values(
+        ["recipient_code", "year"], ignore_index=True
     )
+    logger.info("Recipient classification table: %s recipient-years", f"{len(classified):,}")
+
+    return classified
+
+
+def _cached_crs_recipient_classifications(
+    years: list[int], recipients: list | None, selection: str, scan: CrsScan | None
+) -> pd.DataFrame:
+    """The classification table for years, served from the derived-table cache where it can be."""
+    cache_name = f"crs_recipient_classifications-{selection}"
+
+    fingerprint = crs_bulk_fingerprint()
+    cached = read_derived_table(cache_name, fingerprint) if fingerprint else None
+    cached_table, cached_years = (cached[0], cached[1]["years"]) if cached else (None, [])
+
+    to_read = [year for year in years if year not in set(cached_years)]
+    if not to_read:
+        logger.info("Recipient classifications for %s-%s served from cache", years[0], years[-1])
+        return cached_table
+
+    fresh = _classify_crs_recipients(to_read, recipients, scan)
+    # Reading may have made oda_data download a new bulk file, in which case whatever was
+    # cached came from the old one and is not reused.
+    new_fingerprint = crs_bulk_fingerprint()
+    if new_fingerprint != fingerprint:
+        cached_table, cached_years = None, []
+        if years != to_read:
+            fresh = _classify_crs_recipients(years, recipients)
+
+    classified = pd.concat([cached_table, fresh], ignore_index=True)
+    if new_fingerprint:
+        write_derived_table(
+            classified, cache_name, new_fingerprint, {"years": sorted({*cached_years, *years})}
+        )
+    return classified
+
+
+def _classify_crs_recipients(
+    years: list[int], recipients: list | None, scan: CrsScan | None = None
+) -> pd.DataFrame:
+    """Scan the CRS bulk file and reduce it to one classification per recipient-year."""
+    if scan is None or not set(years) <= set(scan.years):
+        scan = CrsScan(years)
+    scan.request(
+        CLASSIFICATIONS_REQUEST,
+        _CRS_CLASSIFICATION_COLUMNS,
+        [] if recipients is None else [("recipient_code", "in", list(recipients))],
+    )
+    raw = scan.read(CLASSIFICATIONS_REQUEST)
+    raw = raw.loc[raw["year"].isin(years)] if "year" in raw.columns else raw
 
     # CRSData.read silently drops requested columns that do not exist, which would quietly
     # empty the classifications, so check rather than trust.
@@ -340,34 +803,95 @@ def get_crs_recipient_classifications(
 
     raw["recipient_name"] = normalize_unspecified_names(raw["recipient_name"])
 
-    attributes = ["recipient_name", CRS_REGION_COL, CRS_INCOME_COL]
-    grouped = raw.groupby(["recipient_code", "year"], dropna=False, observed=True)[attributes]
-
     # Reduce each column to its most common non-null value, rather than deduplicating whole
     # rows. A recipient-year often has some transactions with a blank region or income group,
     # and dropping duplicate rows can pick one of those and lose a value the data does have.
     # Where transactions genuinely disagree, the majority wins, so the result does not depend
     # on row order.
-    classified = grouped.agg(_modal_value).reset_index()
+    classified = modal_values(
+        raw, ["recipient_code", "year"], ["recipient_name", CRS_REGION_COL, CRS_INCOME_COL]
+    )
 
-    conflicts = grouped.nunique(dropna=True)
-    for col in attributes:
-        disagreeing = conflicts.index[conflicts[col] > 1]
-        if len(disagreeing):
-            logger.warning(
-                "%s (recipient_code, year) combinations report more than one %s; taking the "
-                "most common. Recipient codes: %s",
-                len(disagreeing), col,
-                sorted({int(code) for code, _ in disagreeing})[:10],
-            )
+    return classified
 
-    logger.info("Recipient classification table: %s recipient-years", f"{len(classified):,}")
 
-    return classified
+@dataclass(frozen=True)
+class RecipientClassificationIndex:
+    """The classification table laid out for lookup by position rather than by join.
+
+    Recipient codes and years are small dense integers, so each classification column is held
+    as a code x year grid of positions into that column's categories, with -1 where the CRS has
+    nothing. Each recipient's fallback, its classification in its latest year, is precomputed
+    beside the grid. Built once by index_recipient_classifications and reused for every frame
+    the classifications are attached to.
+    """
+
+    first_code: int
+    first_year: int
+    # Per column: positions into categories, by code and year, and by code alone.
+    by_year: dict[str, np.ndarray]
+    latest: dict[str, np.ndarray]
+    categories: dict[str, pd.Index]
+
+
+# Columns attached from the classification table, and the sentinel for rows the CRS never
+# classifies (None: left missing).
+_CLASSIFICATION_SENTINELS = {
+    "recipient_name": None,
+    CRS_REGION_COL: CRS_UNCLASSIFIED_REGION,
+    CRS_INCOME_COL: CRS_UNCLASSIFIED_INCOME,
+}
+
+
+def index_recipient_classifications(classified: pd.DataFrame) -> RecipientClassificationIndex:
+    """Lay the classification table out for add_recipient_classifications.
+
+    Args:
+        classified: Table from get_crs_recipient_classifications.
+
+    Returns:
+        The table as code x year grids of category positions, with a per-recipient fallback.
+    """
+    classified = classified.dropna(subset=["recipient_code", "year"])
+    codes = classified["recipient_code"].to_numpy(dtype="int64")
+    years = classified["year"].to_numpy(dtype="int64")
+
+    first_code = int(codes.min()) if len(codes) else 0
+    first_year = int(years.min()) if len(years) else 0
+    shape = (
+        int(codes.max()) - first_code + 1 if len(codes) else 0,
+        int(years.max()) - first_year + 1 if len(years) else 0,
+    )
+
+    # The row for each recipient's latest year, as the merge-based fallback picked it.
+    latest_rows = (
+        classified.reset_index(drop=True)
+        .sort_values("year", kind="stable")
+        .drop_duplicates("recipient_code", keep="last")
+        .index.to_numpy()
+    )
+
+    by_year, latest, categories = {}, {}, {}
+    for col, sentinel in _CLASSIFICATION_SENTINELS.items():
+        positions, values = pd.factorize(classified[col])
+        values = pd.Index(np.asarray(values, dtype="object"), name=col)
+        if sentinel is not None and sentinel not in values:
+            values = values.append(pd.Index([sentinel], name=col))
+
+        grid = np.full(shape, -1, dtype="int32")
+        grid[codes - first_code, years - first_year] = positions
+        fallback = np.full(shape[0], -1, dtype="int32")
+        fallback[codes[latest_rows] - first_code] = positions[latest_rows]
+
+        by_year[col], latest[col], categories[col] = grid, fallback, values
+
+    return RecipientClassificationIndex(first_code, first_year, by_year, latest, categories)
 
 
 def add_recipient_classifications(
-    df: pd.DataFrame, classified: pd.DataFrame, label: str
+    df: pd.DataFrame,
+    classified: pd.DataFrame | RecipientClassificationIndex,
+    label: str,
 ) -> pd.DataFrame:
     """Attach recipient name, region and income group, keyed on (recipient_code, year).
 
@@ -375,127 +899,197 @@ def add_recipient_classifications(
     from other years, and anything still unmatched gets an explicit sentinel — never NaN in a
     grouping key, and never silently dropped.
 
+    The columns are gathered from a RecipientClassificationIndex by position and set on the
+    frame as categoricals, so no row is added, dropped or copied. Pass the index rather than the
+    table when classifying several frames, so it is only built once.
+
     Args:
-        df: Frame with recipient_code, year and a "value" column.
-        classified: Table from get_crs_recipient_classifications.
+        df: Frame with recipient_code, year and a "value" column. Modified in place.
+        classified: Table from get_crs_recipient_classifications, or its index.
         label: Name of the frame, used in log messages.
 
     Returns:
         The frame with recipient_name, region and income group attached.
     """
-    before_rows, before_value = len(df), df["value"].sum()
-    merged = df.drop(columns=["recipient_name"], errors="ignore").merge(
-        classified, on=["recipient_code", "year"], how="left", validate="m:1"
+    index = (
+        classified
+        if isinstance(classified, RecipientClassificationIndex)
+        else index_recipient_classifications(classified)
     )
+    n_codes, n_years = next(iter(index.by_year.values())).shape
 
-    if len(merged) != before_rows:
-        raise ValueError(
-            f"{label}: classification join changed the row count "
-            f"({before_rows:,} -> {len(merged):,})"
-        )
+    code_at = df["recipient_code"].to_numpy(dtype="float64", na_value=np.nan) - index.first_code
+    year_at = df["year"].to_numpy(dtype="float64", na_value=np.nan) - index.first_year
+    known_code = (code_at >= 0) & (code_at < n_codes)
+    known_year = known_code & (year_at >= 0) & (year_at < n_years)
+    code_at = np.where(known_code, code_at, 0).astype("intp")
+    year_at = np.where(known_year, year_at, 0).astype("intp")
 
-    # Fall back to the recipient's classification from any year before giving up.
-    per_recipient = (
-        classified.sort_values("year")
-        .drop_duplicates("recipient_code", keep="last")
-        .set_index("recipient_code")
-    )
-    for col in ("recipient_name", CRS_REGION_COL, CRS_INCOME_COL):
-        gaps = merged[col].isna()
+    for col, sentinel in _CLASSIFICATION_SENTINELS.items():
+        positions = np.where(known_year, index.by_year[col][code_at, year_at], -1)
+
+        # Fall back to the recipient's classification from any year before giving up.
+        gaps = positions < 0
         if gaps.any():
-            merged.loc[gaps, col] = merged.loc[gaps, "recipient_code"].map(
-                per_recipient[col]
-            )
+            positions = np.where(gaps & known_code, index.latest[col][code_at], positions)
             logger.info(
                 "%s: %s rows had no %s for their year; filled from the recipient's other "
                 "years where possible",
                 label, f"{int(gaps.sum()):,}", col,
             )
 
-    for col, sentinel in (
-        (CRS_REGION_COL, CRS_UNCLASSIFIED_REGION),
-        (CRS_INCOME_COL, CRS_UNCLASSIFIED_INCOME),
-    ):
-        still_missing = merged[col].isna()
-        if still_missing.any():
+        still_missing = positions < 0
+        if sentinel is not None and still_missing.any():
             logger.warning(
                 "%s: %s rows worth %s have no %s in the CRS at all; labelled %r. "
                 "Recipient codes: %s",
                 label, f"{int(still_missing.sum()):,}",
-                f"{merged.loc[still_missing, 'value'].sum():,.1f}", col, sentinel,
-                sorted(merged.loc[still_missing, "recipient_code"].dropna().unique())[:10],
+                f"{df.loc[still_missing, 'value'].sum():,.1f}", col, sentinel,
+                sorted(df.loc[still_missing, "recipient_code"].dropna().unique())[:10],
             )
-            merged[col] = merged[col].fillna(sentinel)
+            positions[still_missing] = index.categories[col].get_loc(sentinel)
 
-    if abs(merged["value"].sum() - before_value) > max(1e-6, abs(before_value) * 1e-9):
-        raise ValueError(
-            f"{label}: classification join changed the total "
-            f"({before_value:,.2f} -> {merged['value'].sum():,.2f})"
-        )
+        df[col] = pd.Categorical.from_codes(positions, categories=index.categories[col])
 
-    return merged
+    return df
 
 
-def build_crs_recipient_group_totals(
-    df: pd.DataFrame, group_cols: list[str]
-) -> list[pd.DataFrame]:
-    """Build every recipient aggregate: overall total, income groups, regions, continents, lists.
+def _attribute_assignment(
+    codes: np.ndarray,
+    values: pd.Index,
+    keep: np.ndarray | None = None,
+    label_map: dict | None = None,
+) -> tuple[np.ndarray | None, np.ndarray, list]:
+    """Bucket rows by the value of a classification column, for _sum_into_buckets.
+
+    Works on the column's distinct values rather than its rows, so relabelling values or
+    rolling several of them into one bucket costs nothing per row.
 
     Args:
-        df: Frame carrying the CRS classification columns and a "value" column.
-        group_cols: Columns identifying everything except the recipient, e.g.
-            year, donor_code, donor_name, indicator_name, currency, price.
+        codes: Position of every row's value in values, from pd.factorize.
+        values: The distinct values. Equal values share a bucket, and a null is a bucket of its
+            own, as it is in get_attribute_total.
+        keep: Which of the values to bucket, or None for all of them.
+        label_map: Optional display labels keyed by value, with the same fallback and warning
+            as get_attribute_total.
 
     Returns:
-        One frame per aggregate, each naming its group in recipient_name.
+        The rows bucketed (None for all), each one's bucket, and the label of each bucket.
     """
-    overall = (
-        df.groupby(group_cols, dropna=False, observed=True)["value"]
-        .sum()
-        .reset_index()
-        .assign(recipient_name="ODA eligible countries")
-    )
+    bucket_of, labels = pd.factorize(values, use_na_sentinel=False)
+    if keep is not None:
+        bucket_of = np.where(keep, bucket_of, -1)
 
-    income = get_attribute_total(
-        df, CRS_INCOME_COL, group_cols, label_map=CRS_INCOME_LABELS
-    )
+    buckets = bucket_of[codes]
+    rows = None
+    if keep is not None:
+        rows = np.flatnonzero(buckets >= 0)
+        buckets = buckets[rows]
 
-    # The CRS uses continent names as region values too, for aid recorded against a whole
-    # continent. Those rows belong to the continent rollup below, so they are excluded here:
-    # emitting them as regions as well would produce two rows per continent, which the pivot
-    # would silently merge.
-    regions = get_attribute_total(
-        df.loc[~df[CRS_REGION_COL].isin(CRS_REGION_ROLLUPS)], CRS_REGION_COL, group_cols
-    )
+    return rows, buckets, _attribute_labels(pd.Index(labels, name=values.name), label_map)
+
+
+def _factorize_attribute(attribute: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """Factorize a classification column into row codes and its distinct values, as objects."""
+    codes, uniques = pd.factorize(attribute, use_na_sentinel=False)
+    return codes, pd.Index(np.asarray(uniques, dtype="object"), name=attribute.name)
+
+
+def _attribute_labels(values: pd.Index, label_map: dict | None) -> list:
+    """Display labels for classification values, keeping and logging any with no label."""
+    if not label_map:
+        return list(values)
 
-    # Continents are rollups of the CRS regions, so they are summed from the same column.
+    unmapped = sorted(set(values.dropna()) - set(label_map))
+    if unmapped:
+        logger.warning(
+            "%s: no display label configured for %s, keeping the raw value(s): %s",
+            values.name, len(unmapped), unmapped,
+        )
+    return [label_map.get(value, value) for value in values]
+
+
+def build_crs_recipient_group_totals(
+    df: pd.DataFrame, group_cols: list[str], min_count: int = 0
+) -> pd.DataFrame:
+    """Build every recipient aggregate: overall total, income groups, regions, continents, lists.
+
+    All of them in one reduction: group_cols are factorized once, each row is assigned to the
+    income group, region, continent and country lists it belongs to, and _sum_into_buckets sums
+    every aggregate together. The result is what summing each aggregate separately with
+    get_attribute_total and get_group_total and concatenating would give.
+
+    Args:
+        df: Frame carrying the CRS classification columns and "value" or value_* columns.
+        group_cols: Columns identifying everything except the recipient, e.g.
+            year, donor_code, donor_name, indicator_name.
+        min_count: Non-NaN values a total needs not to be NaN, as in sum_value_columns.
+            Pass 1 for a wide frame, whose NaN cells stand for rows the long layout would
+            not have had.
+
+    Returns:
+        Every aggregate in one frame, each naming its group in recipient_name.
+    """
+    region_codes, regions = _factorize_attribute(df[CRS_REGION_COL])
     region_to_continent = {
         region: continent
         for continent, regions_in in CRS_REGION_ROLLUPS.items()
         for region in regions_in
     }
-    continents = get_attribute_total(
-        df.assign(**{_CONTINENT_COL: lambda d: d[CRS_REGION_COL].map(region_to_continent)}),
-        _CONTINENT_COL,
-        group_cols,
-    ).dropna(subset=["recipient_name"])
-
-    lists = [
-        get_group_total(
-            df, members, column="recipient", group_cols=group_cols, group_name=name
-        )
-        for name, members in (
-            ("Sahel countries", SAHEL_RECIPIENTS),
-            ("France priority countries", FRANCE_PRIORITY_RECIPIENTS),
+    continents = regions.map(region_to_continent)
+    lists = {
+        "Sahel countries": SAHEL_RECIPIENTS,
+        "France priority countries": FRANCE_PRIORITY_RECIPIENTS,
+    }
+
+    # Coverage of the two country lists is reported exactly as get_group_total reports it.
+    coverage_cols = _default_coverage_cols(df, "recipient")
+    present = df.loc[
+        df["recipient_code"].isin(set().union(*lists.values())), ["recipient_code", *coverage_cols]
+    ].drop_duplicates()
+    for name, members in lists.items():
+        _warn_missing_group_members(
+            df, members, "recipient_code", coverage_cols, name, present=present
         )
+
+    list_rows, list_buckets = _expand_memberships(df["recipient_code"], list(lists.values()))
+
+    parts = [
+        (None, np.zeros(len(df), dtype="int64"), ["ODA eligible countries"]),
+        _attribute_assignment(
+            *_factorize_attribute(df[CRS_INCOME_COL]), label_map=CRS_INCOME_LABELS
+        ),
+        # The CRS uses continent names as region values too, for aid recorded against a whole
+        # continent. Those rows belong to the continent rollup below, so they are excluded
+        # here: emitting them as regions as well would produce two rows per continent, which
+        # the collapse to published keys would silently merge.
+        _attribute_assignment(
+            region_codes, regions, keep=~regions.isin(list(CRS_REGION_ROLLUPS))
+        ),
+        # Continents are rollups of the CRS regions, so they are summed from the same column.
+        _attribute_assignment(region_codes, continents, keep=continents.notna()),
+        (list_rows, list_buckets, list(lists)),
     ]
 
-    return [overall, income, regions, continents, *lists]
+    key_ids, keys = _factorize_rows(df, group_cols)
+    assignments, names = [], []
+    for rows, buckets, labels in parts:
+        assignments.append((rows, buckets + len(names)))
+        names.extend(labels)
+
+    totals = _sum_into_buckets(df, key_ids, keys, assignments, len(names), min_count=min_count)
+    totals["recipient_name"] = np.asarray(names, dtype="object")[totals.pop("bucket")]
+
+    return totals
 
 
 def build_crs_donor_group_totals(
-    df: pd.DataFrame, group_cols: list[str], include_eu27_eui: bool = True
-) -> list[pd.DataFrame]:
+    df: pd.DataFrame,
+    group_cols: list[str],
+    include_eu27_eui: bool = True,
+    check_all_keys: bool = True,
+    min_count: int = 0,
+) -> pd.DataFrame:
     """Build every donor aggregate by summing the providers that report to the CRS.
 
     "All bilateral donors" includes EU Institutions in full. The CRS offers no equivalent of
@@ -509,27 +1103,32 @@ def build_crs_donor_group_totals(
     themselves, excluding members' contributions routed through EU institution channels.
 
     Args:
-        df: Frame with donor_code and a "value" column.
+        df: Frame with donor_code and "value" or value_* columns.
         group_cols: Columns identifying everything except the donor.
         include_eu27_eui: Whether to add the EU27 + institutions bloc as a plain sum.
+        check_all_keys: Warn about members missing from the data, as get_group_totals does.
+            Callers summing a subset of donors at a time turn it off, since every member
+            outside the subset would be reported.
+        min_count: Non-NaN values a total needs not to be NaN, as in sum_value_columns.
+            Pass 1 for a wide frame, whose NaN cells stand for rows the long layout would
+            not have had.
 
     Returns:
-        One frame per aggregate, each naming its group in donor_name.
+        Every aggregate in one frame, each naming its group in donor_name.
     """
-    groups = [
-        ("All bilateral donors", CRS_PROVIDERS),
-        ("DAC countries", DAC_COUNTRIES),
-        ("Non-DAC countries", NON_DAC_COUNTRIES),
-        ("G7 countries", G7_COUNTRIES),
-        ("EU27 countries", EU_COUNTRIES),
-    ]
+    groups = {
+        "All bilateral donors": CRS_PROVIDERS,
+        "DAC countries": DAC_COUNTRIES,
+        "Non-DAC countries": NON_DAC_COUNTRIES,
+        "G7 countries": G7_COUNTRIES,
+        "EU27 countries": EU_COUNTRIES,
+    }
     if include_eu27_eui:
-        groups.append(("EU27 & EU Institutions", EU_COUNTRIES | EU_INSTITUTIONS))
+        groups["EU27 & EU Institutions"] = EU_COUNTRIES | EU_INSTITUTIONS
 
-    return [
-        get_group_total(df, members, group_cols=group_cols, group_name=name)
-        for name, members in groups
-    ]
+    return get_group_totals(
+        df, groups, group_cols=group_cols, check_all_keys=check_all_keys, min_count=min_count
+    )
 
 
 def add_share_of_group_total(
@@ -549,15 +1148,7 @@ def add_share_of_group_total(
     Returns:
         The frame with pct_col added.
     """
-    total = (
-        df.groupby(group_cols, dropna=False, observed=True)["value_usd_current"]
-        .sum()
-        .reset_index()
-        .rename(columns={"value_usd_current": "total_oda"})
-    )
-    merged = df.merge(total, on=group_cols, how="left", validate="m:1")
-    merged[pct_col] = (merged["value_usd_current"] / merged["total_oda"]).round(6)
-    return merged.drop(columns=["total_oda"])
+    return add_shares(df, [(None, None, group_cols, pct_col)])
 
 
 def get_attribute_total(
@@ -566,6 +1157,7 @@ def get_attribute_total(
     group_cols: list,
     column: str = "recipient",
     label_map: dict | None = None,
+    min_count: int = 0,
 ) -> pd.DataFrame:
     """Sum rows by a classification the data itself carries, e.g. CRS region or income group.
 
@@ -574,36 +1166,31 @@ def get_attribute_total(
     membership never has to be maintained anywhere.
 
     Args:
-        df: Long-form frame with a "value" column and the attribute column.
+        df: Frame with "value" or value_* columns and the attribute column.
         attribute_col: Column holding the classification, e.g. "incomegroup_name".
         group_cols: Columns to group by alongside the attribute.
         column: Entity the groups stand in for, "donor" or "recipient".
         label_map: Optional display labels keyed by attribute value. Values missing from
             the map keep their original label and are logged.
+        min_count: Non-NaN values a total needs not to be NaN, as in sum_value_columns.
+            Pass 1 for a wide frame, whose NaN cells stand for rows the long layout would
+            not have had.
 
     Returns:
         One row per attribute value per group_cols combination, named as the entity.
     """
     name_col = f"{column}_name"
 
-    totals = (
-        df.groupby(group_cols + [attribute_col], dropna=False, observed=True)["value"]
-        .sum()
-        .reset_index()
-    )
+    totals = sum_value_columns(df, group_cols + [attribute_col], min_count=min_count)
 
     # The attribute may arrive dictionary-encoded, in which case mapping it to new labels and
     # filling gaps would fail on values outside its categories. Work in plain objects.
     attribute = totals[attribute_col].astype("object")
 
     if label_map:
-        unmapped = sorted(set(attribute.dropna().unique()) - set(label_map))
-        if unmapped:
-            logger.warning(
-                "%s: no display label configured for %s, keeping the raw value(s): %s",
-                attribute_col, len(unmapped), unmapped,
-            )
-        totals[name_col] = attribute.map(label_map).fillna(attribute)
+        values = pd.Index(attribute.unique(), name=attribute_col)
+        labels = dict(zip(values, _attribute_labels(values, label_map)))
+        totals[name_col] = attribute.map(labels).fillna(attribute)
     else:
         totals[name_col] = attribute
 
@@ -634,57 +1221,192 @@ def add_share_of_reference_total(
     Returns:
         The frame with pct_col added.
     """
-    total = (
-        df.loc[lambda d: d[filter_col] == filter_val]
-        .groupby(merge_cols, dropna=False, observed=True)["value_usd_current"]
-        .sum()
-        .reset_index()
-        .rename(columns={"value_usd_current": "total_oda"})
-    )
-    merged = df.merge(total, on=merge_cols, how="left", validate="m:1")
-    merged[pct_col] = (merged["value_usd_current"] / merged["total_oda"]).round(6)
-    return merged.drop(columns=["total_oda"])
+    return add_shares(df, [(filter_col, filter_val, merge_cols, pct_col)])
 
 
-def add_currencies_and_prices(
-    df: pd.DataFrame, base_year: int = BASE_TIME["base"]
+# Every currency and price pair the views publish, in the order add_currencies_and_prices has
+# always stacked them: each currency at current prices, then each at constant prices.
+CURRENCY_PRICE_PAIRS: list[tuple[str, str]] = [
+    *((currency, "current") for currency in CURRENCIES),
+    *((currency, "constant") for currency in CURRENCIES),
+]
+
+# Conversion depends on nothing but the donor and the year, so that is all pydeflate is asked.
+_CONVERSION_KEYS = ["donor_code", "year"]
+
+# pydeflate rounds what it returns to six decimals, so a factor read off a value of 1 would keep
+# six significant digits and no more. Converting a large round number instead keeps the factor
+# good to float64 precision; it is divided back out straight away.
+_FACTOR_PROBE: float = 1e9
+
+
+def _value_column(currency: str, price: str) -> str:
+    """Name of the wide column holding one currency and price pair, e.g. value_usd_current."""
+    return f"value_{currency.lower()}_{price}"
+
+
+def get_conversion_factors(
+    keys: pd.DataFrame, base_year: int = BASE_TIME["base"]
 ) -> pd.DataFrame:
-    """
-    Adds copies of the data in different currencies and prices
-    """
-    # do the currency conversions first
-    current_dfs = []
+    """Ask pydeflate for one multiplier per donor, year and currency/price pair.
 
-    df = df.assign(currency="USD", price="current")
+    Every conversion pydeflate does here is a single multiplication or division per donor and
+    year, so running it over a few thousand distinct keys and applying the result is the same
+    arithmetic as running it over tens of millions of rows, at a fraction of the merges.
 
-    for currency in CURRENCIES:
-        logger.info(f"Converting to {currency}")
-        if currency == "USD":
-            current_dfs.append(df.assign(currency=currency, price="current"))
-        else:
+    Args:
+        keys: Distinct donor_code and year combinations.
+        base_year: Price base year for the constant-price pairs.
+
+    Returns:
+        keys, with one factor column per pair named as its wide value column. A factor is NaN
+        where pydeflate has no rate for that donor and year, exactly as a converted row would be.
+    """
+    # Views built in one process convert mostly the same donors and years, so the factors
+    # found so far are kept and pydeflate is asked only about keys none of them had.
+    with slot(("conversion_factors", base_year)) as kept:
+        if kept.value is None:
+            factors = _conversion_factors(keys, base_year)
+            kept.set(factors[[*_CONVERSION_KEYS, *_factor_columns()]])
+            return factors
+
+        known = kept.value
+        new = keys[_CONVERSION_KEYS].merge(
+            known[_CONVERSION_KEYS], how="left", indicator=True
+        ).query("_merge == 'left_only'")[_CONVERSION_KEYS]
+        if len(new):
+            known = pd.concat([known, _conversion_factors(new, base_year)], ignore_index=True)
+            kept.set(known)
+
+    return keys.merge(known, on=_CONVERSION_KEYS, how="left")
+
+
+def _factor_columns() -> list[str]:
+    return [_value_column(currency, price) for currency, price in CURRENCY_PRICE_PAIRS]
+
+
+def _conversion_factors(keys: pd.DataFrame, base_year: int) -> pd.DataFrame:
+    """get_conversion_factors without the shared factors: pydeflate asked about every key."""
+    # pydeflate merges outer and hands rows back in its own order, with the key columns upcast
+    # by the merge, so rows are realigned on a position column rather than on the keys.
+    probe = keys[_CONVERSION_KEYS].assign(value=_FACTOR_PROBE, position=np.arange(len(keys)))
+    factors = keys.copy()
+
+    for currency, price in CURRENCY_PRICE_PAIRS:
+        column = _value_column(currency, price)
+        if (currency, price) == ("USD", "current"):
+            factors[column] = 1.0
+            continue
+
+        if price == "current":
             converted = oecd_dac_exchange(
-                data=df.copy(),
+                data=probe.copy(),
                 source_currency="USA",
                 target_currency=currency,
                 id_column="donor_code",
                 use_source_codes=True,
             )
-            current_dfs.append(converted.assign(currency=currency, price="current"))
-
-    constant_dfs = []
-    for currency in CURRENCIES:
-        converted = oecd_dac_deflate(
-            data=df.copy(),
-            base_year=base_year,
-            source_currency="USA",
-            target_currency=currency,
-            id_column="donor_code",
-            use_source_codes=True,
+        else:
+            converted = oecd_dac_deflate(
+                data=probe.copy(),
+                base_year=base_year,
+                source_currency="USA",
+                target_currency=currency,
+                id_column="donor_code",
+                use_source_codes=True,
+            )
+
+        factor = np.full(len(keys), np.nan)
+        factor[converted["position"].to_numpy(dtype="int64")] = (
+            converted["value"].to_numpy(dtype="float64", na_value=np.nan) / _FACTOR_PROBE
         )
-        constant_dfs.append(converted.assign(currency=currency, price="constant"))
+        factors[column] = factor
+
+    return factors
+
+
+def _apply_factor(value: np.ndarray, factor: np.ndarray, currency: str, price: str) -> np.ndarray:
+    """Convert USD current values with per-row factors, rounding as pydeflate does."""
+    if (currency, price) == ("USD", "current"):
+        return value
+    return np.round(value * factor, 6)
 
-    # Don't include df in concat since USD/current is already in current_dfs[0]
-    return pd.concat(current_dfs + constant_dfs, ignore_index=True)
+
+def add_currencies_and_prices(
+    df: pd.DataFrame, base_year: int = BASE_TIME["base"]
+) -> pd.DataFrame:
+    """Add copies of the data in every currency and price pair, stacked long.
+
+    pydeflate is asked once per distinct (donor_code, year) for a factor table, which is then
+    applied to every row with a single gather and multiply, rather than handing it the whole
+    frame once per pair.
+
+    Args:
+        df: Long-form frame in USD current prices, with donor_code, year and a "value" column.
+        base_year: Price base year for the constant-price pairs.
+
+    Returns:
+        The rows once per pair in CURRENCY_PRICE_PAIRS, with currency and price columns added
+        and "value" converted.
+    """
+    codes, keys = _factorize_rows(df, _CONVERSION_KEYS)
+    logger.info(
+        "Converting %s rows to %s currency/price pairs from %s donor-years",
+        f"{len(df):,}", len(CURRENCY_PRICE_PAIRS), f"{len(keys):,}",
+    )
+    factors = get_conversion_factors(keys, base_year)
+    value = df["value"].to_numpy(dtype="float64", na_value=np.nan)
+
+    return pd.concat(
+        [
+            df.assign(
+                value=_apply_factor(
+                    value,
+                    factors[_value_column(currency, price)].to_numpy()[codes],
+                    currency,
+                    price,
+                ),
+                currency=currency,
+                price=price,
+            )
+            for currency, price in CURRENCY_PRICE_PAIRS
+        ],
+        ignore_index=True,
+    )
+
+
+def add_currency_price_columns(
+    df: pd.DataFrame, base_year: int = BASE_TIME["base"]
+) -> pd.DataFrame:
+    """Replace "value" with one column per currency and price pair, keeping one row per key.
+
+    The wide counterpart of add_currencies_and_prices: the same factors, applied side by side
+    instead of stacked, so the frame grows by seven columns rather than by seven copies of
+    itself and never needs widening afterwards.
+
+    Args:
+        df: Long-form frame in USD current prices, with donor_code, year and a "value" column.
+        base_year: Price base year for the constant-price pairs.
+
+    Returns:
+        The frame with value_<currency>_<price> columns in place of "value". A cell is NaN where
+        pydeflate has no rate for the row's donor and year.
+    """
+    codes, keys = _factorize_rows(df, _CONVERSION_KEYS)
+    logger.info(
+        "Converting %s rows to %s currency/price columns from %s donor-years",
+        f"{len(df):,}", len(CURRENCY_PRICE_PAIRS), f"{len(keys):,}",
+    )
+    factors = get_conversion_factors(keys, base_year)
+    value = df["value"].to_numpy(dtype="float64", na_value=np.nan)
+
+    # Setting columns on the frame drop returns adds blocks without copying the others.
+    wide = df.drop(columns="value")
+    for currency, price in CURRENCY_PRICE_PAIRS:
+        column = _value_column(currency, price)
+        wide[column] = _apply_factor(value, factors[column].to_numpy()[codes], currency, price)
+
+    return wide
 
 
 def widen_currency_price(
@@ -730,9 +1452,7 @@ def widen_currency_price(
     )
 
     # Flatten MultiIndex columns -> "value_usd_current"
-    wide.columns = [
-        f"value_{cur.lower()}_{price}" for cur, price in wide.columns.to_list()
-    ]
+    wide.columns = [_value_column(cur, price) for cur, price in wide.columns.to_list()]
     wide = wide.reset_index()
 
     # Reorder columns: index cols first, then sorted value cols
@@ -740,6 +1460,167 @@ def widen_currency_price(
     return wide[list(index_cols) + value_cols]
 
 
+def widen_currency_price_scatter(
+    df: pd.DataFrame,
+    index_cols: tuple[str, ...] = ("year", "donor_code", "indicator"),
+) -> pd.DataFrame:
+    """widen_currency_price without the duplicate check, the groupby or the pivot.
+
+    Every index key and every currency/price pair is factorized once, and each row's value is
+    scattered straight into its cell of a float32 key x pair matrix. If any cell is landed in
+    by several rows, the cells are summed with np.add.at instead, reproducing the groupby
+    widen_currency_price falls back to (which also turns NaN cells into 0). The output, rows
+    ordered by index_cols, is identical to widen_currency_price's, without building a
+    MultiIndex over every row or modifying df.
+
+    Args:
+        df: Long-form DataFrame with columns: year, donor_code, indicator, currency, price, value.
+        index_cols: Columns to keep as the row index in the wide table.
+
+    Returns:
+        Wide DataFrame where columns are like 'value_usd_current', 'value_usd_constant', etc.
+    """
+    values = df["value"].round(4).to_numpy(dtype="float32", na_value=np.nan)
+
+    key_ids, keys = _factorize_rows(df, list(index_cols))
+    pair_ids, pairs = _factorize_rows(df, ["currency", "price"])
+    n_pairs = len(pairs)
+    cells = key_ids * n_pairs + pair_ids
+
+    matrix = np.full(len(keys) * n_pairs, np.nan, dtype="float32")
+    matrix[cells] = values
+
+    counts = np.bincount(cells, minlength=len(matrix))
+    if (counts > 1).any():
+        n_duplicates = len(cells) - int((counts > 0).sum())
+        logger.warning(f"Found {n_duplicates:,} duplicate rows before pivoting")
+        # Where there are duplicates, widen_currency_price sums the whole frame, in float32
+        # and with NaN counting as 0, so every filled cell is replaced by its sum.
+        sums = np.zeros(len(matrix), dtype="float32")
+        np.add.at(sums, cells, np.nan_to_num(values, nan=0.0))
+        filled = counts > 0
+        matrix[filled] = sums[filled]
+
+    matrix = matrix.reshape(len(keys), n_pairs)
+    order = keys.sort_values(list(index_cols), kind="stable").index.to_numpy()
+
+    columns = {
+        _value_column(currency, price): matrix[order, i]
+        for i, (currency, price) in enumerate(pairs.itertuples(index=False))
+    }
+    wide = keys.iloc[order].reset_index(drop=True)
+    return pd.concat(
+        [wide, pd.DataFrame({col: columns[col] for col in sorted(columns)})], axis=1
+    )
+
+
+def collapse_wide_values(
+    df: pd.DataFrame,
+    index_cols: tuple[str, ...] = ("year", "donor_code", "indicator"),
+) -> pd.DataFrame:
+    """Finish a frame built by add_currency_price_columns the way widen_currency_price would.
+
+    Values are rounded and narrowed to float32 first, rows sharing index_cols are summed, and
+    only the index and value columns are kept, so both paths publish the same frame.
+
+    Args:
+        df: Wide frame with value_* columns.
+        index_cols: Columns identifying a row in the published table.
+
+    Returns:
+        Wide DataFrame of index_cols followed by the value columns in sorted order.
+    """
+    value_cols = sorted(value_columns(df))
+    df = pd.concat(
+        [df[list(index_cols)], df[value_cols].round(4).astype("float32")], axis=1
+    )
+
+    logger.info("Checking for duplicate rows...")
+    duplicates = df.duplicated(subset=list(index_cols))
+
+    if duplicates.any():
+        logger.warning(f"Found {duplicates.sum():,} duplicate rows")
+        logger.info("Aggregating duplicates by summing values...")
+        # NaN cells are rows the long layout would not have had, so they must not sum to 0.
+        df = sum_value_columns(df, list(index_cols), min_count=1)
+        logger.info(f"After aggregation: {len(df):,} rows")
+    else:
+        logger.info("No duplicates detected")
+
+    return df.reset_index(drop=True)
+
+
+# A share column to add: the rows whose value_usd_current make up the denominator (filter_col
+# equal to filter_val, or every row where filter_col is None), the columns the denominator is
+# grouped by and matched back on, and the name of the column.
+ShareSpec = tuple[str | None, object, list[str], str]
+
+
+def add_shares(
+    df: pd.DataFrame, specs: list[ShareSpec], reference: pd.DataFrame | None = None
+) -> pd.DataFrame:
+    """Add each row's value_usd_current as a share of one or more totals, in one pass.
+
+    Each denominator is summed over its merge_cols keys, numbered once with _factorize_rows,
+    and handed back to every row by key position rather than by merging a totals frame onto
+    the full wide frame. Every share column is added to one shallow copy of df, so the frame's
+    own columns are never copied. Results are the same as merging each total back in turn:
+    rows whose key has no reference rows get NaN, and a null in a key is a key like any other,
+    matched to the reference rows with a null in the same place, on both paths.
+
+    Args:
+        df: Wide-form frame containing value_usd_current.
+        specs: (filter_col, filter_val, merge_cols, pct_col) for each share column.
+        reference: Frame to take the reference rows from, when they are not in df: a view
+            built a donor shard at a time keeps its aggregate donors in a frame of their own.
+            Its totals are matched to df's distinct keys only, so df is still not merged.
+
+    Returns:
+        The frame with every pct_col added.
+    """
+    values = df["value_usd_current"]
+    with_shares = df.copy(deep=False)
+
+    for filter_col, filter_val, merge_cols, pct_col in specs:
+        key_ids, keys = _factorize_rows(df, list(merge_cols))
+
+        if reference is None:
+            rows = (
+                slice(None) if filter_col is None else (df[filter_col] == filter_val).to_numpy()
+            )
+            # Summed by pandas, as the merge-based version summed them, so float32 values
+            # total to exactly the same denominators.
+            totals = values.iloc[rows].groupby(key_ids[rows]).sum().reindex(range(len(keys)))
+        else:
+            rows = (
+                reference
+                if filter_col is None
+                else reference.loc[reference[filter_col] == filter_val]
+            )
+            summed = (
+                rows.groupby(list(merge_cols), dropna=False, observed=True)["value_usd_current"]
+                .sum()
+                .reset_index()
+            )
+            # Labels as objects on both sides: the two frames' categories differ.
+            totals = _as_object_labels(keys).merge(
+                _as_object_labels(summed), on=list(merge_cols), how="left"
+            )["value_usd_current"]
+
+        denominators = totals.to_numpy()[key_ids]
+
+        with_shares[pct_col] = (values / pd.Series(denominators, index=df.index)).round(6)
+
+    return with_shares
+
+
+def _as_object_labels(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast categorical columns to object, so frames with different categories merge."""
+    return df.astype(
+        {col: "object" for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)}
+    )
+
+
 def add_share_of_total_oda(df: pd.DataFrame) -> pd.DataFrame:
     """Add column for share of total ODA"""
 
@@ -0,0 +1,251 @@
+"""Build the dashboard's views in one process, fetching what they share once.
+
+Observable runs each parquet loader as its own process, and CI runs the sectors view in
+another, so every view imports oda_data and pydeflate, loads the groupings, and reads the
+exchange rates, deflators and CRS classifications for itself. This builds any set of views
+in one process instead:
+
+    python -m src.data.build --views all --jobs 2 --sectors-shards 4 --sectors-jobs 2
+
+The build is a graph of tasks: the shared inputs (the pydeflate tables, the compacted CRS
+store, the recipient classifications), then each view after the inputs it uses. Independent
+tasks run concurrently on --jobs threads, except the sectors view, by far the largest: it
+starts once every other view has finished, so it never shares the process's memory with one,
+and it is built in --sectors-shards donor shards across --sectors-jobs worker processes.
+While it runs, the fetches views share are kept in-process (see
+analysis_tools/shared_inputs.py), as are oda_data's own reads.
+
+Each parquet view is written where Observable caches its loader's output, under
+PATHS.OBSERVABLE_CACHE. Being newer than the loader, it is served as is by the Observable build
+that follows, without running the loader again. The sectors view writes its partitioned
+dataset to cdn_files, as when run on its own.
+"""
+
+import argparse
+import importlib.util
+import sys
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import partial
+from types import ModuleType
+
+from src.data.analysis_tools.crs_store import compact_crs
+from src.data.analysis_tools.profiling import stage, write_run_report
+from src.data.analysis_tools.shared_inputs import sharing
+from src.data.analysis_tools.transformations import get_crs_recipient_classifications
+from src.data.config import BASE_TIME, CRS_RECIPIENTS, PATHS, logger
+
+VIEWS: tuple[str, ...] = ("financing", "recipients", "gender", "sectors")
+
+# The shared inputs each view uses, so a build of some views fetches only what they need.
+_VIEW_INPUTS: dict[str, tuple[str, ...]] = {
+    "financing": ("exchange_rates",),
+    "recipients": ("exchange_rates",),
+    "gender": ("exchange_rates", "classifications"),
+    "sectors": ("exchange_rates", "classifications"),
+}
+
+_SCRIPTS = PATHS.SRC / "data" / "scripts"
+
+
+@dataclass(frozen=True)
+class Task:
+    """One step of the build, run once every task named in after has finished."""
+
+    name: str
+    run: Callable[[], None]
+    after: tuple[str, ...] = ()
+
+
+def _load_loader(view: str) -> ModuleType:
+    """Import a view's loader script, whose file name is not a module name."""
+    name = f"{view}_view"
+    spec = importlib.util.spec_from_file_location(name, _SCRIPTS / f"{name}.parquet.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _observable_output(view: str, loader: ModuleType) -> Callable[[], None]:
+    """Write a parquet view where Observable caches its loader's output."""
+    target = PATHS.OBSERVABLE_CACHE / "data" / "scripts" / f"{view}_view.parquet"
+
+    def run() -> None:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, so a failed view never leaves a truncated file that
+        # Observable would take as current.
+        tmp = target.with_suffix(".tmp")
+        with open(tmp, "wb") as sink:
+            loader.write_view(sink)
+        tmp.replace(target)
+        logger.info("%s view written to %s", view.capitalize(), target)
+
+    return run
+
+
+def _shared_input(name: str, fetch: Callable[[], object]) -> Callable[[], None]:
+    """Fetch a shared input, reporting its stages on their own rather than in a view's."""
+
+    def run() -> None:
+        with stage(f"Fetching shared input: {name}"):
+            fetch()
+        write_run_report(f"shared_{name}")
+
+    return run
+
+
+def _prewarm_exchange_rates() -> None:
+    from src.data.scripts.prewarm_cache import prewarm_exchange_rates
+
+    prewarm_exchange_rates()
+
+
+def build_tasks(
+    views: list[str],
+    incremental: bool = False,
+    sectors_shards: int = 1,
+    sectors_jobs: int = 1,
+) -> list[Task]:
+    """The tasks that build views, each after the tasks it depends on.
+
+    Loaders are imported here, on the calling thread, rather than by the tasks. The sectors
+    view comes after every other view being built, so it runs last and alone.
+
+    Args:
+        views: Views to build, from VIEWS.
+        incremental: Rewrite only the sectors partitions that changed since the last build.
+        sectors_shards: Donor shards to build the sectors view in; 1 builds it in memory.
+            See sectors_view.write_view.
+        sectors_jobs: Worker processes to build the sectors shards in.
+    """
+    inputs = {name for view in views for name in _VIEW_INPUTS[view]}
+    tasks = []
+    if "exchange_rates" in inputs:
+        tasks.append(
+            Task("exchange_rates", _shared_input("exchange_rates", _prewarm_exchange_rates))
+        )
+    if "classifications" in inputs:
+        tasks.append(Task("crs_store", _shared_input("crs_store", compact_crs)))
+        # Every year any view classifies, so each is served from this one table.
+        years = range(BASE_TIME["start"], BASE_TIME["end"] + 1)
+        tasks.append(
+            Task(
+                "classifications",
+                _shared_input(
+                    "classifications",
+                    lambda: get_crs_recipient_classifications(years, list(CRS_RECIPIENTS)),
+                ),
+                after=("crs_store",),
+            )
+        )
+
+    for view in views:
+        after = _VIEW_INPUTS[view]
+        if view == "sectors":
+            from src.data.scripts import sectors_view
+
+            run = partial(
+                sectors_view.write_view,
+                n_shards=sectors_shards,
+                jobs=sectors_jobs,
+                incremental=incremental,
+            )
+            after = (*after, *(other for other in views if other != "sectors"))
+        else:
+            run = _observable_output(view, _load_loader(view))
+        tasks.append(Task(view, run, after=after))
+
+    return tasks
+
+
+def run_tasks(tasks: list[Task], jobs: int = 1) -> None:
+    """Run tasks on up to jobs threads, each once everything it comes after has finished.
+
+    A failed task stops any more from starting; those already running finish first.
+
+    Raises:
+        ValueError: If a task comes after one that is not among the tasks, or the tasks'
+            order is circular.
+        RuntimeError: Naming the tasks that failed, after the rest have stopped.
+    """
+    names = {task.name for task in tasks}
+    for task in tasks:
+        unknown = [name for name in task.after if name not in names]
+        if unknown:
+            raise ValueError(f"Task {task.name!r} comes after unknown tasks: {unknown}")
+
+    pending, done, failed = list(tasks), set(), []
+    running: dict[Future, Task] = {}
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="build") as pool:
+        while pending or running:
+            if not failed:
+                for task in [t for t in pending if set(t.after) <= done]:
+                    if len(running) == jobs:
+                        break
+                    logger.info("Starting %s", task.name)
+                    running[pool.submit(task.run)] = task
+                    pending.remove(task)
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task = running.pop(future)
+                if future.exception() is None:
+                    done.add(task.name)
+                else:
+                    logger.error("%s failed", task.name, exc_info=future.exception())
+                    failed.append(task.name)
+
+    if failed:
+        raise RuntimeError(f"Build failed at: {', '.join(failed)}")
+    if pending:
+        raise ValueError(f"Tasks come after each other: {[t.name for t in pending]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--views",
+        default="all",
+        help=f"Comma-separated views to build, from {', '.join(VIEWS)}; or all.",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="Tasks to run at once, each on its own thread."
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Rewrite only the sectors partitions whose rows changed since the last build.",
+    )
+    parser.add_argument(
+        "--sectors-shards",
+        type=int,
+        default=1,
+        help="Build the sectors view a donor shard at a time; 1 builds it in memory.",
+    )
+    parser.add_argument(
+        "--sectors-jobs",
+        type=int,
+        default=1,
+        help="Worker processes to build the sectors shards in.",
+    )
+    args = parser.parse_args()
+    views = list(VIEWS) if args.views == "all" else args.views.split(",")
+    unknown = [view for view in views if view not in VIEWS]
+    if unknown:
+        parser.error(f"Unknown views: {', '.join(unknown)}")
+
+    with sharing():
+        run_tasks(
+            build_tasks(
+                views,
+                incremental=args.incremental,
+                sectors_shards=args.sectors_shards,
+                sectors_jobs=args.sectors_jobs,
+            ),
+            jobs=args.jobs,
+        )
+    logger.info("Built %s", ", ".join(views))
@@ -54,6 +54,10 @@ class PATHS:
     # View options and other small artifacts the frontend loads as FileAttachments.
     TOOLS = SRC / "data" / "analysis_tools"
 
+    # Where Observable keeps each data loader's output, under the loader's own path; a file
+    # there newer than its loader is served without running the loader. See src/data/build.py.
+    OBSERVABLE_CACHE = SRC / ".observablehq" / "cache"
+
     # oda_data and pydeflate share one cache directory; see outputs.set_cache_dir.
     DATA = SRC / "data" / "cache"
     PYDEFLATE = DATA
@@ -71,8 +75,9 @@ class PATHS:
 # the rounding sees every digit the source had. Written as an int the product stayed float32,
 # which by the hundreds of millions can only land on multiples of 16: that change moved 176,089
 # cells and shifted the sectors total by ~33,000 units. Measured in the pipeline, not in
-# isolation — a float32 Series times 1e6 is float32 on its own, so the promotion depends on
-# state the OECD libraries set up. Hence the warning rather than an explanation.
+# isolation — a float32 Series times 1e6 is float32 on its own, so the promotion depended on
+# state the OECD libraries set up. convert_values_to_units now widens each chunk to float64
+# itself before multiplying, so the rounding no longer rests on that; keep the float anyway.
 UNITS_PER_MILLION: float = 1e6
 
 # Above this, a value column no longer fits in Int32 and has to be stored as Int64.
@@ -0,0 +1,26 @@
+"""Download the CRS bulk file if needed, then compact it into the local CRS store.
+
+Runs once before the build, after the bulk data cache is restored. Every CRS read in the
+loaders then comes from the store, partitioned by year and donor, instead of scanning the bulk
+file; see src/data/analysis_tools/crs_store.py. When the store for the current bulk file
+already exists, this does nothing.
+
+Exits 0 on success, 1 if there is no bulk file to compact.
+"""
+import sys
+
+from oda_data import CRSData
+
+from src.data.analysis_tools.crs_store import compact_crs
+from src.data.analysis_tools.outputs import crs_bulk_fingerprint, set_cache_dir
+from src.data.config import BASE_TIME, logger
+
+if __name__ == "__main__":
+    set_cache_dir(oda_data=True)
+
+    if crs_bulk_fingerprint() is None:
+        # Any bulk read makes oda_data download the file; one column of one year is the least.
+        logger.info("Downloading the CRS bulk file...")
+        CRSData(years=[BASE_TIME["end"]]).read(using_bulk_download=True, columns=["year"])
+
+    sys.exit(0 if compact_crs() else 1)
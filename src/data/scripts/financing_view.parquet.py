@@ -12,7 +12,9 @@ Shape of the pipeline:
 Output is keyed by name: year, donor_name, indicator_name, type.
 """
 
+import sys
 from collections import Counter
+from typing import BinaryIO
 
 import numpy as np
 import pandas as pd
@@ -21,16 +23,21 @@ from oda_data.indicators.research.eu import get_eui_plus_bilateral_providers_ind
 
 from src.data.analysis_tools.outputs import (
     set_cache_dir,
-    parquet_to_stdout,
+    write_parquet,
     generate_view_options,
 )
 from src.data.analysis_tools.naming import apply_name_overrides
+from src.data.analysis_tools.profiling import stage, write_run_report
 from src.data.analysis_tools.transformations import (
-    add_currencies_and_prices,
+    add_currency_price_columns,
     add_share_of_gni,
     add_share_of_total_oda,
+    collapse_wide_values,
     convert_values_to_units,
-    widen_currency_price, get_group_total,
+    drop_empty_values,
+    get_group_totals,
+    sum_value_columns,
+    value_columns,
 )
 from src.data.config import (
     logger,
@@ -220,7 +227,7 @@ def get_eui_eu27_dac1() -> pd.DataFrame:
     contributions, so summing members and institutions does not double count.
 
     Returns:
-        One row per year, indicator, currency and price for the aggregate.
+        One row per year and indicator for the aggregate, with a column per currency and price.
     """
 
     # in-donor indicators in net flows
@@ -263,14 +270,14 @@ def get_eui_eu27_dac1() -> pd.DataFrame:
 
     eui_eu27_dac1_raw = resolve_indicator_duplicates(eui_eu27_dac1_raw)
 
-    eui_eu27_dac1_converted = add_currencies_and_prices(eui_eu27_dac1_raw, base_year=FINANCING_TIME["base"])
+    eui_eu27_dac1_converted = add_currency_price_columns(eui_eu27_dac1_raw, base_year=FINANCING_TIME["base"])
 
-    eui_eu27_dac1 = (
-        eui_eu27_dac1_converted
-        .assign(
+    eui_eu27_dac1 = sum_value_columns(
+        eui_eu27_dac1_converted.assign(
             indicator_name=lambda d: d["one_indicator"].map(ALL_FINANCING_INDICATORS),
             donor_name="EU27 & EU Institutions",
-        ).groupby(["year", "donor_name", "currency", "price", "indicator_name"], dropna=False, observed=True)["value"].sum().reset_index()
+        ),
+        ["year", "donor_name", "indicator_name"],
     )
 
     return eui_eu27_dac1
@@ -318,18 +325,27 @@ def get_eui_eu27_grants() -> pd.DataFrame:
 
     eui_eu27_grants_raw = pd.concat([grants_flow_raw, grants_ge_raw])
 
-    eui_eu27_grants_converted = add_currencies_and_prices(eui_eu27_grants_raw, base_year=FINANCING_TIME["base"])
+    eui_eu27_grants_converted = add_currency_price_columns(eui_eu27_grants_raw, base_year=FINANCING_TIME["base"])
 
-    eui_eu27_grants = (
+    # One column per currency and price pair, each split by measure underneath it.
+    by_measure = (
         eui_eu27_grants_converted
         .assign(indicator_name=lambda d: d["fund_flows"].map(mapping))
-        .pivot(index=["year", "donor_code", "currency", "price"], columns="indicator_name", values="value")
-        .reset_index()
-        .assign(**{"Non-grants": lambda d: d["Total ODA"] - d["Grants"]})
-        .melt(id_vars=["year", "donor_code", "currency", "price"], value_vars=["Grants", "Non-grants"])
-        .groupby(["year", "indicator_name", "currency", "price"], dropna=False, observed=True)["value"].sum().reset_index()
-        .assign(donor_name= "EU27 & EU Institutions")
+        .pivot(
+            index=["year", "donor_code"],
+            columns="indicator_name",
+            values=value_columns(eui_eu27_grants_converted),
+        )
     )
+    grants = by_measure.xs("Grants", axis=1, level="indicator_name")
+    non_grants = by_measure.xs("Total ODA", axis=1, level="indicator_name") - grants
+
+    eui_eu27_grants = sum_value_columns(
+        pd.concat(
+            [grants.assign(indicator_name="Grants"), non_grants.assign(indicator_name="Non-grants")]
+        ).reset_index(),
+        ["year", "indicator_name"],
+    ).assign(donor_name="EU27 & EU Institutions")
 
     return eui_eu27_grants
 
@@ -341,72 +357,74 @@ def get_financing_data() -> pd.DataFrame:
         Wide frame keyed by year, donor_name, indicator_name and type, with one column per
         currency and price pair plus the two share columns.
     """
-    dac1 = get_dac1()
-    grants = get_grants()
+    with stage("Fetching DAC1 data") as s:
+        dac1 = s.output(get_dac1())
+    with stage("Fetching grants data") as s:
+        grants = s.output(get_grants())
 
     non_eu_financing = pd.concat([dac1, grants])
 
-    # Add currencies and prices
-    non_eu_financing = add_currencies_and_prices(non_eu_financing, base_year=FINANCING_TIME["base"])
+    with stage("Adding currencies and prices", non_eu_financing) as s:
+        non_eu_financing = s.output(
+            add_currency_price_columns(non_eu_financing, base_year=FINANCING_TIME["base"])
+        )
 
-    eu27_financing = get_group_total(
-        non_eu_financing,
-        EU_COUNTRIES,
-        group_cols=["year", "indicator_name", "currency", "price"],
-        group_name="EU27 countries"
-    )
-    all_bilateral_financing = get_group_total(
-        non_eu_financing,
-        BILATERAL_DONORS,
-        group_cols=["year", "indicator_name", "currency", "price"],
-        group_name="All bilateral donors"
-    )
+    with stage("Building donor group totals", non_eu_financing) as s:
+        donor_groups_financing = s.output(
+            get_group_totals(
+                non_eu_financing,
+                {"EU27 countries": EU_COUNTRIES, "All bilateral donors": BILATERAL_DONORS},
+                group_cols=["year", "indicator_name"],
+            )
+        )
 
-    eui_eu27_dac1 = get_eui_eu27_dac1()
-    eui_eu27_grants = get_eui_eu27_grants()
+    with stage("Fetching EU27 & EU Institutions data"):
+        eui_eu27_dac1 = get_eui_eu27_dac1()
+        eui_eu27_grants = get_eui_eu27_grants()
 
     financing = pd.concat([
         non_eu_financing,
-        eu27_financing,
-        all_bilateral_financing,
+        donor_groups_financing,
         eui_eu27_dac1,
         eui_eu27_grants
     ])
 
-    financing = financing.loc[
-        lambda d: d["value"].notna() & (d["value"] != 0)
-    ]
+    with stage("Collapsing to the published keys", financing) as s:
+        financing = drop_empty_values(financing)
 
-    # Add type column
-    financing["type"] = np.where(
-        financing["year"] < GRANT_EQUIVALENT_START_YEAR, "Flows", "Grant equivalents"
-    )
+        # Add type column
+        financing["type"] = np.where(
+            financing["year"] < GRANT_EQUIVALENT_START_YEAR, "Flows", "Grant equivalents"
+        )
 
-    # Pivot values to columns
-    financing = widen_currency_price(
-        df=financing,
-        index_cols=(
-            "year",
-            "donor_name",
-            "indicator_name",
-            "type",
-        ),
-    )
+        # Sum any rows sharing a published key
+        financing = s.output(
+            collapse_wide_values(
+                df=financing,
+                index_cols=(
+                    "year",
+                    "donor_name",
+                    "indicator_name",
+                    "type",
+                ),
+            )
+        )
 
-    # Add share of total ODA
-    financing = add_share_of_total_oda(financing)
+    with stage("Adding shares and converting to units", financing) as s:
+        # Add share of total ODA
+        financing = add_share_of_total_oda(financing)
 
-    # Add share of GNI column
-    financing = add_share_of_gni(financing)
+        # Add share of GNI column
+        financing = add_share_of_gni(financing)
 
-    # Convert values to units (integers) for better compression
-    financing = convert_values_to_units(financing)
+        # Convert values to units (integers) for better compression
+        financing = s.output(convert_values_to_units(financing))
 
     return financing
 
 
-if __name__ == "__main__":
-
+def write_view(sink: BinaryIO) -> None:
+    """Build the financing view, write its parquet to sink and its options beside the loaders."""
     logger.info("Generating financing table...")
     df = get_financing_data()
     generate_view_options(
@@ -419,4 +437,10 @@ if __name__ == "__main__":
         base_year=FINANCING_TIME["base"],
         file_name="financing_view_options.json",
     )
-    parquet_to_stdout(df)
+    with stage("Writing parquet", df):
+        write_parquet(df, sink)
+    write_run_report("financing_view")
+
+
+if __name__ == "__main__":
+    write_view(sys.stdout.buffer)
@@ -11,19 +11,23 @@ Shape of the pipeline:
 Output is keyed by name: year, donor_name, recipient_name, indicator_name.
 """
 
+import sys
+from typing import BinaryIO
+
 import pandas as pd
 
 from oda_data import bilateral_policy_marker
 
 from src.data.analysis_tools.transformations import (
-    add_currencies_and_prices,
+    add_currency_price_columns,
     add_recipient_classifications,
     add_share_of_group_total,
     build_crs_donor_group_totals,
     build_crs_recipient_group_totals,
+    collapse_wide_values,
     convert_values_to_units,
+    drop_empty_values,
     get_crs_recipient_classifications,
-    widen_currency_price,
 )
 from src.data.config import (
     logger,
@@ -37,18 +41,17 @@ from src.data.config import (
 from src.data.analysis_tools.outputs import (
     set_cache_dir,
     generate_view_options,
-    parquet_to_stdout,
+    write_parquet,
 )
+from src.data.analysis_tools.profiling import stage, write_run_report
 
 set_cache_dir(oda_data=True, pydeflate=True)
 
 YEARS = range(BASE_TIME["start"], BASE_TIME["end"] + 1)
 
 # Everything identifying a row except the recipient, and except the donor, respectively.
-RECIPIENT_GROUP_COLS = [
-    "year", "donor_code", "donor_name", "indicator_name", "currency", "price",
-]
-DONOR_GROUP_COLS = ["year", "recipient_name", "indicator_name", "currency", "price"]
+RECIPIENT_GROUP_COLS = ["year", "donor_code", "donor_name", "indicator_name"]
+DONOR_GROUP_COLS = ["year", "recipient_name", "indicator_name"]
 
 
 def get_gender_markers() -> pd.DataFrame:
@@ -97,47 +100,54 @@ def combined_gender() -> pd.DataFrame:
         Wide frame keyed by year, donor_name, recipient_name and indicator_name, with one
         column per currency and price pair plus pct_of_total_oda.
     """
-    logger.info("Fetching gender marker data...")
-    gender = get_gender_markers()
+    with stage("Fetching gender marker data") as s:
+        gender = s.output(get_gender_markers())
 
-    logger.info("Attaching recipient classifications...")
-    classified = get_crs_recipient_classifications(YEARS, list(CRS_RECIPIENTS))
-    gender = add_recipient_classifications(gender, classified, "gender markers")
+    with stage("Attaching recipient classifications", gender) as s:
+        classified = get_crs_recipient_classifications(YEARS, list(CRS_RECIPIENTS))
+        gender = s.output(add_recipient_classifications(gender, classified, "gender markers"))
 
-    logger.info("Adding currencies and prices...")
-    gender = add_currencies_and_prices(gender, base_year=BASE_TIME["base"])
-    gender = gender[gender["value"].notna() & (gender["value"] != 0)]
+    with stage("Adding currencies and prices", gender) as s:
+        gender = s.output(
+            drop_empty_values(add_currency_price_columns(gender, base_year=BASE_TIME["base"]))
+        )
 
     # Recipient groups must exist before the donor groups are summed, so that every donor
-    # aggregate covers every recipient group as well as every country.
-    logger.info("Building recipient and donor group totals...")
-    gender = pd.concat(
-        [gender, *build_crs_recipient_group_totals(gender, RECIPIENT_GROUP_COLS)],
-        ignore_index=True,
-    )
-    gender = pd.concat(
-        [gender, *build_crs_donor_group_totals(gender, DONOR_GROUP_COLS)],
-        ignore_index=True,
-    )
+    # aggregate covers every recipient group as well as every country. Empty cells were dropped
+    # above, so min_count=1 keeps a group with nothing in a column out of the published table.
+    with stage("Building recipient and donor group totals", gender) as s:
+        gender = pd.concat(
+            [gender, build_crs_recipient_group_totals(gender, RECIPIENT_GROUP_COLS, min_count=1)],
+            ignore_index=True,
+        )
+        gender = s.output(
+            pd.concat(
+                [gender, build_crs_donor_group_totals(gender, DONOR_GROUP_COLS, min_count=1)],
+                ignore_index=True,
+            )
+        )
 
-    logger.info("Pivoting to wide format...")
-    gender = widen_currency_price(
-        df=gender,
-        index_cols=("year", "donor_name", "recipient_name", "indicator_name"),
-    )
+    with stage("Collapsing to the published keys", gender) as s:
+        gender = s.output(
+            collapse_wide_values(
+                df=gender,
+                index_cols=("year", "donor_name", "recipient_name", "indicator_name"),
+            )
+        )
 
     # The four marker scores partition each entity's screened aid, so the denominator is the
     # entity's own total rather than a reference entity's.
-    gender = add_share_of_group_total(
-        gender,
-        group_cols=["year", "donor_name", "recipient_name"],
-        pct_col="pct_of_total_oda",
-    )
-
-    return convert_values_to_units(gender)
+    with stage("Adding shares and converting to units", gender) as s:
+        gender = add_share_of_group_total(
+            gender,
+            group_cols=["year", "donor_name", "recipient_name"],
+            pct_col="pct_of_total_oda",
+        )
+        return s.output(convert_values_to_units(gender))
 
 
-if __name__ == "__main__":
+def write_view(sink: BinaryIO) -> None:
+    """Build the gender view, write its parquet to sink and its options beside the loaders."""
     logger.info("Generating gender view table...")
     df = combined_gender()
     generate_view_options(
@@ -151,5 +161,10 @@ if __name__ == "__main__":
         base_year=BASE_TIME["base"],
         file_name="gender_view_options.json",
     )
-    logger.info("Writing parquet to stdout...")
-    parquet_to_stdout(df)
+    with stage("Writing parquet", df):
+        write_parquet(df, sink)
+    write_run_report("gender_view")
+
+
+if __name__ == "__main__":
+    write_view(sys.stdout.buffer)
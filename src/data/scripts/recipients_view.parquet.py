@@ -12,16 +12,21 @@ Shape of the pipeline:
 Output is keyed by name: year, donor_name, recipient_name, indicator_name.
 """
 
+import sys
+from typing import BinaryIO
+
 import pandas as pd
 from oda_data import OECDClient
 from oda_data.indicators.research.eu import get_eui_plus_bilateral_providers_indicator
 
 from src.data.analysis_tools.transformations import (
-    add_currencies_and_prices,
-    add_share_of_reference_total,
+    add_currency_price_columns,
+    add_shares,
+    collapse_wide_values,
     convert_values_to_units,
-    get_group_total,
-    widen_currency_price,
+    drop_empty_values,
+    get_group_totals,
+    sum_value_columns,
 )
 from src.data.config import (
     logger,
@@ -43,13 +48,14 @@ from src.data.config import (
 )
 from src.data.analysis_tools.outputs import (
     set_cache_dir,
-    parquet_to_stdout,
+    write_parquet,
     generate_view_options,
 )
 from src.data.analysis_tools.naming import (
     apply_name_overrides,
     normalize_unspecified_names,
 )
+from src.data.analysis_tools.profiling import stage, write_run_report
 
 set_cache_dir(oda_data=True, pydeflate=True)
 
@@ -118,28 +124,23 @@ def get_dac2a_eui_eu27() -> tuple[pd.DataFrame, pd.DataFrame]:
         eui_eu27_dac2a_raw["recipient_name"]
     )
 
-    eui_eu27_dac2a_converted = add_currencies_and_prices(
+    eui_eu27_dac2a_converted = add_currency_price_columns(
         eui_eu27_dac2a_raw, base_year=BASE_TIME["base"]
     ).assign(indicator_name=lambda d: d["one_indicator"].map(RECIPIENTS_INDICATORS))
 
     # recipient_code is kept so that recipient group totals (Sahel, France priority) can
     # be derived for these series too; it is dropped before the pivot.
-    group_cols = [
-        "year", "donor_name", "recipient_code", "recipient_name", "indicator_name",
-        "currency", "price",
-    ]
+    group_cols = ["year", "donor_name", "recipient_code", "recipient_name", "indicator_name"]
 
-    eui_eu27_dac2a = (
-        eui_eu27_dac2a_converted
-        .assign(donor_name="EU27 & EU Institutions")
-        .groupby(group_cols, dropna=False, observed=True)["value"].sum().reset_index()
+    eui_eu27_dac2a = sum_value_columns(
+        eui_eu27_dac2a_converted.assign(donor_name="EU27 & EU Institutions"), group_cols
     )
 
-    eui_bilateral = (
+    eui_bilateral = sum_value_columns(
         eui_eu27_dac2a_converted
         .loc[lambda d: d["donor_code"].isin(EU_INSTITUTIONS)]
-        .assign(donor_name=EUI_BILATERAL_NAME)
-        .groupby(group_cols, dropna=False, observed=True)["value"].sum().reset_index()
+        .assign(donor_name=EUI_BILATERAL_NAME),
+        group_cols,
     )
 
     return eui_eu27_dac2a, eui_bilateral
@@ -152,11 +153,16 @@ def combined_recipients() -> pd.DataFrame:
         Wide frame keyed by year, donor_name, recipient_name and indicator_name, with one
         column per currency and price pair plus the two share columns.
     """
-    dac2a = get_dac2a()
+    with stage("Fetching DAC2A data") as s:
+        dac2a = s.output(get_dac2a())
 
-    dac2a_converted = add_currencies_and_prices(dac2a, base_year=BASE_TIME["base"])
+    with stage("Adding currencies and prices", dac2a) as s:
+        dac2a_converted = s.output(
+            add_currency_price_columns(dac2a, base_year=BASE_TIME["base"])
+        )
 
-    eui_eu27_dac2a, eui_bilateral = get_dac2a_eui_eu27()
+    with stage("Fetching EU27 & EU Institutions DAC2A data"):
+        eui_eu27_dac2a, eui_bilateral = get_dac2a_eui_eu27()
 
     # Reported donors (carrying donor_code) and the EU-institution aggregates (identified
     # by name only). All must be in place before recipient groups are aggregated, so that
@@ -167,101 +173,98 @@ def combined_recipients() -> pd.DataFrame:
 
     # Recipient group totals must keep donor_code: the donor group totals below select
     # their members by code, and rows without one are silently excluded from them.
-    recipient_group_cols = [
-        "year", "donor_code", "donor_name", "indicator_name", "currency", "price",
-    ]
-    sahel_recipients = get_group_total(
-        donors_long,
-        SAHEL_RECIPIENTS,
-        column="recipient",
-        group_cols=recipient_group_cols,
-        group_name="Sahel countries",
-    )
-    france_priority_recipients = get_group_total(
-        donors_long,
-        FRANCE_PRIORITY_RECIPIENTS,
-        column="recipient",
-        group_cols=recipient_group_cols,
-        group_name="France priority countries",
-    )
-
-    with_recipient_groups = pd.concat([
-        donors_long,
-        sahel_recipients,
-        france_priority_recipients,
-    ], ignore_index=True)
+    recipient_group_cols = ["year", "donor_code", "donor_name", "indicator_name"]
+    with stage("Building recipient group totals", donors_long) as s:
+        recipient_groups = get_group_totals(
+            donors_long,
+            {
+                "Sahel countries": SAHEL_RECIPIENTS,
+                "France priority countries": FRANCE_PRIORITY_RECIPIENTS,
+            },
+            column="recipient",
+            group_cols=recipient_group_cols,
+        )
+
+        with_recipient_groups = s.output(
+            pd.concat([donors_long, recipient_groups], ignore_index=True)
+        )
 
     # Donor group totals are computed from the extended dataset so that
     # All bilateral / EU27 rows exist for every recipient including Sahel
     # and France priority — required for pct_total_recipient denominators.
-    donor_group_cols = ["year", "recipient_name", "indicator_name", "currency", "price"]
-    eu27_recipients = get_group_total(
-        with_recipient_groups,
-        EU_COUNTRIES,
-        group_cols=donor_group_cols,
-        group_name="EU27 countries",
-    )
-    # "All bilateral donors" covers the reported bilateral providers plus EU institutions'
-    # bilateral-equivalent spending. EU institutions are not in BILATERAL_DONORS, so they
-    # are added explicitly here; using the scaled series rather than the full EU
-    # Institutions total keeps EU member contributions from being counted twice. This is
-    # also the pct_total_recipient denominator, so it must stay double-count free.
-    all_bilateral_rows = pd.concat([
-        with_recipient_groups.loc[lambda d: d["donor_code"].isin(BILATERAL_DONORS)],
-        with_recipient_groups.loc[lambda d: d["donor_name"] == EUI_BILATERAL_NAME],
-    ])
-    all_bilateral_recipients = (
-        all_bilateral_rows
-        .groupby(donor_group_cols, dropna=False, observed=True)["value"]
-        .sum()
-        .reset_index()
-        .assign(donor_name="All bilateral donors")
-    )
-
-    recipients = pd.concat([
-        with_recipient_groups,
-        eu27_recipients,
-        all_bilateral_recipients,
-    ], ignore_index=True)
-
-    recipients = recipients.loc[
-        lambda d: d["value"].notna() & (d["value"] != 0)
-    ]
-
-    # The EU institutions bilateral series exists only to keep "All bilateral donors" (and
-    # therefore the pct_total_recipient denominator) free of double counting. That total is
-    # already aggregated above, so dropping the series here removes it from the view
-    # without changing any published value.
-    recipients = recipients.loc[lambda d: d["donor_name"] != EUI_BILATERAL_NAME]
-
-    recipients = recipients.drop(columns=["donor_code", "recipient_code"], errors="ignore")
-
-    recipients = widen_currency_price(
-        df=recipients,
-        index_cols=("year", "donor_name", "recipient_name", "indicator_name"),
-    )
-
-    recipients = add_share_of_reference_total(
-        recipients,
-        filter_col="donor_name",
-        filter_val="All bilateral donors",
-        merge_cols=["year", "recipient_name"],
-        pct_col="pct_total_recipient",
-    )
-    recipients = add_share_of_reference_total(
-        recipients,
-        filter_col="recipient_name",
-        filter_val="ODA eligible countries",
-        merge_cols=["year", "donor_name"],
-        pct_col="pct_total_donor",
-    )
-
-    recipients = convert_values_to_units(recipients)
+    donor_group_cols = ["year", "recipient_name", "indicator_name"]
+    with stage("Building donor group totals", with_recipient_groups) as s:
+        donor_groups = get_group_totals(
+            with_recipient_groups,
+            {"EU27 countries": EU_COUNTRIES, "All bilateral donors": BILATERAL_DONORS},
+            group_cols=donor_group_cols,
+        )
+        # "All bilateral donors" covers the reported bilateral providers plus EU institutions'
+        # bilateral-equivalent spending. EU institutions are not in BILATERAL_DONORS, so they
+        # are added explicitly here; using the scaled series rather than the full EU
+        # Institutions total keeps EU member contributions from being counted twice. This is
+        # also the pct_total_recipient denominator, so it must stay double-count free.
+        is_all_bilateral = donor_groups["donor_name"] == "All bilateral donors"
+        all_bilateral_recipients = sum_value_columns(
+            pd.concat([
+                donor_groups.loc[is_all_bilateral],
+                with_recipient_groups.loc[lambda d: d["donor_name"] == EUI_BILATERAL_NAME],
+            ]),
+            donor_group_cols,
+        ).assign(donor_name="All bilateral donors")
+
+        recipients = s.output(
+            pd.concat([
+                with_recipient_groups,
+                donor_groups.loc[~is_all_bilateral],
+                all_bilateral_recipients,
+            ], ignore_index=True)
+        )
+
+    with stage("Collapsing to the published keys", recipients) as s:
+        recipients = drop_empty_values(recipients)
+
+        # The EU institutions bilateral series exists only to keep "All bilateral donors" (and
+        # therefore the pct_total_recipient denominator) free of double counting. That total
+        # is already aggregated above, so dropping the series here removes it from the view
+        # without changing any published value.
+        recipients = recipients.loc[lambda d: d["donor_name"] != EUI_BILATERAL_NAME]
+
+        recipients = recipients.drop(columns=["donor_code", "recipient_code"], errors="ignore")
+
+        recipients = s.output(
+            collapse_wide_values(
+                df=recipients,
+                index_cols=("year", "donor_name", "recipient_name", "indicator_name"),
+            )
+        )
+
+    with stage("Adding shares and converting to units", recipients) as s:
+        recipients = add_shares(
+            recipients,
+            [
+                (
+                    "donor_name",
+                    "All bilateral donors",
+                    ["year", "recipient_name"],
+                    "pct_total_recipient",
+                ),
+                (
+                    "recipient_name",
+                    "ODA eligible countries",
+                    ["year", "donor_name"],
+                    "pct_total_donor",
+                ),
+            ],
+        )
+
+        recipients = s.output(convert_values_to_units(recipients))
 
     return recipients
 
 
-if __name__ == "__main__":
+def write_view(sink: BinaryIO) -> None:
+    """Build the recipients view, write its parquet to sink and its options beside the loaders."""
     logger.info("Generating recipients table...")
     df = combined_recipients()
     generate_view_options(
@@ -275,4 +278,10 @@ if __name__ == "__main__":
         base_year=BASE_TIME["base"],
         file_name="recipients_view_options.json",
     )
-    parquet_to_stdout(df)
+    with stage("Writing parquet", df):
+        write_parquet(df, sink)
+    write_run_report("recipients_view")
+
+
+if __name__ == "__main__":
+    write_view(sys.stdout.buffer)
@@ -7,22 +7,35 @@ Shape of the pipeline:
     3. recipient names, regions and income groups from the shared CRS classification table
     4. recipient groups then donor groups, summed locally because the CRS publishes neither
     5. shares from both perspectives, then values as integer units
-    6. a partitioned dataset under cdn_files, addressed by donor and recipient slug
-
-This is the largest view by far, so the frame is kept dictionary-encoded and stripped of spent
-columns before the pivot; see _as_categoricals and the drop before widen_currency_price.
+    6. a partitioned dataset under cdn_files, addressed by donor and recipient slug, and
+       beside it the same summed by sector and across sectors (see DATASETS)
+
+This is the largest view by far, so the frame is converted wide (one row per key, one column per
+currency and price), kept dictionary-encoded, and stripped of spent columns before the final
+collapse; see _as_categoricals and the drop before collapse_wide_values. Where even that is too
+much, --shards N builds it a donor shard at a time instead, and --jobs N builds the shards in
+N worker processes; see combined_sectors_sharded. The in-memory build can save each stage as
+it goes with --checkpoint, and a failed build rerun with --resume picks up from the last stage
+it saved; see sectors_stages. With --incremental, only the partitions whose rows changed since the
+last build are rewritten, and the changes are listed for the uploader in
+cdn_files/sectors_view_changes.json.
 
 Output is keyed by name: year, donor_name, recipient_name, indicator_name, sector_name,
 sub_sector_name, with donor_slug and recipient_slug as the partition keys.
 """
 
-import os
-import sys
+import argparse
+import multiprocessing as mp
+import tempfile
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from functools import cache
+from itertools import repeat
+from pathlib import Path
 
 import pandas as pd
 
-from oda_data import CRSData
 from oda_data.tools import sector_lists
 from oda_data.indicators.research.sector_imputations import (
     imputed_multilateral_by_purpose,
@@ -31,16 +44,23 @@ from oda_data.indicators.research.sector_imputations import (
 from src.data.analysis_tools.transformations import (
     CRS_INCOME_COL,
     CRS_REGION_COL,
-    add_currencies_and_prices,
+    RecipientClassificationIndex,
+    add_currency_price_columns,
     add_recipient_classifications,
-    add_share_of_reference_total,
+    add_shares,
     build_crs_donor_group_totals,
     build_crs_recipient_group_totals,
+    collapse_wide_values,
     convert_values_to_units,
+    drop_empty_values,
     get_crs_recipient_classifications,
-    widen_currency_price,
+    index_recipient_classifications,
+    largest_in_units,
+    sum_value_columns,
 )
 from src.data.config import (
+    INT32_MAX,
+    PATHS,
     logger,
     SECTORS_TIME,
     CRS_PROVIDERS,
@@ -57,24 +77,77 @@ from src.data.config import (
 from src.data.analysis_tools.outputs import (
     set_cache_dir,
     generate_view_options,
+    partition_changes,
+    read_arrow_ipc,
+    read_partition_manifest,
+    write_arrow_ipc,
     write_partitioned_dataset,
 )
 from src.data.analysis_tools.naming import slugify
+from src.data.analysis_tools.checkpoints import Stage, StageCheckpoints
+from src.data.analysis_tools.crs_scan import CrsScan
+from src.data.analysis_tools.profiling import profiled, stage, write_run_report
 
 set_cache_dir(oda_data=True, pydeflate=True)
 
 YEARS = range(SECTORS_TIME["start"], SECTORS_TIME["end"] + 1)
 
 # Everything identifying a row except the recipient, and except the donor, respectively.
-RECIPIENT_GROUP_COLS = [
-    "year", "donor_code", "donor_name", "indicator_name", "sub_sector", "currency", "price",
-]
-DONOR_GROUP_COLS = [
-    "year", "recipient_name", "indicator_name", "sub_sector", "currency", "price",
-]
+RECIPIENT_GROUP_COLS = ["year", "donor_code", "donor_name", "indicator_name", "sub_sector"]
+DONOR_GROUP_COLS = ["year", "recipient_name", "indicator_name", "sub_sector"]
 
 UNALLOCATED_SUB_SECTOR = "Unallocated/unspecified"
 
+# Label columns the partitions are addressed by, as {column}_name -> {column}_slug.
+SLUGGED = ("donor", "recipient")
+
+INDEX_COLS = (
+    "year",
+    "donor_name",
+    "recipient_name",
+    "indicator_name",
+    "sector_name",
+    "sub_sector_name",
+)
+
+# Columns the published datasets are partitioned by, which the frontend addresses them by.
+PARTITION_COLS = [f"{column}_slug" for column in SLUGGED]
+
+# The datasets published, finest first: the INDEX_COLS each keeps, the columns it is
+# partitioned by, and the query shapes it answers, for the frontend. The coarser ones are
+# rollups of the first (see rollup_tiers). A query can be served by any dataset that keeps every
+# column it filters or groups by, and the coarsest of those downloads the fewest bytes. The
+# totals are partitioned by donor alone: a donor and recipient's totals are a few dozen rows,
+# and a file each would be mostly parquet overhead.
+DATASETS: dict[str, dict] = {
+    "sectors_view": {
+        "keys": list(INDEX_COLS),
+        "partition_cols": PARTITION_COLS,
+        "answers": "Sub-sector detail: the selected sector's sub-sectors, and the table.",
+    },
+    "sectors_view_by_sector": {
+        "keys": [col for col in INDEX_COLS if col != "sub_sector_name"],
+        "partition_cols": PARTITION_COLS,
+        "answers": "Sector totals: the treemap, and series by year, indicator or sector that "
+        "do not break a sector down into sub-sectors.",
+    },
+    "sectors_view_totals": {
+        "keys": ["year", "donor_name", "recipient_name", "indicator_name"],
+        "partition_cols": ["donor_slug"],
+        "answers": "Totals across every sector: a donor's or recipient's series by year and "
+        "indicator.",
+    },
+}
+
+# Share specs for add_shares: of each donor's total to countries, and of the total all
+# bilateral donors gave each recipient.
+SHARE_OF_DONOR = (
+    "recipient_name", "ODA eligible countries", ["year", "donor_name"], "pct_total_donor"
+)
+SHARE_OF_RECIPIENT = (
+    "donor_name", "All bilateral donors", ["year", "recipient_name"], "pct_total_recipient"
+)
+
 CRS_COLUMNS: list[str] = [
     "year",
     "donor_code",
@@ -88,8 +161,8 @@ CRS_COLUMNS: list[str] = [
 def _as_categoricals(df: pd.DataFrame) -> pd.DataFrame:
     """Cast the label columns to category, for whichever of them are present.
 
-    Sectors carries tens of millions of rows through the currency expansion and the pivot, so
-    the label columns have to be dictionary-encoded or the frame does not fit in a CI runner.
+    Sectors carries tens of millions of rows through the group totals and the final collapse,
+    so the label columns have to be dictionary-encoded or the frame does not fit in a CI runner.
     """
     for col in (*LABEL_COLUMNS, CRS_REGION_COL, CRS_INCOME_COL):
         if col in df.columns and df[col].dtype.name != "category":
@@ -142,18 +215,38 @@ def _assign_sub_sector(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def get_bilateral_by_sector() -> pd.DataFrame:
-    """Read bilateral CRS disbursements by sub-sector."""
-    raw_bilateral = CRSData(years=YEARS).read(
-        using_bulk_download=True,
-        additional_filters=[
-            ("donor_code", "in", list(CRS_PROVIDERS)),
+# Name the bilateral read is requested under on a shared CrsScan.
+BILATERAL_REQUEST = "bilateral"
+
+
+def _request_bilateral(scan: CrsScan, donors: list[int] | None = None) -> None:
+    """Ask scan for the rows get_bilateral_by_sector reads, for every provider or just donors."""
+    scan.request(
+        BILATERAL_REQUEST,
+        CRS_COLUMNS,
+        [
+            ("donor_code", "in", list(CRS_PROVIDERS) if donors is None else donors),
             ("recipient_code", "in", list(CRS_RECIPIENTS)),
             ("category", "in", CRS_FLOW_CATEGORIES),
         ],
-        columns=CRS_COLUMNS,
     )
 
+
+@profiled("Fetching bilateral data")
+def get_bilateral_by_sector(
+    donors: list[int] | None = None, scan: CrsScan | None = None
+) -> pd.DataFrame:
+    """Read bilateral CRS disbursements by sub-sector, for every provider or just donors.
+
+    Given a scan the bilateral rows were already requested from (see _request_bilateral), they
+    come from its shared read; otherwise the CRS is read for them alone.
+    """
+    if scan is None:
+        scan = CrsScan(YEARS)
+    if BILATERAL_REQUEST not in scan:
+        _request_bilateral(scan, donors)
+    raw_bilateral = scan.read(BILATERAL_REQUEST)
+
     # CRSData.read silently drops requested columns that do not exist, which would quietly
     # empty the classifications, so check rather than trust.
     missing = [col for col in CRS_COLUMNS if col not in raw_bilateral.columns]
@@ -177,11 +270,12 @@ def get_bilateral_by_sector() -> pd.DataFrame:
     return sectors_bi[sectors_bi["value"] != 0]
 
 
-def get_imputed_multi_by_sector() -> pd.DataFrame:
-    """Read imputed multilateral spending by sub-sector."""
+@profiled("Fetching imputed multilateral data")
+def get_imputed_multi_by_sector(donors: list[int] | None = None) -> pd.DataFrame:
+    """Read imputed multilateral spending by sub-sector, for every provider or just donors."""
     raw_multi = imputed_multilateral_by_purpose(
         years=YEARS,
-        providers=list(CRS_PROVIDERS),
+        providers=list(CRS_PROVIDERS) if donors is None else donors,
         measure="gross_disbursement",
         currency="USD",
         base_year=None,
@@ -204,6 +298,7 @@ def get_imputed_multi_by_sector() -> pd.DataFrame:
     return sectors_multi[sectors_multi["value"] != 0]
 
 
+@profiled("Fetching EU27 & EU Institutions imputed multilateral")
 def get_eu27_eui_imputed() -> pd.DataFrame:
     """Imputed multilateral for the EU27 + institutions bloc, free of double counting.
 
@@ -214,7 +309,7 @@ def get_eu27_eui_imputed() -> pd.DataFrame:
     multilaterals do not overlap with their bilateral spending.
 
     Read separately rather than by keeping channel_code in the main frame — channel adds a
-    dimension to every row, which the eight-fold currency expansion would then multiply.
+    dimension to every row, and with it a set of currency columns for every extra row.
     """
     raw = imputed_multilateral_by_purpose(
         years=YEARS,
@@ -250,13 +345,22 @@ def get_eu27_eui_imputed() -> pd.DataFrame:
     return imputed[imputed["value"] != 0]
 
 
+def _eu27_eui_bilateral(sectors: pd.DataFrame) -> pd.DataFrame:
+    """The bloc's bilateral rows: members' and institutions' own spending."""
+    return sectors.loc[
+        sectors["donor_code"].isin(EU_COUNTRIES | EU_INSTITUTIONS)
+        & sectors["indicator_name"].astype("object").eq("Bilateral")
+    ]
+
+
 def build_eu27_eui_total(
-    sectors: pd.DataFrame, eu_imputed: pd.DataFrame, group_cols: list[str]
+    bilateral: pd.DataFrame, eu_imputed: pd.DataFrame, group_cols: list[str]
 ) -> pd.DataFrame:
     """Combine the bloc's bilateral spending with its corrected imputed multilateral.
 
     Args:
-        sectors: The converted frame, used for the bilateral half.
+        bilateral: The bloc's bilateral half, from _eu27_eui_bilateral, or already summed by
+            group_cols when the donors are processed a shard at a time.
         eu_imputed: The channel-corrected imputed multilateral from get_eu27_eui_imputed,
             already carrying its own recipient groups.
         group_cols: Columns identifying everything except the donor.
@@ -264,46 +368,42 @@ def build_eu27_eui_total(
     Returns:
         One frame of rows named "EU27 & EU Institutions".
     """
-    bilateral = sectors.loc[
-        sectors["donor_code"].isin(EU_COUNTRIES | EU_INSTITUTIONS)
-        & sectors["indicator_name"].astype("object").eq("Bilateral")
-    ]
+    return sum_value_columns(
+        pd.concat([bilateral, eu_imputed], ignore_index=True), group_cols, min_count=1
+    ).assign(donor_name="EU27 & EU Institutions")
 
+
+def _donor_names(sectors_bi: pd.DataFrame) -> pd.Series:
+    """donor_code to donor_name, from the CRS side."""
     return (
-        pd.concat([bilateral, eu_imputed], ignore_index=True)
-        .groupby(group_cols, dropna=False, observed=True)["value"]
-        .sum()
-        .reset_index()
-        .assign(donor_name="EU27 & EU Institutions")
+        sectors_bi[["donor_code", "donor_name"]].drop_duplicates("donor_code")
+        .set_index("donor_code")["donor_name"]
     )
 
 
-def combined_sectors() -> pd.DataFrame:
-    """Assemble the sectors view from its parts.
-
-    Returns:
-        Wide frame keyed by year, donor_name, recipient_name, indicator_name, sector_name and
-        sub_sector_name, with the partition slugs and the two share columns.
-    """
-    logger.info("Fetching bilateral data...")
-    sectors_bi = get_bilateral_by_sector()
+def _by_donor(
+    sectors_bi: pd.DataFrame,
+    sectors_multi: pd.DataFrame,
+    classified: RecipientClassificationIndex,
+) -> pd.DataFrame:
+    """Name, classify and convert the donors' rows, then add their recipient groups.
 
-    classified = get_crs_recipient_classifications(YEARS, list(CRS_RECIPIENTS))
+    Everything here is per donor, so a subset of donors gives exactly that subset's rows of
+    the full build.
 
-    logger.info("Fetching imputed multilateral data...")
-    sectors_multi = get_imputed_multi_by_sector()
-    eu_imputed = get_eu27_eui_imputed()
+    Args:
+        sectors_bi: Bilateral rows from get_bilateral_by_sector.
+        sectors_multi: Imputed multilateral rows for the same donors.
+        classified: Recipient classifications from index_recipient_classifications.
 
+    Returns:
+        Wide frame of the donors' rows, countries and recipient groups alike.
+    """
     # The imputed frame has no donor_name of its own; take it from the CRS side so both
     # halves are identified the same way.
-    donor_names = (
-        sectors_bi[["donor_code", "donor_name"]].drop_duplicates("donor_code")
-        .set_index("donor_code")["donor_name"]
-    )
     sectors_multi = sectors_multi.assign(
-        donor_name=lambda d: d["donor_code"].map(donor_names)
+        donor_name=lambda d: d["donor_code"].map(_donor_names(sectors_bi))
     )
-    eu_imputed = eu_imputed.assign(donor_name=lambda d: d["donor_code"].map(donor_names))
     unnamed = sorted(sectors_multi.loc[sectors_multi["donor_name"].isna(), "donor_code"].unique())
     if unnamed:
         logger.warning(
@@ -314,128 +414,439 @@ def combined_sectors() -> pd.DataFrame:
 
     # recipient_name comes from the shared classification table, so both halves are
     # identified the same way without either needing to carry it.
-    logger.info("Attaching recipient classifications...")
-    sectors_bi = add_recipient_classifications(sectors_bi, classified, "bilateral")
-    sectors_multi = add_recipient_classifications(
-        sectors_multi, classified, "imputed multilateral"
-    )
-    eu_imputed = add_recipient_classifications(
-        eu_imputed, classified, "EU27 & EU Institutions imputed"
-    )
+    with stage("Attaching recipient classifications", sectors_bi):
+        sectors_bi = add_recipient_classifications(sectors_bi, classified, "bilateral")
+        sectors_multi = add_recipient_classifications(
+            sectors_multi, classified, "imputed multilateral"
+        )
 
     sectors = pd.concat([sectors_bi, sectors_multi], ignore_index=True)
     sectors = sectors[sectors["value"] != 0]
 
-    # Categories before the eight-fold currency expansion: as objects these label columns cost
-    # ~8 bytes per row in pointers alone and make the pivot's MultiIndex far more expensive.
+    # Categories before the group totals: as objects these label columns cost ~8 bytes per row
+    # in pointers alone and make every groupby over them far more expensive.
     sectors = _as_categoricals(sectors)
 
-    logger.info("Adding currencies and prices...")
-    sectors = add_currencies_and_prices(sectors, base_year=SECTORS_TIME["base"])
-    sectors = sectors[sectors["value"].notna() & (sectors["value"] != 0)]
-    # Converted separately, since it is a differently corrected view of the same spending.
-    eu_imputed = _as_categoricals(
-        add_currencies_and_prices(eu_imputed, base_year=SECTORS_TIME["base"])
-    )
-    eu_imputed = eu_imputed[eu_imputed["value"].notna() & (eu_imputed["value"] != 0)]
+    with stage("Adding currencies and prices", sectors) as s:
+        sectors = s.output(
+            drop_empty_values(add_currency_price_columns(sectors, base_year=SECTORS_TIME["base"]))
+        )
 
-    logger.info("Building donor and recipient group totals...")
-    sectors = pd.concat(
-        [sectors, *build_crs_recipient_group_totals(sectors, RECIPIENT_GROUP_COLS)], ignore_index=True
-    )
-    sectors = pd.concat(
-        [
-            sectors,
-            # include_eu27_eui=False: a plain sum would double count member contributions
-            # routed through the institutions, so the bloc is built from the corrected frame.
-            *build_crs_donor_group_totals(sectors, DONOR_GROUP_COLS, include_eu27_eui=False),
-            # The corrected frame needs the same recipient groups as everything else, or the
-            # bloc would carry imputed multilateral for countries but not for regions,
-            # income groups or the overall total.
-            build_eu27_eui_total(
-                sectors,
-                pd.concat(
-                    [
-                        eu_imputed,
-                        *build_crs_recipient_group_totals(eu_imputed, RECIPIENT_GROUP_COLS),
-                    ],
-                    ignore_index=True,
-                ),
-                DONOR_GROUP_COLS,
-            ),
-        ],
-        ignore_index=True,
-    )
-    del eu_imputed
-
-    logger.info("Adding sector names...")
-    sectors = sectors.rename(columns={"sub_sector": "sub_sector_name"})
-    sectors["sector_name"] = (
-        sectors["sub_sector_name"]
-        .astype("object")
-        .map(sector_lists.get_broad_sector_groups())
-        .fillna("Unallocated/ Unspecified")
-    )
+    # Empty cells were dropped above, so a NaN cell is a row the long layout would not have
+    # had: every group total below passes min_count=1 to keep it out of the published table.
+    with stage("Building recipient group totals", sectors) as s:
+        return s.output(
+            pd.concat(
+                [
+                    sectors,
+                    build_crs_recipient_group_totals(sectors, RECIPIENT_GROUP_COLS, min_count=1),
+                ],
+                ignore_index=True,
+            )
+        )
 
-    # Codes and classifications have done their work in the group totals above, and the
-    # aggregates introduced new group names, which turns the concatenated label columns back
-    # into objects. Drop what is spent and re-apply the categories before the pivot.
+
+def _eu27_eui_imputed_by_recipient(
+    eu_imputed: pd.DataFrame,
+    donor_names: pd.Series,
+    classified: RecipientClassificationIndex,
+) -> pd.DataFrame:
+    """Classify and convert the bloc's corrected imputed multilateral, with recipient groups.
+
+    Converted separately from the main frame, since it is a differently corrected view of the
+    same spending. It needs the same recipient groups as everything else, or the bloc would
+    carry imputed multilateral for countries but not for regions, income groups or the overall
+    total.
+    """
+    with stage("Converting EU27 & EU Institutions imputed multilateral", eu_imputed) as s:
+        eu_imputed = eu_imputed.assign(donor_name=lambda d: d["donor_code"].map(donor_names))
+        eu_imputed = add_recipient_classifications(
+            eu_imputed, classified, "EU27 & EU Institutions imputed"
+        )
+        eu_imputed = drop_empty_values(
+            _as_categoricals(
+                add_currency_price_columns(eu_imputed, base_year=SECTORS_TIME["base"])
+            )
+        )
+
+        return s.output(
+            pd.concat(
+                [
+                    eu_imputed,
+                    build_crs_recipient_group_totals(
+                        eu_imputed, RECIPIENT_GROUP_COLS, min_count=1
+                    ),
+                ],
+                ignore_index=True,
+            )
+        )
+
+
+def _collapse_to_published_keys(sectors: pd.DataFrame) -> pd.DataFrame:
+    """Name the sectors, drop the spent columns and collapse to the published keys."""
+    with stage("Adding sector names", sectors):
+        sectors = sectors.rename(columns={"sub_sector": "sub_sector_name"})
+        sectors["sector_name"] = (
+            sectors["sub_sector_name"]
+            .astype("object")
+            .map(sector_lists.get_broad_sector_groups())
+            .fillna("Unallocated/ Unspecified")
+        )
+
+    # Codes and classifications have done their work in the group totals, and the aggregates
+    # introduced new group names, which turns the concatenated label columns back into
+    # objects. Drop what is spent and re-apply the categories before the collapse.
     sectors = sectors.drop(
         columns=["donor_code", "recipient_code", CRS_REGION_COL, CRS_INCOME_COL],
         errors="ignore",
     )
     sectors = _as_categoricals(sectors)
 
-    logger.info("Pivoting to wide format...")
-    index_cols = (
-        "year",
-        "donor_name",
-        "recipient_name",
-        "indicator_name",
-        "sector_name",
-        "sub_sector_name",
+    with stage("Collapsing to the published keys", sectors) as s:
+        return s.output(collapse_wide_values(df=sectors, index_cols=INDEX_COLS))
+
+
+def _with_donor_group_totals(sectors: pd.DataFrame, eu_imputed: pd.DataFrame) -> pd.DataFrame:
+    """Add the donor aggregates and the EU27 + institutions bloc to the donors' rows."""
+    with stage("Building donor group totals", sectors) as s:
+        return s.output(
+            pd.concat(
+                [
+                    sectors,
+                    # include_eu27_eui=False: a plain sum would double count member
+                    # contributions routed through the institutions, so the bloc is built from
+                    # the corrected frame.
+                    build_crs_donor_group_totals(
+                        sectors, DONOR_GROUP_COLS, include_eu27_eui=False, min_count=1
+                    ),
+                    build_eu27_eui_total(
+                        _eu27_eui_bilateral(sectors), eu_imputed, DONOR_GROUP_COLS
+                    ),
+                ],
+                ignore_index=True,
+            )
+        )
+
+
+def sectors_stages() -> list[Stage]:
+    """The in-memory build, as stages that can be checkpointed and resumed; see combined_sectors.
+
+    The bilateral rows and the recipient classifications both come from the CRS, so each build
+    gets one CrsScan they share. The bilateral request is registered up front and the
+    classifications stage runs first, so when the classification cache cannot serve every year,
+    its read is also the bilateral read. When it can, the bilateral rows are read alone.
+    The readers are looked up when they run, not bound here, so they can be swapped for fakes.
+    """
+    scan = CrsScan(YEARS)
+    _request_bilateral(scan)
+
+    return [
+        Stage("classifications", lambda: _recipient_classification_table(scan)),
+        Stage("bilateral", lambda: get_bilateral_by_sector(scan=scan)),
+        Stage("imputed", lambda: get_imputed_multi_by_sector()),
+        Stage("eu27_eui_imputed", lambda: get_eu27_eui_imputed()),
+        # Classified, converted and given recipient groups.
+        Stage(
+            "converted",
+            lambda bilateral, imputed, classifications: _by_donor(
+                bilateral, imputed, index_recipient_classifications(classifications)
+            ),
+            inputs=("bilateral", "imputed", "classifications"),
+        ),
+        Stage(
+            "eu27_eui_converted",
+            lambda eu_imputed, bilateral, classifications: _eu27_eui_imputed_by_recipient(
+                eu_imputed,
+                _donor_names(bilateral),
+                index_recipient_classifications(classifications),
+            ),
+            inputs=("eu27_eui_imputed", "bilateral", "classifications"),
+        ),
+        Stage("grouped", _with_donor_group_totals, inputs=("converted", "eu27_eui_converted")),
+        Stage("wide", _collapse_to_published_keys, inputs=("grouped",)),
+    ]
+
+
+def combined_sectors(checkpoints: StageCheckpoints | None = None) -> pd.DataFrame:
+    """Assemble the sectors view from its parts, in memory.
+
+    Args:
+        checkpoints: Checkpoints over sectors_stages() to save each stage to, or resume from.
+            Without them every stage runs and nothing is saved.
+
+    Returns:
+        Wide frame keyed by year, donor_name, recipient_name, indicator_name, sector_name and
+        sub_sector_name, with the partition slugs and the two share columns.
+    """
+    if checkpoints is None:
+        checkpoints = StageCheckpoints("sectors_view", sectors_stages(), Path(__file__))
+    sectors = checkpoints.build("wide")
+
+    with stage("Adding shares", sectors) as s:
+        sectors = s.output(add_shares(sectors, [SHARE_OF_DONOR, SHARE_OF_RECIPIENT]))
+
+    with stage("Adding slugs and converting to units", sectors) as s:
+        return s.output(convert_values_to_units(_add_partition_slugs(sectors)))
+
+
+@profiled("Reading recipient classifications")
+def _recipient_classification_table(scan: CrsScan | None = None) -> pd.DataFrame:
+    """The shared CRS classification table, for the view's recipients and years."""
+    return get_crs_recipient_classifications(YEARS, list(CRS_RECIPIENTS), scan=scan)
+
+
+def _recipient_classifications() -> RecipientClassificationIndex:
+    """The classification table indexed for add_recipient_classifications."""
+    return index_recipient_classifications(_recipient_classification_table())
+
+
+def _donor_shards(n_shards: int) -> list[list[int]]:
+    """Split the providers into n_shards lists of donor codes, dealt out in code order."""
+    donors = sorted(CRS_PROVIDERS)
+    return [shard for shard in (donors[i::n_shards] for i in range(n_shards)) if shard]
+
+
+def _add_to_running_total(
+    running: pd.DataFrame | None, partial: pd.DataFrame, group_cols: list[str]
+) -> pd.DataFrame:
+    """Fold one shard's partial sums into a running total, keeping all-NaN groups NaN."""
+    if running is None:
+        return partial
+    return sum_value_columns(
+        pd.concat([running, partial], ignore_index=True), group_cols, min_count=1
     )
-    sectors = widen_currency_price(df=sectors, index_cols=index_cols)
-
-    logger.info("Adding shares...")
-    sectors = add_share_of_reference_total(
-        sectors,
-        filter_col="recipient_name",
-        filter_val="ODA eligible countries",
-        merge_cols=["year", "donor_name"],
-        pct_col="pct_total_donor",
+
+
+def _names_and_range(sectors: pd.DataFrame) -> tuple[dict[str, set], dict[str, float]]:
+    """A part's donor and recipient names, and its largest value per column in units."""
+    names = {column: set(sectors[f"{column}_name"].dropna().unique()) for column in SLUGGED}
+    largest = {
+        col: largest_in_units(sectors[col]) for col in sectors.columns if col.startswith("value_")
+    }
+    return names, largest
+
+
+def _build_shard(
+    donors: list[int], classified: RecipientClassificationIndex, shard_dir: Path
+) -> tuple[pd.Series, dict[str, set], dict[str, float]]:
+    """Build one donor shard up to its shares, leaving its parts as Arrow IPC files.
+
+    Run in a worker process when the build has more than one job, so everything it hands back
+    is small: the frames go to disk, in shard_dir, as rows.arrow (the shard's collapsed rows,
+    with pct_total_donor) and the two partial sums the aggregates are folded from,
+    donor_totals.arrow and eu27_eui_bilateral.arrow.
+
+    Returns:
+        The shard's donor names by code, its donor and recipient names, and its largest
+        value per column in units.
+    """
+    sectors_bi = get_bilateral_by_sector(donors)
+    donor_names = _donor_names(sectors_bi)
+    sectors = _by_donor(sectors_bi, get_imputed_multi_by_sector(donors), classified)
+    del sectors_bi
+
+    write_arrow_ipc(
+        build_crs_donor_group_totals(
+            sectors, DONOR_GROUP_COLS, include_eu27_eui=False, check_all_keys=False, min_count=1
+        ),
+        shard_dir / "donor_totals.arrow",
     )
-    sectors = add_share_of_reference_total(
-        sectors,
-        filter_col="donor_name",
-        filter_val="All bilateral donors",
-        merge_cols=["year", "recipient_name"],
-        pct_col="pct_total_recipient",
+    write_arrow_ipc(
+        sum_value_columns(_eu27_eui_bilateral(sectors), DONOR_GROUP_COLS, min_count=1),
+        shard_dir / "eu27_eui_bilateral.arrow",
     )
 
-    sectors = _add_partition_slugs(sectors)
+    sectors = add_shares(_collapse_to_published_keys(sectors), [SHARE_OF_DONOR])
+    write_arrow_ipc(sectors, shard_dir / "rows.arrow")
+
+    return (donor_names, *_names_and_range(sectors))
 
-    return convert_values_to_units(sectors)
 
+def _finish_shard(
+    shard_dir: Path,
+    recipient_totals: Path,
+    slugs: dict[str, dict[str, str]],
+    int64_cols: list[str],
+) -> Path:
+    """Add a built shard's pct_total_recipient, slugs and units, as finished.arrow."""
+    sectors = read_arrow_ipc(shard_dir / "rows.arrow")
+    with stage(f"Finishing {shard_dir.name}", sectors) as s:
+        sectors = add_shares(sectors, [SHARE_OF_RECIPIENT], read_arrow_ipc(recipient_totals))
+        sectors = s.output(
+            convert_values_to_units(_add_partition_slugs(sectors, slugs), int64_cols)
+        )
+    return write_arrow_ipc(sectors, shard_dir / "finished.arrow")
+
+
+def _executor(jobs: int) -> ProcessPoolExecutor:
+    """Worker processes for the shards, started fresh rather than forked.
+
+    A forked child inherits pyarrow's thread pool mid-flight, without the threads behind it;
+    spawned workers start clean and import this module for themselves.
+    """
+    return ProcessPoolExecutor(max_workers=jobs, mp_context=mp.get_context("spawn"))
 
-def _add_partition_slugs(sectors: pd.DataFrame) -> pd.DataFrame:
-    """Add the URL-safe slug columns the CDN dataset is partitioned by."""
-    for column in ("donor", "recipient"):
-        names = sectors[f"{column}_name"].dropna().unique()
-        mapping = {name: slugify(name) for name in names}
 
-        collisions = {}
-        for name, slug in mapping.items():
-            collisions.setdefault(slug, []).append(name)
-        clashing = {slug: names_ for slug, names_ in collisions.items() if len(names_) > 1}
-        if clashing:
-            raise ValueError(
-                f"{column} slugs are not unique, which would merge distinct entities into "
-                f"one partition: {clashing}"
+def combined_sectors_sharded(n_shards: int, jobs: int = 1) -> Iterator[pd.DataFrame]:
+    """Assemble the sectors view a donor shard at a time, holding one shard in memory per job.
+
+    Every step up to the donor aggregates is per donor, so each shard of donors is read,
+    classified, converted, given its recipient groups and collapsed exactly as the in-memory
+    build would, then parked on disk. Only two things need every donor, and both are small
+    enough to keep as side tables while the shards go by: the donor aggregates and the
+    EU27 + institutions bloc, each folded into a running sum of the shards' partial sums. The
+    finished aggregates then give every shard its pct_total_recipient denominators, and the
+    largest values, in units, that decide which value columns need Int64 across the whole
+    dataset.
+
+    With more than one job, shards are built and finished in worker processes, exchanging
+    frames with this one as memory-mapped Arrow IPC files (see _build_shard); only the
+    partial sums are merged back here.
+
+    Individual donors' values and pct_total_donor match the in-memory build exactly. The
+    aggregates match up to the order their float sums are taken in: each is a sum of the
+    shards' float32 partial sums rather than one sum over every donor. pct_total_recipient is
+    divided by one of those aggregates, so where a share sits on a rounding boundary it can
+    differ from the in-memory build by one in its sixth decimal, for individual donors too.
+    The per-group missing-member warnings are not repeated per shard, since every donor
+    outside the shard would be reported as missing.
+
+    Args:
+        n_shards: Number of donor shards; peak memory is roughly one shard's share of the
+            in-memory build per job, plus the aggregates.
+        jobs: Worker processes to spread the shards over; 1 builds them in this process.
+
+    Yields:
+        Finished frames, as combined_sectors returns, with disjoint donors: the aggregate
+        donors first, then each shard.
+    """
+    classified = _recipient_classifications()
+
+    with (
+        tempfile.TemporaryDirectory(dir=PATHS.DATA, prefix="sectors_shards-") as tmp,
+        _executor(jobs) if jobs > 1 else nullcontext() as pool,
+    ):
+        run = pool.map if pool is not None else map
+
+        shards = _donor_shards(n_shards)
+        shard_dirs = [Path(tmp) / f"shard-{i}" for i in range(len(shards))]
+        for shard_dir in shard_dirs:
+            shard_dir.mkdir()
+
+        donor_totals = eu27_eui_bilateral = None
+        names = {column: set() for column in SLUGGED}
+        largest: dict[str, float] = {}
+        donor_names = []
+        with stage(f"Building {len(shards)} donor shards with {jobs} jobs"):
+            built = run(_build_shard, shards, repeat(classified), shard_dirs)
+            for shard_dir, (shard_donor_names, part_names, part_largest) in zip(
+                shard_dirs, built
+            ):
+                donor_names.append(shard_donor_names)
+                _merge_names_and_range(names, largest, part_names, part_largest)
+                donor_totals = _add_to_running_total(
+                    donor_totals,
+                    read_arrow_ipc(shard_dir / "donor_totals.arrow"),
+                    [*DONOR_GROUP_COLS, "donor_name"],
+                )
+                eu27_eui_bilateral = _add_to_running_total(
+                    eu27_eui_bilateral,
+                    read_arrow_ipc(shard_dir / "eu27_eui_bilateral.arrow"),
+                    DONOR_GROUP_COLS,
+                )
+
+        eu_imputed = _eu27_eui_imputed_by_recipient(
+            get_eu27_eui_imputed(), pd.concat(donor_names), classified
+        )
+        with stage("Building donor group totals from the shards", donor_totals) as s:
+            aggregates = pd.concat(
+                [
+                    donor_totals,
+                    build_eu27_eui_total(eu27_eui_bilateral, eu_imputed, DONOR_GROUP_COLS),
+                ],
+                ignore_index=True,
             )
+            del donor_totals, eu27_eui_bilateral, eu_imputed
+
+            aggregates = _collapse_to_published_keys(aggregates)
+            aggregates = s.output(add_shares(aggregates, [SHARE_OF_DONOR, SHARE_OF_RECIPIENT]))
+            _merge_names_and_range(names, largest, *_names_and_range(aggregates))
+
+        # Checked across every shard at once: slugs unique within each shard could still
+        # clash between two of them and merge their partitions.
+        slugs = {column: _checked_slugs(column, names[column]) for column in SLUGGED}
+        int64_cols = [col for col, value in largest.items() if value > INT32_MAX]
+
+        # Only the denominator rows are handed to the shards, not the whole aggregate frame.
+        recipient_totals = write_arrow_ipc(
+            aggregates.loc[
+                aggregates["donor_name"] == SHARE_OF_RECIPIENT[1],
+                [*SHARE_OF_RECIPIENT[2], "donor_name", "value_usd_current"],
+            ],
+            Path(tmp) / "recipient_totals.arrow",
+        )
+        yield convert_values_to_units(_add_partition_slugs(aggregates, slugs), int64_cols)
+        del aggregates
+
+        finished = run(
+            _finish_shard,
+            shard_dirs,
+            repeat(recipient_totals),
+            repeat(slugs),
+            repeat(int64_cols),
+        )
+        for path in finished:
+            yield read_arrow_ipc(path)
+            path.unlink()
+
+
+def _merge_names_and_range(
+    names: dict[str, set],
+    largest: dict[str, float],
+    part_names: dict[str, set],
+    part_largest: dict[str, float],
+) -> None:
+    """Fold one part's names and largest values, from _names_and_range, into the build's."""
+    for column, values in part_names.items():
+        names[column].update(values)
+    for col, value in part_largest.items():
+        largest[col] = max(largest.get(col, 0.0), value)
+
+
+def _checked_slugs(column: str, names) -> dict[str, str]:
+    """Map each name to its slug, refusing slugs shared by two names."""
+    mapping = {name: slugify(name) for name in names}
+
+    collisions = {}
+    for name, slug in mapping.items():
+        collisions.setdefault(slug, []).append(name)
+    clashing = {slug: names_ for slug, names_ in collisions.items() if len(names_) > 1}
+    if clashing:
+        raise ValueError(
+            f"{column} slugs are not unique, which would merge distinct entities into "
+            f"one partition: {clashing}"
+        )
+
+    return mapping
+
+
+def _add_partition_slugs(
+    sectors: pd.DataFrame, slugs: dict[str, dict[str, str]] | None = None
+) -> pd.DataFrame:
+    """Add the URL-safe slug columns the CDN dataset is partitioned by.
 
-        # Plain strings, not categories: a dictionary-typed partition key makes pyarrow hang
-        # in teardown when writing thousands of hive partitions.
+    Args:
+        sectors: Frame with donor_name and recipient_name.
+        slugs: Name to slug maps by "donor" and "recipient", already checked across a whole
+            dataset built in parts. Built from this frame when not given.
+    """
+    for column in SLUGGED:
+        if slugs is None:
+            mapping = _checked_slugs(column, sectors[f"{column}_name"].dropna().unique())
+        else:
+            mapping = slugs[column]
+
+        # Plain strings, not categories: the dataset is sorted and partitioned on the values.
         sectors[f"{column}_slug"] = (
             sectors[f"{column}_name"].astype("object").map(mapping).astype("object")
         )
@@ -443,10 +854,11 @@ def _add_partition_slugs(sectors: pd.DataFrame) -> pd.DataFrame:
     return sectors
 
 
-def _slug_map(sectors: pd.DataFrame, column: str) -> dict:
+def _slug_map(labels: pd.DataFrame, column: str) -> dict:
     """Name to slug map for the frontend to build partition paths from."""
     return (
-        sectors[[f"{column}_name", f"{column}_slug"]]
+        labels[[f"{column}_name", f"{column}_slug"]]
+        .dropna()
         .drop_duplicates()
         .set_index(f"{column}_name")[f"{column}_slug"]
         .sort_index()
@@ -454,12 +866,128 @@ def _slug_map(sectors: pd.DataFrame, column: str) -> dict:
     )
 
 
-if __name__ == "__main__":
+def rollup_tiers(
+    sectors: pd.DataFrame, reference: pd.DataFrame | None = None
+) -> dict[str, pd.DataFrame]:
+    """The coarser DATASETS, summed from a finished frame, by name.
+
+    Each is summed from the one before it, so only the first grouping goes over the full
+    frame. Values come out as Int64, since a sum can outgrow the Int32 a column was given, and
+    a group with no values stays missing. The shares are not summed, which would add up their
+    rounding: they are worked out again from the summed values, over the same totals the
+    finished frame's shares divide by.
+
+    Args:
+        sectors: Finished frame, as combined_sectors returns or a part of one. Donors must
+            not straddle parts, which holds for the parts combined_sectors_sharded yields.
+        reference: A tier summed from the part holding the aggregate donors, for parts
+            without them, whose pct_total_recipient is taken over its "All bilateral donors"
+            rows. Not needed for the part that holds them.
+    """
+    value_cols = [col for col in sectors.columns if col.startswith("value_")]
+    shares = {spec[3]: sectors[spec[3]].dtype for spec in (SHARE_OF_DONOR, SHARE_OF_RECIPIENT)}
+
+    tiers, finer = {}, sectors
+    for name, dataset in list(DATASETS.items())[1:]:
+        finer = (
+            finer.groupby(
+                [*dataset["keys"], *dataset["partition_cols"]], dropna=False, observed=True
+            )[value_cols]
+            .sum(min_count=1)
+            .reset_index()
+            # Cast rather than left to pandas, which keeps Int32 where a part's sums happen
+            # to fit, and the parts of one dataset must share a schema.
+            .astype({col: "Int64" for col in value_cols})
+        )
+        tiers[name] = finer
+
+    for name, tier in tiers.items():
+        tier = add_shares(tier, [SHARE_OF_DONOR])
+        tier = add_shares(tier, [SHARE_OF_RECIPIENT], reference)
+        tiers[name] = tier.astype(shares)
+    return tiers
+
+
+def _view_labels(sectors: pd.DataFrame) -> pd.DataFrame:
+    """The distinct labels the view options are built from, stacked column group by group.
+
+    Each group is deduplicated on its own, so the result stays small however many rows the
+    frame has, and the labels of a view written in parts can simply be concatenated.
+    """
+    groups = [
+        ["year"],
+        ["donor_name", "donor_slug"],
+        ["recipient_name", "recipient_slug"],
+        ["indicator_name"],
+        ["sector_name", "sub_sector_name"],
+    ]
+    return pd.concat(
+        [sectors[cols].astype("object").drop_duplicates() for cols in groups],
+        ignore_index=True,
+    )
+
+
+def write_view(
+    n_shards: int = 1,
+    jobs: int = 1,
+    checkpoint: bool = False,
+    resume: bool = False,
+    incremental: bool = False,
+) -> None:
+    """Build the sectors view and write its datasets, options and run report.
+
+    Args:
+        n_shards: Donor shards to build; 1 builds in memory. See combined_sectors_sharded.
+        jobs: Worker processes to build the shards in.
+        checkpoint: Save each stage of the in-memory build, for resume.
+        resume: Load the stages a failed checkpointed build finished.
+        incremental: Rewrite only the partitions whose rows changed since the last build.
+    """
+    if n_shards > 1 and (checkpoint or resume):
+        raise ValueError("Checkpoints apply to the in-memory build, not to shards")
+
+    checkpoints = StageCheckpoints(
+        "sectors_view", sectors_stages(), Path(__file__), save=checkpoint, resume=resume
+    )
+
     logger.info("Generating sectors table...")
-    df = combined_sectors()
+    parts = (
+        [combined_sectors(checkpoints)]
+        if n_shards <= 1
+        else combined_sectors_sharded(n_shards, jobs=jobs)
+    )
+
+    previous = {name: read_partition_manifest(name) for name in DATASETS}
+    hashes, labels = {name: {} for name in DATASETS}, []
+    # The first part holds the aggregate donors, whose totals later parts' rollups share by.
+    reference = None
+    for i, df in enumerate(parts):
+        with stage("Summing rollup tiers", df):
+            frames = {"sectors_view": df, **rollup_tiers(df, reference)}
+        if reference is None:
+            reference = frames["sectors_view_totals"]
+        for name, frame in frames.items():
+            with stage(f"Writing {name}", frame):
+                # The first part replaces whatever is there; later ones add their donors'
+                # partitions. Incrementally, each part rewrites only its changed partitions.
+                hashes[name] |= write_partitioned_dataset(
+                    frame,
+                    name,
+                    partition_cols=DATASETS[name]["partition_cols"],
+                    clear_existing=i == 0,
+                    previous_hashes=previous[name] if incremental else None,
+                )
+        labels.append(_view_labels(df))
+        del df, frames
+    labels = pd.concat(labels, ignore_index=True)
+    # Recorded either way, so the uploader knows what changed and the next build what is
+    # on disk.
+    for name in DATASETS:
+        partition_changes(name, hashes[name], previous[name])
 
     sub_sectors_by_sector = (
-        df[["sector_name", "sub_sector_name"]]
+        labels[["sector_name", "sub_sector_name"]]
+        .dropna()
         .drop_duplicates()
         .groupby("sector_name")["sub_sector_name"]
         .apply(lambda s: sorted(s))
@@ -467,7 +995,7 @@ if __name__ == "__main__":
     )
 
     generate_view_options(
-        df=df,
+        df=labels,
         columns={
             "donor_name": DONORS_ORDER,
             "recipient_name": CRS_RECIPIENTS_ORDER,
@@ -478,24 +1006,51 @@ if __name__ == "__main__":
         base_year=SECTORS_TIME["base"],
         file_name="sectors_view_options.json",
         extra={
-            "donor_slugs": _slug_map(df, "donor"),
-            "recipient_slugs": _slug_map(df, "recipient"),
+            "donor_slugs": _slug_map(labels, "donor"),
+            "recipient_slugs": _slug_map(labels, "recipient"),
             "sub_sectors_by_sector": sub_sectors_by_sector,
+            "datasets": DATASETS,
         },
     )
+    # Kept until the dataset is written, so a failed write resumes from the finished frame.
+    checkpoints.clear()
+    logger.info("Sectors view completed")
+    write_run_report("sectors_view")
 
-    logger.info("Writing partitioned dataset...")
-    write_partitioned_dataset(
-        df, "sectors_view", partition_cols=["donor_slug", "recipient_slug"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="Build a donor shard at a time, holding one in memory per job; 1 builds in "
+        "memory. Defaults to --jobs.",
     )
-    logger.info("Sectors view completed")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes to build the donor shards in.",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Save each stage's frame under the cache directory, for --resume.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Load the stages a failed --checkpoint run finished instead of rebuilding them.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Rewrite only the partitions whose rows changed since the last build on disk.",
+    )
+    args = parser.parse_args()
+    n_shards = args.jobs if args.shards is None else args.shards
+    if n_shards > 1 and (args.checkpoint or args.resume):
+        parser.error("--checkpoint and --resume apply to the in-memory build, not to --shards")
 
-    # pyarrow's global thread pool intermittently deadlocks in its static destructor after a
-    # large partitioned write, leaving the process hung with all the work already done:
-    #   exit -> __cxa_finalize_ranges -> arrow::internal::ThreadPool::~ThreadPool
-    #        -> Shutdown -> condition_variable::wait
-    # Nothing is buffered by this point — the dataset is on disk and logs go to stderr — so
-    # skip interpreter teardown rather than let CI hang until its timeout.
-    sys.stdout.flush()
-    sys.stderr.flush()
-    os._exit(0)
+    write_view(n_shards, args.jobs, args.checkpoint, args.resume, args.incremental)
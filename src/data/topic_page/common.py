@@ -13,7 +13,7 @@ CONSTANT_YEAR: int = 2025
 
 
 def add_change(
-    df: pd.DataFrame, grouper: list = None, as_formatted_str: bool = False
+    df: pd.DataFrame, grouper: list | None = None, as_formatted_str: bool = False
 ) -> pd.DataFrame:
     if grouper is None:
         grouper = ["donor_code", "indicator"]
@@ -1,11 +1,12 @@
 import pandas as pd
-from oda_data import CRSData, provider_groupings
+from oda_data import provider_groupings
 from oda_data.clean_data.common import convert_units
 from oda_data.indicators.research.sector_imputations import (
     imputed_multilateral_by_purpose,
 )
 from oda_data.tools import sector_lists
 
+from src.data.analysis_tools.crs_store import read_crs
 from src.data.analysis_tools.outputs import (
     set_cache_dir,
 )
@@ -30,12 +31,8 @@ def _assign_sub_sector(df: pd.DataFrame, broad: bool = False) -> pd.DataFrame:
 
 def get_bilateral_by_sector(years: list, broad: bool = False) -> pd.DataFrame:
     """Fetches and aggregates bilateral ODA disbursements by sector."""
-    raw_bilateral = CRSData(years=years).read(
-        using_bulk_download=True,
-        additional_filters=[
-            ("donor_code", "in", DONOR_IDS),
-            ("category", "in", [10, 60]),
-        ],
+    raw_bilateral = read_crs(
+        years,
         columns=[
             "year",
             "donor_code",
@@ -43,6 +40,10 @@ def get_bilateral_by_sector(years: list, broad: bool = False) -> pd.DataFrame:
             "purpose_code",
             "usd_disbursement",
         ],
+        filters=[
+            ("donor_code", "in", DONOR_IDS),
+            ("category", "in", [10, 60]),
+        ],
     )
 
     df = _assign_sub_sector(raw_bilateral, broad=broad)
@@ -0,0 +1 @@
+"""Tests for the analysis tools the view builders share."""
@@ -0,0 +1,88 @@
+"""Shared fixtures for the analysis tools tests.
+
+pydeflate downloads its rates from the OECD on first use, so the currency tests replace it with
+a stand-in that behaves the way the conversions depend on: one rate per donor and year, an
+outer merge that hands rows back in its own order with upcast keys, rounding to six decimals,
+and NaN for donor-years it has no rate for.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.analysis_tools import transformations
+
+# Donors the stand-in has rates for; anything else comes back NaN, like a gap in pydeflate.
+RATED_DONORS = [1, 2, 3, 4, 5, 12, 302, 918]
+RATED_YEARS = range(2010, 2026)
+
+
+def _rates(target_currency: str, salt: int) -> pd.DataFrame:
+    donors, years = np.meshgrid(RATED_DONORS, list(RATED_YEARS), indexing="ij")
+    donors, years = donors.ravel(), years.ravel()
+    offset = sum(map(ord, target_currency)) + salt
+    return pd.DataFrame(
+        {
+            "_donor": donors,
+            "_year": years,
+            "_rate": 0.5 + ((donors * 7 + years * 3 + offset) % 97) / 61,
+        }
+    )
+
+
+def _convert(data, target_currency, id_column, salt, divide):
+    rates = _rates(target_currency, salt)
+    merged = data.merge(
+        rates, left_on=[id_column, "year"], right_on=["_donor", "_year"],
+        how="outer", indicator=True,
+    )
+    merged = merged.loc[merged["_merge"] != "right_only"].reset_index(drop=True)
+    merged["value"] = (
+        merged["value"] / merged["_rate"] if divide else merged["value"] * merged["_rate"]
+    ).round(6)
+    return merged[list(data.columns)]
+
+
+def fake_exchange(data, *, target_currency, id_column, **_):
+    return _convert(data, target_currency, id_column, salt=0, divide=False)
+
+
+def fake_deflate(data, *, target_currency, id_column, base_year, **_):
+    return _convert(data, target_currency, id_column, salt=base_year, divide=True)
+
+
+@pytest.fixture
+def fake_pydeflate(monkeypatch):
+    """Swap pydeflate for the stand-in above, wherever transformations calls it."""
+    monkeypatch.setattr(transformations, "oecd_dac_exchange", fake_exchange)
+    monkeypatch.setattr(transformations, "oecd_dac_deflate", fake_deflate)
+
+
+@pytest.fixture
+def long_frame():
+    """A small long-form frame in USD current, with a donor pydeflate has no rates for."""
+    rng = np.random.default_rng(7)
+    n = 2_000
+    return pd.DataFrame(
+        {
+            "year": rng.integers(2013, 2025, n),
+            "donor_code": rng.choice([*RATED_DONORS, 9_999], n),
+            "recipient_code": rng.integers(1, 40, n),
+            "indicator_name": rng.choice(["Bilateral", "Imputed multilateral"], n),
+            "value": rng.gamma(0.5, 50, n),
+        }
+    )
+
+
+@pytest.fixture
+def classified_frame(long_frame):
+    """long_frame with recipient names and the CRS classifications the group builders use."""
+    regions = ["South of Sahara", "North of Sahara", "Far East Asia", "South America", "Europe"]
+    incomes = ["LDCs", "Other LICs", "LMICs", "UMICs"]
+    code = long_frame["recipient_code"]
+    return long_frame.assign(
+        donor_name=lambda d: "Donor " + d["donor_code"].astype(str),
+        recipient_name="Recipient " + code.astype(str),
+        recipient_region=code.map(lambda c: regions[c % len(regions)]),
+        incomegroup_name=code.map(lambda c: incomes[c % len(incomes)]),
+    )
@@ -0,0 +1,93 @@
+"""Tests for stage checkpointing and resuming."""
+
+import pandas as pd
+import pytest
+
+from src.data.analysis_tools import checkpoints
+from src.data.analysis_tools.checkpoints import Stage, StageCheckpoints
+
+SCRIPT = checkpoints.PATHS.SRC / "data" / "scripts" / "sectors_view.py"
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(checkpoints.PATHS, "DATA", tmp_path)
+    monkeypatch.setattr(checkpoints, "crs_bulk_fingerprint", lambda: "bulk-1")
+    return tmp_path
+
+
+def _stages(calls: list[str], fail_at: str | None = None) -> list[Stage]:
+    """a -> b -> d and c -> d, recording which stages run."""
+
+    def step(name, func):
+        def run(*frames):
+            calls.append(name)
+            if name == fail_at:
+                raise RuntimeError(f"{name} failed")
+            return func(*frames)
+
+        return Stage(name, run, inputs=tuple(inputs[name]))
+
+    inputs = {"a": [], "b": ["a"], "c": [], "d": ["b", "c"]}
+    return [
+        step("a", lambda: pd.DataFrame({"x": [1, 2, 3]})),
+        step("b", lambda a: a.assign(x=a["x"] * 10)),
+        step("c", lambda: pd.DataFrame({"x": [4]})),
+        step("d", lambda b, c: pd.concat([b, c], ignore_index=True)),
+    ]
+
+
+class TestStageCheckpoints:
+    def test_resume_runs_only_the_stages_after_the_failure(self):
+        calls = []
+        failing = StageCheckpoints("view", _stages(calls, fail_at="d"), SCRIPT, save=True)
+        with pytest.raises(RuntimeError, match="d failed"):
+            failing.build("d")
+        assert calls == ["a", "b", "c", "d"]
+
+        calls.clear()
+        resumed = StageCheckpoints("view", _stages(calls), SCRIPT, resume=True)
+        result = resumed.build("d")
+
+        assert calls == ["d"]
+        assert result["x"].tolist() == [10, 20, 30, 4]
+
+    def test_loads_only_what_the_target_needs(self, cache_dir):
+        calls = []
+        StageCheckpoints("view", _stages(calls), SCRIPT, save=True).build("d")
+        # With b saved, a is not needed: it is neither run nor missed.
+        for stage in ("a", "d"):
+            for path in (cache_dir / "checkpoints" / "view").glob(f"{stage}-*.arrow"):
+                path.unlink()
+
+        calls.clear()
+        StageCheckpoints("view", _stages(calls), SCRIPT, resume=True).build("d")
+        assert calls == ["d"]
+
+    def test_new_source_data_invalidates_every_stage(self, monkeypatch):
+        calls = []
+        StageCheckpoints("view", _stages(calls), SCRIPT, save=True).build("d")
+
+        monkeypatch.setattr(checkpoints, "crs_bulk_fingerprint", lambda: "bulk-2")
+        calls.clear()
+        StageCheckpoints("view", _stages(calls), SCRIPT, resume=True).build("d")
+        assert calls == ["a", "b", "c", "d"]
+
+    def test_saving_replaces_checkpoints_from_earlier_keys(self, cache_dir, monkeypatch):
+        StageCheckpoints("view", _stages([]), SCRIPT, save=True).build("d")
+        monkeypatch.setattr(checkpoints, "crs_bulk_fingerprint", lambda: "bulk-2")
+        StageCheckpoints("view", _stages([]), SCRIPT, save=True).build("d")
+
+        saved = sorted(p.name.split("-")[0] for p in (cache_dir / "checkpoints" / "view").iterdir())
+        assert saved == ["a", "b", "c", "d"]
+
+    def test_clear_removes_the_views_checkpoints(self, cache_dir):
+        saving = StageCheckpoints("view", _stages([]), SCRIPT, save=True)
+        saving.build("d")
+        saving.clear()
+        assert not (cache_dir / "checkpoints" / "view").exists()
+
+    def test_stages_must_follow_their_inputs(self):
+        stages = _stages([])
+        with pytest.raises(ValueError, match="later or unknown stages"):
+            StageCheckpoints("view", stages[::-1], SCRIPT)
@@ -0,0 +1,97 @@
+"""Tests for the shared CRS scan."""
+
+import pandas as pd
+import pytest
+
+from src.data.analysis_tools import crs_scan
+from src.data.analysis_tools.crs_scan import CrsScan
+
+CRS = pd.DataFrame(
+    {
+        "year": [2020, 2020, 2021, 2021, 2022, 2022],
+        "donor_code": [1, 2, 1, 3, 2, 3],
+        "recipient_code": [10, 11, 12, 10, 11, 12],
+        "category": [10, 10, 10, 60, 10, 10],
+        "recipient_name": ["A", "B", "C", "A", "B", "C"],
+        "usd_disbursement": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+    }
+)
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Replace the bulk read with one over CRS, recording the columns and filters asked for."""
+    calls = []
+
+    def read_crs(years, columns, filters):
+        calls.append((columns, filters))
+        keep = CRS["year"].isin(years)
+        for column, _, values in filters:
+            keep &= CRS[column].isin(values)
+        return CRS.loc[keep, [c for c in columns if c in CRS.columns]].reset_index(drop=True)
+
+    monkeypatch.setattr(crs_scan, "_read_crs", read_crs)
+    return calls
+
+
+def _scan() -> CrsScan:
+    scan = CrsScan(range(2020, 2023))
+    scan.request(
+        "bilateral",
+        ["year", "donor_code", "recipient_code", "usd_disbursement"],
+        [("donor_code", "in", [1, 2]), ("recipient_code", "in", [10, 11])],
+    )
+    scan.request(
+        "classifications",
+        ["year", "recipient_code", "recipient_name"],
+        [("recipient_code", "in", [11, 12])],
+    )
+    return scan
+
+
+class TestCrsScan:
+    def test_reads_once_pushing_down_only_the_filters_every_request_shares(self, reads):
+        scan = _scan()
+        scan.read("classifications")
+        scan.read("bilateral")
+
+        assert len(reads) == 1
+        columns, filters = reads[0]
+        assert set(columns) == {
+            "year", "donor_code", "recipient_code", "usd_disbursement", "recipient_name"
+        }
+        assert filters == [("recipient_code", "in", [10, 11, 12])]
+
+    def test_each_request_gets_only_its_own_rows_and_columns(self, reads):
+        scan = _scan()
+        bilateral = scan.read("bilateral")
+        classifications = scan.read("classifications")
+
+        assert list(bilateral.columns) == [
+            "year", "donor_code", "recipient_code", "usd_disbursement"
+        ]
+        assert bilateral["usd_disbursement"].tolist() == [1.0, 2.0, 5.0]
+        assert list(classifications.columns) == ["year", "recipient_code", "recipient_name"]
+        assert classifications["recipient_code"].tolist() == [11, 12, 11, 12]
+
+    def test_a_request_after_the_shared_read_is_read_on_its_own(self, reads):
+        scan = _scan()
+        scan.read("bilateral")
+        scan.request("late", ["year", "category"], [("category", "in", [60])])
+
+        assert scan.read("late")["category"].tolist() == [60]
+        assert reads[-1] == (["year", "category"], [("category", "in", [60])])
+        assert len(reads) == 2
+
+    def test_a_discarded_request_is_left_out_of_the_read(self, reads):
+        scan = _scan()
+        scan.discard("classifications")
+        scan.read("bilateral")
+
+        columns, filters = reads[0]
+        assert "recipient_name" not in columns
+        assert [column for column, _, _ in filters] == ["donor_code", "recipient_code"]
+
+    def test_only_in_filters_can_be_requested(self):
+        with pytest.raises(ValueError, match="Only 'in' filters"):
+            CrsScan(2020).request("x", ["year"], [("year", ">=", 2020)])
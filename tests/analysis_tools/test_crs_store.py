@@ -0,0 +1,126 @@
+"""Tests for the compacted CRS store."""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.data.analysis_tools import crs_store
+
+
+@pytest.fixture
+def bulk(monkeypatch, tmp_path):
+    """A small bulk file, shuffled as the real one is, with the store under tmp_path."""
+    rng = np.random.default_rng(3)
+    n = 2_000
+    df = pd.DataFrame(
+        {
+            "year": rng.choice([2019, 2020, 2021], n).astype("int16"),
+            "donor_code": rng.choice([1, 2, 3, 918], n).astype("int32"),
+            "donor_name": "Donor",
+            "recipient_code": rng.choice(range(100, 140), n).astype("int32"),
+            "purpose_code": rng.choice([11110, 12220, 72010], n).astype("int32"),
+            "category": rng.choice([10, 60], n).astype("int16"),
+            "bi_multi": pd.array(rng.choice([1, 2, 3, 4], n), dtype="Int8"),
+            "usd_disbursement": rng.gamma(1, 5, n),
+            "project_title": "Not kept",
+        }
+    )
+    df.loc[::50, "bi_multi"] = pd.NA
+    path = tmp_path / "CRSData_bulk.parquet"
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, row_group_size=500)
+
+    state = {"fingerprint": "bulka"}
+    monkeypatch.setattr(crs_store, "STORE_DIR", tmp_path / "crs_store")
+    monkeypatch.setattr(crs_store, "crs_bulk_path", lambda: path)
+    monkeypatch.setattr(crs_store, "crs_bulk_fingerprint", lambda: state["fingerprint"])
+    return df, state
+
+
+def _expected(df, years, columns, filters):
+    """What CRSData.read returns: core contributions dropped, then the filters applied."""
+    keep = df["year"].isin(years) & df["bi_multi"].ne(2).fillna(True)
+    for column, _, values in filters:
+        keep &= df[column].isin(values)
+    return df.loc[keep, columns]
+
+
+def _sorted(df):
+    return df.sort_values(list(df.columns), ignore_index=True)
+
+
+class TestCrsStore:
+    def test_reads_match_the_bulk_file(self, bulk):
+        df, _ = bulk
+        crs_store.compact_crs()
+
+        columns = ["year", "donor_code", "recipient_code", "usd_disbursement"]
+        filters = [("donor_code", "in", [1, 918]), ("category", "in", [10])]
+        result = crs_store.read_crs([2020, 2021], columns, filters)
+
+        expected = _expected(df, [2020, 2021], columns, filters)
+        pd.testing.assert_frame_equal(_sorted(result), _sorted(expected))
+
+    def test_is_partitioned_by_year_and_donor_and_prunes_columns(self, bulk):
+        _, state = bulk
+        store = crs_store.compact_crs()
+
+        assert store == crs_store.STORE_DIR / state["fingerprint"]
+        assert (store / "year=2020" / "donor_code=918" / "part-0.parquet").exists()
+        partition = pq.read_table(store / "year=2020" / "donor_code=918" / "part-0.parquet")
+        assert "project_title" not in partition.column_names
+        assert "year" not in partition.column_names
+        recipients = partition["recipient_code"].to_pylist()
+        assert recipients == sorted(recipients)
+
+    def test_keeps_rows_without_a_donor(self, bulk):
+        df, _ = bulk
+        df["donor_code"] = df["donor_code"].astype("Int32")
+        df.loc[::40, "donor_code"] = pd.NA
+        pq.write_table(
+            pa.Table.from_pandas(df, preserve_index=False),
+            crs_store.crs_bulk_path(),
+            row_group_size=500,
+        )
+        crs_store.compact_crs()
+
+        columns = ["year", "donor_code", "recipient_code", "usd_disbursement"]
+        filters = [("recipient_code", "in", [100, 101, 102])]
+        result = crs_store.read_crs([2019, 2020], columns, filters)
+
+        expected = _expected(df, [2019, 2020], columns, filters)
+        assert result["donor_code"].isna().any()
+        pd.testing.assert_frame_equal(_sorted(result), _sorted(expected), check_dtype=False)
+
+    def test_falls_back_to_crsdata_without_a_store(self, bulk, monkeypatch):
+        import oda_data
+
+        reads = []
+
+        class FakeCRSData:
+            def __init__(self, years):
+                self.years = years
+
+            def read(self, using_bulk_download, additional_filters, columns):
+                reads.append((self.years, additional_filters, columns))
+                return pd.DataFrame(columns=columns)
+
+        monkeypatch.setattr(oda_data, "CRSData", FakeCRSData)
+        crs_store.read_crs([2020], ["year"], [("donor_code", "in", [1])])
+        crs_store.compact_crs()
+        crs_store.read_crs([2020], ["project_title"])
+
+        assert reads == [
+            ([2020], [("donor_code", "in", [1])], ["year"]),
+            ([2020], None, ["project_title"]),
+        ]
+
+    def test_a_new_bulk_file_replaces_the_old_store(self, bulk):
+        _, state = bulk
+        old = crs_store.compact_crs()
+        state["fingerprint"] = "bulkb"
+        new = crs_store.compact_crs()
+
+        assert not old.exists()
+        assert [p.name for p in crs_store.STORE_DIR.iterdir()] == [new.name]
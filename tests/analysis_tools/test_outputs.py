@@ -0,0 +1,380 @@
+"""Tests for what the pipeline writes and caches."""
+
+import io
+import json
+from datetime import UTC, datetime, timedelta
+from importlib.metadata import version
+from types import SimpleNamespace
+
+import oda_data
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+
+from src.data.analysis_tools import outputs
+
+
+class TestCrsBulkFingerprint:
+    @pytest.fixture
+    def bulk_dir(self, monkeypatch, tmp_path):
+        bulk_cache = SimpleNamespace(
+            base_dir=tmp_path, manifest_path=tmp_path / "manifest.json", ttl_seconds=86_400
+        )
+        monkeypatch.setattr(
+            oda_data, "CRSData", lambda: SimpleNamespace(bulk_cache=bulk_cache)
+        )
+        return tmp_path
+
+    @staticmethod
+    def _download(bulk_dir, age=timedelta(0), package_version=None, content=b"crs"):
+        (bulk_dir / "CRSData_bulk.parquet").write_bytes(content)
+        record = {
+            "filename": "CRSData_bulk.parquet",
+            "downloaded_at": (datetime.now(UTC) - age).isoformat(),
+            "version": package_version or version("oda_data"),
+        }
+        (bulk_dir / "manifest.json").write_text(json.dumps({"CRSData_bulk": record}))
+
+    def test_none_before_anything_is_downloaded(self, bulk_dir):
+        assert outputs.crs_bulk_fingerprint() is None
+
+    def test_stable_until_the_file_is_downloaded_again(self, bulk_dir):
+        self._download(bulk_dir)
+        first = outputs.crs_bulk_fingerprint()
+        assert first is not None
+        assert outputs.crs_bulk_fingerprint() == first
+
+        self._download(bulk_dir, content=b"refreshed crs")
+        assert outputs.crs_bulk_fingerprint() not in (None, first)
+
+    @pytest.mark.parametrize(
+        "download", [{"age": timedelta(days=2)}, {"package_version": "0.0.1"}]
+    )
+    def test_none_for_a_file_oda_data_would_download_again(self, bulk_dir, download):
+        self._download(bulk_dir, **download)
+        assert outputs.crs_bulk_fingerprint() is None
+
+
+class TestDerivedTableCache:
+    def test_round_trips_the_table_and_its_coverage(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(outputs, "DERIVED_CACHE_DIR", tmp_path)
+        df = pd.DataFrame({"year": [2020, 2021], "name": pd.Categorical(["a", "b"])})
+
+        outputs.write_derived_table(df, "table", "abc", {"years": [2020, 2021]})
+        table, coverage = outputs.read_derived_table("table", "abc")
+
+        pd.testing.assert_frame_equal(table, df)
+        assert coverage == {"years": [2020, 2021]}
+        assert outputs.read_derived_table("table", "other") is None
+
+
+class TestDataframeToArrowTable:
+    @staticmethod
+    def _frame():
+        return pd.DataFrame(
+            {
+                "year": pd.array([2020, 2021, None], dtype="Int64"),
+                "donor_name": pd.Categorical(["b", "a", "b"]),
+                "recipient_name": ["Kenya", None, "Chad"],
+                "donor_slug": ["b", "a", "b"],
+                "value_usd_current": [1, 2, 3],
+                "pct_of_total_oda": [0.5, float("nan"), 0.25],
+            }
+        )
+
+    def test_converts_to_the_table_of_the_narrowed_frame(self):
+        df = self._frame()
+        expected = pa.Table.from_pandas(
+            outputs.optimize_dataframe_types(df), preserve_index=False
+        )
+
+        table, value_cols = outputs.dataframe_to_arrow_table(df)
+
+        assert table.equals(expected, check_metadata=True)
+        assert value_cols == ["value_usd_current", "pct_of_total_oda"]
+        assert table.to_pandas().dtypes.equals(outputs.optimize_dataframe_types(df).dtypes)
+
+    def test_converts_a_slice_of_a_frame(self):
+        df = self._frame().iloc[1:]
+        expected = pa.Table.from_pandas(
+            outputs.optimize_dataframe_types(df), preserve_index=False
+        )
+
+        table, _ = outputs.dataframe_to_arrow_table(df)
+
+        assert table.equals(expected, check_metadata=True)
+
+    def test_shares_the_buffers_of_columns_already_of_their_type(self):
+        df = self._frame()
+        table, _ = outputs.dataframe_to_arrow_table(df)
+
+        values = table["value_usd_current"].chunk(0).buffers()[1]
+        assert values.address == df["value_usd_current"].to_numpy().ctypes.data
+
+
+class TestWriteParquet:
+    @pytest.fixture(autouse=True)
+    def small_row_groups(self, monkeypatch):
+        options = outputs.get_parquet_write_options()
+        monkeypatch.setattr(
+            outputs, "get_parquet_write_options", lambda: {**options, "row_group_size": 4}
+        )
+
+    @staticmethod
+    def _frame(n=10):
+        # Later rows name recipients the first row group does not, so its categories alone
+        # would not cover the column.
+        return pd.DataFrame(
+            {
+                "year": range(2010, 2010 + n),
+                "donor_name": "Donor",
+                "recipient_name": [f"Recipient {i // 3}" for i in range(n)],
+                "value_usd_current": range(n),
+                "pct_of_total_oda": [i / n for i in range(n)],
+            }
+        )
+
+    @staticmethod
+    def _whole_table(df):
+        """The file as written from one Arrow table converted from the whole frame."""
+        table, value_cols = outputs.dataframe_to_arrow_table(df)
+        buf = pa.BufferOutputStream()
+        pq.write_table(
+            table,
+            buf,
+            use_byte_stream_split={c: True for c in value_cols},
+            **outputs.get_parquet_write_options(),
+        )
+        return buf.getvalue().to_pybytes()
+
+    def test_writes_the_file_a_whole_table_write_would(self):
+        df = self._frame()
+        sink = io.BytesIO()
+        outputs.write_parquet(df, sink)
+
+        assert pq.ParquetFile(io.BytesIO(sink.getvalue())).metadata.num_row_groups == 3
+        assert sink.getvalue() == self._whole_table(df)
+
+    def test_an_empty_frame_still_carries_the_schema(self):
+        df = self._frame(0)
+        sink = io.BytesIO()
+        outputs.write_parquet(df, sink)
+
+        assert sink.getvalue() == self._whole_table(df)
+
+
+class TestPartitionedDataset:
+    @pytest.fixture(autouse=True)
+    def cdn_dir(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(outputs.PATHS, "CDN_FILES", tmp_path)
+        return tmp_path
+
+    @staticmethod
+    def _frame(n=60):
+        return pd.DataFrame(
+            {
+                "year": [2000 + i % 7 for i in range(n)],
+                "donor_slug": [f"d{i % 3}" for i in range(n)],
+                "recipient_slug": [f"r{i % 4}" for i in range(n)],
+                "indicator_name": pd.Categorical([f"i{i % 2}" for i in range(n)]),
+                "value_usd_current": range(n),
+            }
+        )
+
+    @staticmethod
+    def _files(directory):
+        return {
+            str(p.relative_to(directory)): p.read_bytes() for p in directory.rglob("*.parquet")
+        }
+
+    def test_writes_each_partition_sorted_to_one_file(self, cdn_dir):
+        df = self._frame()
+        outputs.write_partitioned_dataset(df, "view", ["donor_slug", "recipient_slug"], jobs=3)
+
+        files = self._files(cdn_dir / "view")
+        assert len(files) == 12
+        written = pd.read_parquet(
+            cdn_dir / "view" / "donor_slug=d1" / "recipient_slug=r2" / "part-0.parquet"
+        )
+        expected = df[df["donor_slug"].eq("d1") & df["recipient_slug"].eq("r2")]
+        assert written["value_usd_current"].tolist() == expected["value_usd_current"].tolist()
+        assert "donor_slug" not in written.columns
+
+    def test_threads_write_the_same_files_as_one(self, cdn_dir):
+        df = self._frame()
+        outputs.write_partitioned_dataset(df, "one", ["donor_slug", "recipient_slug"], jobs=1)
+        outputs.write_partitioned_dataset(df, "many", ["donor_slug", "recipient_slug"], jobs=4)
+
+        assert self._files(cdn_dir / "one") == self._files(cdn_dir / "many")
+
+    def test_a_rewritten_partition_keeps_nothing_it_held(self, cdn_dir):
+        df = self._frame()
+        stale = cdn_dir / "view" / "donor_slug=d0" / "recipient_slug=r0" / "part-1.parquet"
+        stale.parent.mkdir(parents=True)
+        stale.write_bytes(b"stale")
+
+        outputs.write_partitioned_dataset(
+            df, "view", ["donor_slug", "recipient_slug"], clear_existing=False
+        )
+
+        assert not stale.exists()
+        assert stale.with_name("part-0.parquet").exists()
+
+
+    @staticmethod
+    def _layout(directory):
+        """Every file's path, with the rows in each of its row groups."""
+        return {
+            str(p.relative_to(directory)): [
+                meta.row_group(i).num_rows for i in range(meta.num_row_groups)
+            ]
+            for p in directory.rglob("*.parquet")
+            for meta in [pq.ParquetFile(p).metadata]
+        }
+
+    def test_lays_files_out_as_the_dataset_writer_did(self, cdn_dir, monkeypatch):
+        # Small limits, so partitions span several files and row groups, and a null and a
+        # value that needs escaping in the path.
+        monkeypatch.setattr(outputs, "_MAX_ROWS_PER_FILE", 6)
+        options = outputs.get_parquet_write_options()
+        monkeypatch.setattr(
+            outputs, "get_parquet_write_options", lambda: {**options, "row_group_size": 4}
+        )
+        df = self._frame(120)
+        df.loc[df.index[::5], "donor_slug"] = None
+        df.loc[df.index[::9], "recipient_slug"] = "r 9/x"
+        partition_cols = ["donor_slug", "recipient_slug"]
+
+        outputs.write_partitioned_dataset(df, "view", partition_cols)
+
+        table, _ = outputs.dataframe_to_arrow_table(df)
+        ds.write_dataset(
+            data=table,
+            base_dir=str(cdn_dir / "baseline"),
+            format="parquet",
+            partitioning=ds.partitioning(
+                pa.schema([table.schema.field(col) for col in partition_cols]), flavor="hive"
+            ),
+            basename_template="part-{i}.parquet",
+            max_rows_per_file=6,
+            max_rows_per_group=4,
+            min_rows_per_group=4,
+        )
+
+        layout = self._layout(cdn_dir / "view")
+        assert layout == self._layout(cdn_dir / "baseline")
+        assert any(path.startswith("donor_slug=__HIVE_DEFAULT_PARTITION__/") for path in layout)
+        assert any("/recipient_slug=r%209%2Fx/" in path for path in layout)
+        assert any(path.endswith("part-1.parquet") for path in layout)
+        hashes = outputs.write_partitioned_dataset(df, "again", partition_cols)
+        assert set(hashes) == {path.rsplit("/", 1)[0] for path in layout}
+
+    def test_indexes_what_each_partition_holds(self, cdn_dir):
+        df = self._frame()
+        outputs.write_partitioned_dataset(df, "view", ["donor_slug", "recipient_slug"])
+
+        index = outputs.read_partition_index("view")
+        assert len(index) == 12
+        path = "donor_slug=d1/recipient_slug=r2"
+        rows = df[df["donor_slug"].eq("d1") & df["recipient_slug"].eq("r2")]
+        assert index[path] == {
+            "rows": len(rows),
+            "years": [rows["year"].min(), rows["year"].max()],
+            "indicator_name": sorted(rows["indicator_name"].unique()),
+            "bytes": (cdn_dir / "view" / path / "part-0.parquet").stat().st_size,
+        }
+        stored = json.loads((cdn_dir / "view" / outputs.INDEX_FILE).read_text())
+        assert stored["labels"] == {"indicator_name": ["i0", "i1"]}
+        assert stored["partitions"][path]["indicator_name"] == [0]
+
+    def test_indexes_labels_in_value_order_whatever_the_categories_order(self):
+        df = self._frame()
+        df["indicator_name"] = pd.Categorical(
+            [f"i{i // 12 % 3}" for i in range(len(df))], categories=["i2", "i0", "i1"]
+        )
+        outputs.write_partitioned_dataset(df, "view", ["donor_slug", "recipient_slug"])
+
+        for path, summary in outputs.read_partition_index("view").items():
+            donor, recipient = (segment.split("=")[1] for segment in path.split("/"))
+            rows = df[df["donor_slug"].eq(donor) & df["recipient_slug"].eq(recipient)]
+            assert summary["indicator_name"] == sorted(rows["indicator_name"].unique())
+
+    def test_a_dataset_written_in_parts_is_indexed_whole(self):
+        df = self._frame()
+        first, second = df[df["donor_slug"] == "d0"], df[df["donor_slug"] != "d0"]
+        outputs.write_partitioned_dataset(first, "view", ["donor_slug", "recipient_slug"])
+        outputs.write_partitioned_dataset(
+            second, "view", ["donor_slug", "recipient_slug"], clear_existing=False
+        )
+
+        assert len(outputs.read_partition_index("view")) == 12
+
+
+class TestIncrementalPartitionedDataset:
+    @pytest.fixture(autouse=True)
+    def cdn_dir(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(outputs.PATHS, "CDN_FILES", tmp_path)
+        return tmp_path
+
+    @staticmethod
+    def _frame(**values):
+        rows = [("a", "x"), ("a", "y"), ("b", "x")]
+        return pd.DataFrame(
+            {
+                "year": [2020] * len(rows),
+                "donor_slug": [d for d, _ in rows],
+                "recipient_slug": [r for _, r in rows],
+                "value_usd_current": [values.get(f"{d}/{r}", 1) for d, r in rows],
+            }
+        )
+
+    def _build(self, df, incremental=True):
+        previous = outputs.read_partition_manifest("view")
+        hashes = outputs.write_partitioned_dataset(
+            df, "view", ["donor_slug", "recipient_slug"],
+            previous_hashes=previous if incremental else None,
+        )
+        return outputs.partition_changes("view", hashes, previous)
+
+    def test_first_build_has_nothing_to_compare_against(self):
+        changes = self._build(self._frame())
+        assert not changes["complete"]
+        assert len(changes["added"]) == 3
+
+    def test_rewrites_only_changed_partitions(self, cdn_dir):
+        self._build(self._frame())
+        files = {p.relative_to(cdn_dir): p.stat().st_mtime_ns
+                 for p in (cdn_dir / "view").rglob("*.parquet")}
+
+        df = self._frame(**{"a/y": 2})
+        df = pd.concat(
+            [df[df["donor_slug"] != "b"], df.iloc[[0]].assign(donor_slug="c")],
+            ignore_index=True,
+        )
+        changes = self._build(df)
+
+        assert changes == {
+            "complete": True,
+            "added": ["donor_slug=c/recipient_slug=x"],
+            "changed": ["donor_slug=a/recipient_slug=y"],
+            "removed": ["donor_slug=b/recipient_slug=x"],
+        }
+        unchanged = cdn_dir / "view" / "donor_slug=a" / "recipient_slug=x" / "part-0.parquet"
+        assert unchanged.stat().st_mtime_ns == files[unchanged.relative_to(cdn_dir)]
+        assert not (cdn_dir / "view" / "donor_slug=b").exists()
+        written = pd.read_parquet(cdn_dir / "view" / "donor_slug=a" / "recipient_slug=y")
+        assert written["value_usd_current"].tolist() == [2]
+        assert set(outputs.read_partition_index("view")) == {
+            "donor_slug=a/recipient_slug=x",
+            "donor_slug=a/recipient_slug=y",
+            "donor_slug=c/recipient_slug=x",
+        }
+
+    def test_a_full_rebuild_still_lists_the_changes(self):
+        self._build(self._frame())
+        changes = self._build(self._frame(**{"b/x": 5}), incremental=False)
+        assert changes["complete"]
+        assert changes["changed"] == ["donor_slug=b/recipient_slug=x"]
+        assert changes["added"] == changes["removed"] == []
@@ -0,0 +1,78 @@
+"""Tests for the stage records and the run report built from them."""
+
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from src.data.analysis_tools import profiling
+
+
+@pytest.fixture(autouse=True)
+def fresh_records(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "_local", threading.local())
+    monkeypatch.setattr(profiling.PATHS, "TOOLS", tmp_path)
+    return tmp_path
+
+
+class TestStage:
+    def test_records_frames_in_and_out(self):
+        df = pd.DataFrame({"value": range(10)})
+        with profiling.stage("Halving", df) as s:
+            s.output(df.iloc[:5])
+
+        (record,) = profiling._records()
+        assert (record.name, record.depth) == ("Halving", 0)
+        assert (record.rows_in, record.rows_out) == (10, 5)
+        assert record.frame_in_mib is not None and record.wall_s >= 0 and record.cpu_s >= 0
+
+    def test_nested_stages_are_indented_and_left_out_of_the_totals(self, fresh_records):
+        with profiling.stage("Outer"), profiling.stage("Inner"):
+            pass
+
+        assert [r.depth for r in profiling._records()] == [0, 1]
+        outer = profiling._records()[0]
+        profiling.write_run_report("test_view")
+
+        report = json.loads((fresh_records / "test_view_run_report.json").read_text())
+        assert [s["name"] for s in report["stages"]] == ["Outer", "Inner"]
+        assert report["wall_s"] == outer.wall_s
+        assert profiling._records() == []
+
+    def test_records_a_stage_that_raises(self):
+        with pytest.raises(ValueError), profiling.stage("Failing"):
+            raise ValueError("boom")
+
+        assert profiling._records()[0].name == "Failing"
+        assert profiling._local.depth == 0
+
+    def test_each_thread_keeps_its_own_records(self):
+        def build(name):
+            with profiling.stage(name), profiling.stage(f"{name} inner"):
+                pass
+            seen[name] = [(r.name, r.depth) for r in profiling._records()]
+
+        seen = {}
+        with profiling.stage("Main"):
+            threads = [threading.Thread(target=build, args=(n,)) for n in ("a", "b")]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert seen == {"a": [("a", 0), ("a inner", 1)], "b": [("b", 0), ("b inner", 1)]}
+        assert [r.name for r in profiling._records()] == ["Main"]
+
+
+class TestProfiled:
+    def test_takes_the_first_frame_argument_and_the_result(self):
+        @profiling.profiled("Doubling")
+        def double(label, df):
+            return pd.concat([df, df])
+
+        result = double("x", pd.DataFrame({"value": [1, 2, 3]}))
+
+        assert len(result) == 6
+        record = profiling._records()[0]
+        assert (record.name, record.rows_in, record.rows_out) == ("Doubling", 3, 6)
@@ -0,0 +1,88 @@
+"""Tests for the inputs views share when built in one process."""
+
+import threading
+import time
+
+import pandas as pd
+
+from src.data.analysis_tools import shared_inputs, transformations
+from src.data.analysis_tools.shared_inputs import shared, sharing
+from tests.analysis_tools.conftest import fake_deflate, fake_exchange
+
+
+def _counting(calls: list):
+    @shared
+    def fetch(years, label="x"):
+        calls.append((list(years), label))
+        time.sleep(0.05)
+        return pd.DataFrame({"year": list(years)})
+
+    return fetch
+
+
+class TestShared:
+    def test_fetches_every_time_without_sharing(self):
+        calls = []
+        fetch = _counting(calls)
+        fetch(range(2020, 2022))
+        fetch(range(2020, 2022))
+
+        assert len(calls) == 2
+
+    def test_fetches_once_per_arguments_and_hands_out_copies(self):
+        calls = []
+        fetch = _counting(calls)
+        with sharing():
+            first = fetch(range(2020, 2022))
+            first["year"] = 0
+            second = fetch([2020, 2021])
+            fetch(range(2020, 2022), label="y")
+
+        assert calls == [([2020, 2021], "x"), ([2020, 2021], "y")]
+        assert second["year"].tolist() == [2020, 2021]
+
+    def test_concurrent_callers_wait_for_the_first_fetch(self):
+        calls = []
+        fetch = _counting(calls)
+        with sharing():
+            threads = [threading.Thread(target=fetch, args=([2020],)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert len(calls) == 1
+
+    def test_nothing_is_kept_once_sharing_ends(self):
+        calls = []
+        fetch = _counting(calls)
+        with sharing():
+            fetch([2020])
+        fetch([2020])
+
+        assert len(calls) == 2 and shared_inputs._values is None
+
+
+class TestSharedConversionFactors:
+    def test_asks_pydeflate_only_about_new_keys(self, monkeypatch):
+        asked = []
+
+        def exchange(data, **kwargs):
+            asked.append(len(data))
+            return fake_exchange(data, **kwargs)
+
+        monkeypatch.setattr(transformations, "oecd_dac_exchange", exchange)
+        monkeypatch.setattr(transformations, "oecd_dac_deflate", fake_deflate)
+        first = pd.DataFrame({"donor_code": [1, 2], "year": [2020, 2020]})
+        second = pd.DataFrame({"donor_code": [2, 3], "year": [2020, 2020]})
+
+        expected = transformations.get_conversion_factors(second)
+        asked.clear()
+        with sharing():
+            transformations.get_conversion_factors(first)
+            result = transformations.get_conversion_factors(second)
+
+        # One call per current-price pair for each frame, the second about donor 3 alone.
+        pairs = len(asked) // 2
+        assert set(asked[:pairs]) == {2} and set(asked[pairs:]) == {1}
+        pd.testing.assert_frame_equal(result, expected)
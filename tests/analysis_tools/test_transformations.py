@@ -0,0 +1,778 @@
+"""Tests for the transformations the views share."""
+
+import tracemalloc
+from typing import ClassVar
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.analysis_tools import transformations
+from src.data.analysis_tools.shared_inputs import sharing
+from src.data.analysis_tools.transformations import (
+    CURRENCY_PRICE_PAIRS,
+    add_currencies_and_prices,
+    add_currency_price_columns,
+    add_recipient_classifications,
+    add_share_of_group_total,
+    add_shares,
+    build_crs_donor_group_totals,
+    build_crs_recipient_group_totals,
+    collapse_wide_values,
+    convert_values_to_units,
+    drop_empty_values,
+    get_attribute_total,
+    get_conversion_factors,
+    get_group_total,
+    get_group_totals,
+    index_recipient_classifications,
+    modal_values,
+    sum_value_columns,
+    widen_currency_price,
+    widen_currency_price_scatter,
+)
+
+KEY = ["year", "donor_code", "recipient_code", "indicator_name", "currency", "price"]
+
+
+def _convert_every_row(df: pd.DataFrame, base_year: int) -> pd.DataFrame:
+    """The conversion as it used to be done: the whole frame through pydeflate, per pair."""
+    blocks = []
+    for currency, price in CURRENCY_PRICE_PAIRS:
+        if (currency, price) == ("USD", "current"):
+            converted = df.copy()
+        elif price == "current":
+            converted = transformations.oecd_dac_exchange(
+                data=df.copy(), source_currency="USA", target_currency=currency,
+                id_column="donor_code", use_source_codes=True,
+            )
+        else:
+            converted = transformations.oecd_dac_deflate(
+                data=df.copy(), base_year=base_year, source_currency="USA",
+                target_currency=currency, id_column="donor_code", use_source_codes=True,
+            )
+        blocks.append(converted.assign(currency=currency, price=price))
+    return pd.concat(blocks, ignore_index=True)
+
+
+class TestAddCurrenciesAndPrices:
+    def test_matches_converting_every_row(self, fake_pydeflate, long_frame):
+        expected = _convert_every_row(long_frame, 2024).sort_values(KEY, ignore_index=True)
+        result = add_currencies_and_prices(long_frame, base_year=2024).sort_values(
+            KEY, ignore_index=True
+        )
+
+        assert len(result) == len(long_frame) * len(CURRENCY_PRICE_PAIRS)
+        pd.testing.assert_series_equal(
+            result["value"], expected["value"], check_exact=False, rtol=1e-12
+        )
+
+    def test_unrated_donor_years_are_nan(self, fake_pydeflate, long_frame):
+        result = add_currencies_and_prices(long_frame, base_year=2024)
+        unrated = result["donor_code"].eq(9_999)
+        usd_current = result["currency"].eq("USD") & result["price"].eq("current")
+
+        assert result.loc[unrated & ~usd_current, "value"].isna().all()
+        assert result.loc[~unrated, "value"].notna().all()
+
+    def test_keeps_the_input_dtypes(self, fake_pydeflate, long_frame):
+        result = add_currencies_and_prices(long_frame, base_year=2024)
+        assert result["recipient_code"].dtype == long_frame["recipient_code"].dtype
+
+
+class TestGetConversionFactors:
+    def test_one_row_per_key_and_a_column_per_pair(self, fake_pydeflate):
+        keys = pd.DataFrame({"donor_code": [302, 4, 9_999], "year": [2020, 2021, 2022]})
+        factors = get_conversion_factors(keys, base_year=2024)
+
+        assert factors[["donor_code", "year"]].equals(keys)
+        assert factors.shape[1] == 2 + len(CURRENCY_PRICE_PAIRS)
+        assert (factors["value_usd_current"] == 1.0).all()
+        assert factors.loc[2, "value_eur_current"] != factors.loc[2, "value_eur_current"]
+
+    def test_factors_keep_more_than_six_decimals(self, fake_pydeflate):
+        keys = pd.DataFrame({"donor_code": [302], "year": [2020]})
+        factor = get_conversion_factors(keys, base_year=2024).loc[0, "value_eur_current"]
+        expected = transformations.oecd_dac_exchange(
+            data=keys.assign(value=1e6), target_currency="EUR", id_column="donor_code",
+        ).loc[0, "value"] / 1e6
+
+        assert factor == pytest.approx(expected, rel=1e-12)
+        assert not np.isclose(factor, round(factor, 6), rtol=0, atol=1e-9)
+
+
+class TestWideCurrencyPath:
+    INDEX = ("year", "donor_name", "recipient_name", "indicator_name")
+
+    def _long(self, df):
+        long = add_currencies_and_prices(df, base_year=2024)
+        long = long[long["value"].notna() & (long["value"] != 0)]
+        recipient_cols = ["year", "donor_code", "donor_name", "indicator_name", "currency", "price"]
+        long = pd.concat(
+            [long, build_crs_recipient_group_totals(long, recipient_cols)], ignore_index=True
+        )
+        donor_cols = ["year", "recipient_name", "indicator_name", "currency", "price"]
+        long = pd.concat(
+            [long, build_crs_donor_group_totals(long, donor_cols)], ignore_index=True
+        )
+        return widen_currency_price(long, index_cols=self.INDEX)
+
+    def _wide(self, df):
+        wide = drop_empty_values(add_currency_price_columns(df, base_year=2024))
+        recipient_cols = ["year", "donor_code", "donor_name", "indicator_name"]
+        wide = pd.concat(
+            [wide, build_crs_recipient_group_totals(wide, recipient_cols, min_count=1)],
+            ignore_index=True,
+        )
+        donor_cols = ["year", "recipient_name", "indicator_name"]
+        wide = pd.concat(
+            [wide, build_crs_donor_group_totals(wide, donor_cols, min_count=1)],
+            ignore_index=True,
+        )
+        return collapse_wide_values(wide, index_cols=self.INDEX)
+
+    def test_publishes_the_same_frame_as_the_long_path(self, fake_pydeflate, classified_frame):
+        # A zero in one row, to check it drops out of the wide frame as it would from the long.
+        classified_frame.loc[0, "value"] = 0.0
+        expected = self._long(classified_frame.copy()).sort_values(list(self.INDEX))
+        result = self._wide(classified_frame.copy()).sort_values(list(self.INDEX))
+
+        pd.testing.assert_frame_equal(
+            result.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False
+        )
+
+    def test_one_row_per_key_with_a_column_per_pair(self, fake_pydeflate, long_frame):
+        wide = add_currency_price_columns(long_frame.copy(), base_year=2024)
+
+        assert len(wide) == len(long_frame)
+        assert "value" not in wide.columns
+        assert (wide["value_usd_current"] == long_frame["value"]).all()
+
+
+class TestSumValueColumns:
+    FRAME = pd.DataFrame(
+        {
+            "year": [2020, 2020, 2021],
+            "value_usd_current": [1.0, 2.0, 4.0],
+            "value_eur_current": [np.nan, np.nan, 8.0],
+        }
+    )
+
+    def test_an_all_nan_group_sums_to_zero_like_the_groupby(self):
+        expected = self.FRAME.groupby(["year"], dropna=False, observed=True).sum().reset_index()
+        result = sum_value_columns(self.FRAME, ["year"])
+
+        pd.testing.assert_frame_equal(result, expected)
+        assert result["value_eur_current"].tolist() == [0.0, 8.0]
+
+    def test_min_count_keeps_an_all_nan_group_nan(self):
+        result = sum_value_columns(self.FRAME, ["year"], min_count=1)
+
+        assert np.isnan(result["value_eur_current"].iloc[0])
+        assert result["value_usd_current"].tolist() == [3.0, 4.0]
+
+
+class TestDropEmptyValues:
+    def test_masks_zero_cells_and_drops_rows_with_nothing_left(self):
+        df = pd.DataFrame(
+            {
+                "key": [1, 2, 3],
+                "value_usd_current": [0.0, 1.0, np.nan],
+                "value_eur_current": [0.0, 0.0, 0.0],
+            }
+        )
+        result = drop_empty_values(df)
+
+        assert result["key"].tolist() == [2]
+        assert np.isnan(result["value_eur_current"].iloc[0])
+
+
+class TestGetGroupTotals:
+    GROUPS: ClassVar[dict[str, dict[int, str]]] = {
+        "Small": {1: "One", 2: "Two"},
+        "Large": {1: "One", 2: "Two", 3: "Three", 302: "Four"},
+        "Absent": {4_242: "Nobody"},
+    }
+
+    def _one_at_a_time(self, df, group_cols):
+        return pd.concat(
+            [
+                get_group_total(df, members, group_cols=group_cols, group_name=name)
+                for name, members in self.GROUPS.items()
+            ],
+            ignore_index=True,
+        )
+
+    def test_matches_one_group_at_a_time(self, long_frame):
+        # Overlapping groups, a null in a grouping key, and a NaN value to be skipped.
+        df = long_frame.astype({"donor_code": "float64"})
+        df.loc[0, "recipient_code"] = None
+        df.loc[1, "value"] = np.nan
+        group_cols = ["year", "recipient_code", "indicator_name"]
+
+        key = [*group_cols, "donor_name"]
+        expected = self._one_at_a_time(df, group_cols).sort_values(key, ignore_index=True)
+        result = get_group_totals(df, self.GROUPS, group_cols=group_cols).sort_values(
+            key, ignore_index=True
+        )
+
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    def test_sums_every_value_column_of_a_wide_frame(self):
+        df = pd.DataFrame(
+            {
+                "year": [2020, 2020, 2020],
+                "donor_code": [1, 2, 3],
+                "value_usd_current": [1.0, 2.0, 4.0],
+                "value_eur_current": [np.nan, np.nan, 8.0],
+            }
+        )
+        result = get_group_totals(df, self.GROUPS, group_cols=["year"]).set_index("donor_name")
+
+        assert result.loc["Small", "value_usd_current"] == 3.0
+        assert result.loc["Small", "value_eur_current"] == 0.0
+        assert result.loc["Large", "value_eur_current"] == 8.0
+        assert "Absent" not in result.index
+
+    def test_min_count_keeps_a_group_of_nan_cells_nan_like_one_at_a_time(self):
+        df = pd.DataFrame(
+            {
+                "year": [2020, 2020, 2020],
+                "donor_code": [1, 2, 3],
+                "value_usd_current": [1.0, 2.0, 4.0],
+                "value_eur_current": [np.nan, np.nan, 8.0],
+            }
+        )
+        result = get_group_totals(df, self.GROUPS, group_cols=["year"], min_count=1)
+        expected = get_group_total(
+            df, self.GROUPS["Small"], group_cols=["year"], group_name="Small", min_count=1
+        )
+
+        small = result.loc[result["donor_name"] == "Small"].reset_index(drop=True)
+        pd.testing.assert_frame_equal(small, expected, check_dtype=False)
+        assert np.isnan(small.loc[0, "value_eur_current"])
+
+    def test_many_groups_and_keys_only_hold_the_filled_cells(self):
+        rng = np.random.default_rng(4)
+        n = 30_000
+        df = pd.DataFrame(
+            {
+                "year": rng.choice(range(2000, 2024), n),
+                "recipient_code": rng.choice(range(5_000), n),
+                "donor_code": rng.choice(range(1, 101), n),
+                "value": rng.gamma(1, 5, n),
+            }
+        )
+        df.loc[::97, "value"] = np.nan
+        groups = {
+            f"Group {g}": {int(code): "Member" for code in rng.choice(range(1, 101), 3)}
+            for g in range(200)
+        }
+        group_cols = ["year", "recipient_code"]
+        n_keys = len(df[group_cols].drop_duplicates())
+
+        tracemalloc.start()
+        result = get_group_totals(df, groups, group_cols=group_cols, check_all_keys=False)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        expected = pd.concat(
+            [
+                get_group_total(
+                    df, members, group_cols=group_cols, group_name=name, check_all_keys=False
+                )
+                for name, members in groups.items()
+            ],
+            ignore_index=True,
+        )
+        key = [*group_cols, "donor_name"]
+        pd.testing.assert_frame_equal(
+            result.sort_values(key, ignore_index=True),
+            expected.sort_values(key, ignore_index=True)[result.columns],
+            check_dtype=False,
+        )
+        # Less than a single dense float64 array over every group and key would take.
+        assert peak < len(groups) * n_keys * 8
+
+    def test_warns_about_members_that_never_appear(self, long_frame, caplog):
+        get_group_totals(long_frame, self.GROUPS, group_cols=["year"])
+        assert "Absent: 1 of 1 members never appear" in caplog.text
+
+
+class TestBuildCrsRecipientGroupTotals:
+    GROUP_COLS: ClassVar[list[str]] = ["year", "donor_code", "indicator_name"]
+
+    def _one_aggregate_at_a_time(self, df):
+        """The rollup as it used to be built: one reduction per kind of aggregate."""
+        region = transformations.CRS_REGION_COL
+        to_continent = {
+            r: continent
+            for continent, regions in transformations.CRS_REGION_ROLLUPS.items()
+            for r in regions
+        }
+        cols = self.GROUP_COLS
+        return pd.concat(
+            [
+                sum_value_columns(df, cols).assign(recipient_name="ODA eligible countries"),
+                get_attribute_total(
+                    df,
+                    transformations.CRS_INCOME_COL,
+                    cols,
+                    label_map=transformations.CRS_INCOME_LABELS,
+                ),
+                get_attribute_total(
+                    df.loc[~df[region].isin(transformations.CRS_REGION_ROLLUPS)], region, cols
+                ),
+                get_attribute_total(
+                    df.assign(_continent=df[region].map(to_continent)), "_continent", cols
+                ).dropna(subset=["recipient_name"]),
+                get_group_totals(
+                    df,
+                    {
+                        "Sahel countries": transformations.SAHEL_RECIPIENTS,
+                        "France priority countries": transformations.FRANCE_PRIORITY_RECIPIENTS,
+                    },
+                    column="recipient",
+                    group_cols=cols,
+                ),
+            ],
+            ignore_index=True,
+        )
+
+    @pytest.fixture
+    def frame(self, classified_frame):
+        # Sahel and France priority members, a continent-level region, missing
+        # classifications, and a missing value.
+        df = classified_frame.copy()
+        df["recipient_code"] = df["recipient_code"].map({1: 232, 2: 255, 3: 228}).fillna(
+            df["recipient_code"]
+        )
+        df.loc[df.index[:40], "recipient_region"] = "Africa"
+        df.loc[df.index[40:60], "recipient_region"] = None
+        df.loc[df.index[60:70], "incomegroup_name"] = None
+        df.loc[df.index[70], "value"] = np.nan
+        return df
+
+    def test_matches_one_aggregate_at_a_time(self, frame):
+        key = [*self.GROUP_COLS, "recipient_name"]
+        expected = self._one_aggregate_at_a_time(frame).sort_values(key, ignore_index=True)
+        result = build_crs_recipient_group_totals(frame, self.GROUP_COLS)[expected.columns]
+
+        pd.testing.assert_frame_equal(
+            result.sort_values(key, ignore_index=True), expected, check_dtype=False
+        )
+
+    def test_many_aggregates_and_keys_only_hold_the_filled_cells(self):
+        rng = np.random.default_rng(5)
+        n = 30_000
+        regions = [
+            *transformations.CRS_REGION_ROLLUPS["Africa"],
+            *(f"Region {r}" for r in range(200)),
+        ]
+        df = pd.DataFrame(
+            {
+                "year": rng.choice(range(2000, 2024), n),
+                "donor_code": rng.choice(range(1, 1_001), n),
+                "indicator_name": rng.choice(["Disbursements", "Commitments"], n),
+                "recipient_code": rng.choice([232, 255, 228, *range(1_000, 1_100)], n),
+                "recipient_region": rng.choice(regions, n),
+                "incomegroup_name": rng.choice([f"Income {i}" for i in range(10)], n),
+                "value": rng.gamma(1, 5, n),
+            }
+        )
+        n_keys = len(df[self.GROUP_COLS].drop_duplicates())
+
+        tracemalloc.start()
+        result = build_crs_recipient_group_totals(df, self.GROUP_COLS)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        key = [*self.GROUP_COLS, "recipient_name"]
+        expected = self._one_aggregate_at_a_time(df).sort_values(key, ignore_index=True)
+        pd.testing.assert_frame_equal(
+            result[expected.columns].sort_values(key, ignore_index=True),
+            expected,
+            check_dtype=False,
+        )
+        # Less than a single dense float64 array over every aggregate and key would take.
+        assert peak < result["recipient_name"].nunique() * n_keys * 8
+
+    def test_continent_level_regions_count_towards_continents_only(self, frame):
+        result = build_crs_recipient_group_totals(frame, self.GROUP_COLS)
+        africa = result.loc[result["recipient_name"] == "Africa"]
+
+        assert not africa.empty
+        assert not africa.duplicated(self.GROUP_COLS).any()
+
+
+class TestModalValues:
+    KEYS: ClassVar[list[str]] = ["recipient_code", "year"]
+    COLUMNS: ClassVar[list[str]] = ["recipient_name", "recipient_region"]
+
+    @staticmethod
+    def _per_group(df, keys, columns):
+        """The reduction as it used to be done: a Python mode per group and column."""
+
+        def modal(series):
+            present = series.dropna()
+            if present.empty:
+                return np.nan
+            return present.mode().sort_values().iloc[0]
+
+        return (
+            df.groupby(keys, dropna=False, observed=True)[columns].agg(modal).reset_index()
+        )
+
+    @pytest.fixture
+    def labels(self):
+        rng = np.random.default_rng(5)
+        n = 3_000
+        df = pd.DataFrame(
+            {
+                "recipient_code": rng.integers(1, 30, n),
+                "year": rng.integers(2020, 2024, n),
+                "recipient_name": rng.choice(
+                    ["Alpha", "Beta", "Gamma", None], n, p=[0.5, 0.2, 0.2, 0.1]
+                ),
+                "recipient_region": pd.Categorical(
+                    rng.choice(["South of Sahara", "Europe", None], n, p=[0.6, 0.3, 0.1])
+                ),
+            }
+        )
+        # A key whose labels are all blank, and one tied between two values.
+        df.loc[df["recipient_code"] == 29, "recipient_name"] = None
+        tied = pd.DataFrame(
+            {
+                "recipient_code": 99,
+                "year": 2020,
+                "recipient_name": ["Zeta", "Eta"],
+                "recipient_region": pd.Categorical(["Europe", "Europe"]),
+            }
+        )
+        return pd.concat([df, tied], ignore_index=True)
+
+    def test_matches_the_per_group_mode(self, labels):
+        expected = self._per_group(labels, self.KEYS, self.COLUMNS)
+        result = modal_values(labels, self.KEYS, self.COLUMNS)
+
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_categorical=False)
+
+    def test_ties_go_to_the_lowest_value_whatever_the_row_order(self, labels):
+        forward = modal_values(labels, self.KEYS, self.COLUMNS)
+        backward = modal_values(labels.iloc[::-1], self.KEYS, self.COLUMNS)
+
+        pd.testing.assert_frame_equal(forward, backward)
+        tied = forward.loc[forward["recipient_code"] == 99, "recipient_name"]
+        assert tied.item() == "Eta"
+
+    def test_logs_keys_whose_values_disagree(self, labels, caplog):
+        modal_values(labels, self.KEYS, ["recipient_name"])
+        assert "combinations report more than one recipient_name" in caplog.text
+
+
+class TestCrsRecipientClassificationsCache:
+    @pytest.fixture
+    def crs(self, monkeypatch, tmp_path):
+        """A fake CRS bulk file: records which years each read asks for."""
+        import oda_data
+
+        from src.data.analysis_tools import crs_store, outputs
+
+        reads = []
+
+        class FakeCRSData:
+            def __init__(self, years):
+                self.years = list(years)
+
+            def read(self, using_bulk_download, additional_filters, columns):
+                reads.append(self.years)
+                codes = {c: v for c, _, v in additional_filters or []}.get(
+                    "recipient_code", [1, 2, 3]
+                )
+                return pd.DataFrame(
+                    [
+                        (year, code, f"Recipient {code}", "Europe", "UMICs")
+                        for code in codes
+                        for year in self.years
+                    ],
+                    columns=columns,
+                )
+
+        state = {"fingerprint": "bulka"}
+        monkeypatch.setattr(oda_data, "CRSData", FakeCRSData)
+        monkeypatch.setattr(outputs, "DERIVED_CACHE_DIR", tmp_path)
+        monkeypatch.setattr(transformations, "crs_bulk_fingerprint", lambda: state["fingerprint"])
+        # No compacted store, so reads go to the fake bulk file.
+        monkeypatch.setattr(crs_store, "crs_bulk_fingerprint", lambda: state["fingerprint"])
+        monkeypatch.setattr(crs_store, "STORE_DIR", tmp_path / "crs_store")
+        return reads, state, tmp_path
+
+    def test_serves_years_already_cached_without_reading(self, crs):
+        reads, _, _ = crs
+        full = transformations.get_crs_recipient_classifications(range(2015, 2025), [1, 2])
+        subset = transformations.get_crs_recipient_classifications(range(2018, 2020), [2, 1])
+
+        assert reads == [list(range(2015, 2025))]
+        expected = full.loc[full["year"].between(2018, 2019)].reset_index(drop=True)
+        pd.testing.assert_frame_equal(subset, expected)
+
+    def test_reads_only_the_years_missing_from_the_cache(self, crs):
+        reads, _, _ = crs
+        transformations.get_crs_recipient_classifications(range(2015, 2020), [1, 2])
+        result = transformations.get_crs_recipient_classifications(range(2018, 2022), [1, 2])
+
+        assert reads[-1] == [2020, 2021]
+        assert sorted(result["year"].unique()) == [2018, 2019, 2020, 2021]
+        assert len(result) == 8
+
+    def test_a_new_bulk_file_invalidates_the_cache(self, crs):
+        reads, state, cache_dir = crs
+        transformations.get_crs_recipient_classifications(range(2015, 2020), [1, 2])
+        state["fingerprint"] = "bulkb"
+        transformations.get_crs_recipient_classifications(range(2015, 2020), [1, 2])
+
+        assert len(reads) == 2
+        assert [p.name.rsplit("-", 1)[-1] for p in cache_dir.glob("*.parquet")] == ["bulkb.parquet"]
+
+
+    def test_shared_table_gains_each_new_year_once(self, crs):
+        reads, state, _ = crs
+        state["fingerprint"] = None
+        with sharing():
+            transformations.get_crs_recipient_classifications(range(2015, 2020), [1, 2])
+            transformations.get_crs_recipient_classifications(range(2020, 2022), [1, 2])
+            result = transformations.get_crs_recipient_classifications(range(2015, 2022), [1, 2])
+
+        assert reads == [list(range(2015, 2020)), [2020, 2021]]
+        assert sorted(result["year"].unique()) == list(range(2015, 2022))
+        assert not result.duplicated(["recipient_code", "year"]).any()
+
+
+class TestAddRecipientClassifications:
+    COLUMNS: ClassVar[list[str]] = ["recipient_name", "recipient_region", "incomegroup_name"]
+
+    @staticmethod
+    def _merged(df, classified):
+        """The join as it used to be done: a merge, a per-recipient map, then sentinels."""
+        merged = df.drop(columns=["recipient_name"], errors="ignore").merge(
+            classified, on=["recipient_code", "year"], how="left", validate="m:1"
+        )
+        per_recipient = (
+            classified.sort_values("year")
+            .drop_duplicates("recipient_code", keep="last")
+            .set_index("recipient_code")
+        )
+        for col in TestAddRecipientClassifications.COLUMNS:
+            gaps = merged[col].isna()
+            merged.loc[gaps, col] = merged.loc[gaps, "recipient_code"].map(per_recipient[col])
+        return merged.fillna(
+            {
+                "recipient_region": transformations.CRS_UNCLASSIFIED_REGION,
+                "incomegroup_name": transformations.CRS_UNCLASSIFIED_INCOME,
+            }
+        )
+
+    @pytest.fixture
+    def classified(self, classified_frame):
+        table = classified_frame[["recipient_code", "year", *self.COLUMNS]].drop_duplicates(
+            ["recipient_code", "year"], ignore_index=True
+        )
+        # Recipient-years without an income group or region, recipients missing whole years,
+        # and one recipient (7) whose latest year has no region.
+        table.loc[table.index[::5], "incomegroup_name"] = None
+        latest_of_7 = (table["recipient_code"] == 7) & (table["year"] == 2024)
+        table.loc[latest_of_7, "recipient_region"] = None
+        return table.loc[~table["year"].isin([2016, 2017]) | (table["recipient_code"] > 20)]
+
+    def test_matches_the_merge_and_fallbacks(self, long_frame, classified):
+        df = long_frame.copy()
+        df.loc[df.index[:3], "recipient_code"] = 555  # never classified
+        expected = self._merged(df, classified)
+
+        result = add_recipient_classifications(df.copy(), classified, "test")
+
+        pd.testing.assert_frame_equal(
+            result[expected.columns].astype({col: "object" for col in self.COLUMNS}),
+            expected,
+            check_dtype=False,
+        )
+
+    def test_frames_classified_from_one_index_share_categories(self, long_frame, classified):
+        index = index_recipient_classifications(classified)
+        first = add_recipient_classifications(long_frame.iloc[:100].copy(), index, "first")
+        second = add_recipient_classifications(long_frame.iloc[100:].copy(), index, "second")
+
+        combined = pd.concat([first, second], ignore_index=True)
+        assert all(combined[col].dtype.name == "category" for col in self.COLUMNS)
+
+
+class TestWidenCurrencyPriceScatter:
+    INDEX = ("year", "donor_code", "indicator_name")
+
+    @pytest.fixture
+    def long(self, fake_pydeflate, long_frame):
+        converted = add_currencies_and_prices(long_frame, base_year=2024)
+        converted["indicator_name"] = converted["indicator_name"].astype("category")
+        return converted
+
+    def test_identical_to_the_pivot(self, long):
+        expected = widen_currency_price(long.copy(), index_cols=self.INDEX)
+        pd.testing.assert_frame_equal(widen_currency_price_scatter(long, self.INDEX), expected)
+
+    def test_identical_to_the_pivot_without_duplicates(self, long):
+        unique = long.drop_duplicates([*self.INDEX, "currency", "price"], ignore_index=True)
+        expected = widen_currency_price(unique.copy(), index_cols=self.INDEX)
+        pd.testing.assert_frame_equal(widen_currency_price_scatter(unique, self.INDEX), expected)
+
+    def test_nan_cells_sum_to_zero_once_there_are_duplicates_like_the_groupby(self):
+        df = pd.DataFrame(
+            {
+                "year": [2020, 2020, 2021],
+                "donor_code": [1, 1, 1],
+                "indicator_name": ["a", "a", "a"],
+                "currency": ["USD", "USD", "USD"],
+                "price": ["current", "current", "current"],
+                "value": [np.nan, np.nan, np.nan],
+            }
+        )
+        expected = widen_currency_price(df.copy(), index_cols=self.INDEX)
+        result = widen_currency_price_scatter(df, self.INDEX)
+
+        pd.testing.assert_frame_equal(result, expected)
+        assert result["value_usd_current"].tolist() == [0.0, 0.0]
+
+
+class TestAddShares:
+    SPECS: ClassVar[list[tuple]] = [
+        ("recipient_name", "ODA eligible countries", ["year", "donor_name"], "pct_total_donor"),
+        ("donor_name", "All bilateral donors", ["year", "recipient_name"], "pct_total_recipient"),
+    ]
+
+    @staticmethod
+    def _merged(df, filter_col, filter_val, merge_cols, pct_col):
+        """A share as it used to be added: a totals frame merged back onto the whole frame."""
+        rows = df if filter_col is None else df.loc[df[filter_col] == filter_val]
+        total = (
+            rows.groupby(merge_cols, dropna=False, observed=True)["value_usd_current"]
+            .sum()
+            .reset_index()
+            .rename(columns={"value_usd_current": "total_oda"})
+        )
+        merged = df.merge(total, on=merge_cols, how="left", validate="m:1")
+        merged[pct_col] = (merged["value_usd_current"] / merged["total_oda"]).round(6)
+        return merged.drop(columns=["total_oda"])
+
+    @pytest.fixture
+    def wide(self, classified_frame):
+        df = classified_frame.rename(columns={"value": "value_usd_current"})
+        df["value_usd_current"] = df["value_usd_current"].astype("float32")
+        # Reference rows for both totals, a NaN value, and keys with no reference rows.
+        df.loc[df.index[::7], "recipient_name"] = "ODA eligible countries"
+        df.loc[df.index[::11], "donor_name"] = "All bilateral donors"
+        df.loc[df.index[3], "value_usd_current"] = np.nan
+        return df.astype({"donor_name": "category", "recipient_name": "category"})
+
+    def test_matches_merging_each_total_back(self, wide):
+        expected = wide
+        for spec in self.SPECS:
+            expected = self._merged(expected, *spec)
+
+        pd.testing.assert_frame_equal(add_shares(wide, self.SPECS), expected)
+
+    def test_a_null_key_is_matched_alike_with_and_without_a_reference(self, wide):
+        wide.loc[wide.index[::13], "recipient_name"] = np.nan
+        expected = wide
+        for spec in self.SPECS:
+            expected = self._merged(expected, *spec)
+
+        within = add_shares(wide, self.SPECS)
+        from_reference = add_shares(wide, self.SPECS, reference=wide)
+
+        assert wide["recipient_name"].isna().any()
+        pd.testing.assert_frame_equal(within, expected)
+        pd.testing.assert_frame_equal(from_reference, expected)
+
+    def test_leaves_the_input_frame_alone(self, wide):
+        columns = list(wide.columns)
+        add_shares(wide, self.SPECS)
+        assert list(wide.columns) == columns
+
+    def test_group_share_matches_merging_the_group_total_back(self, wide):
+        group_cols = ["year", "donor_name", "recipient_name"]
+        expected = self._merged(wide, None, None, group_cols, "pct_of_total_oda")
+
+        pd.testing.assert_frame_equal(
+            add_share_of_group_total(wide, group_cols, "pct_of_total_oda"), expected
+        )
+
+
+class TestConvertValuesToUnits:
+    @staticmethod
+    def _whole_columns(df):
+        """The conversion as it used to be done, a column at a time, widened to float64."""
+        df = df.copy()
+        for col in [c for c in df.columns if c.startswith("value_")]:
+            units = (df[col].astype("float64") * transformations.UNITS_PER_MILLION).round()
+            largest = units.abs().max()
+            promote = pd.notna(largest) and largest > transformations.INT32_MAX
+            df[col] = units.astype("Int64" if promote else "Int32")
+        return df
+
+    @pytest.fixture
+    def wide(self):
+        rng = np.random.default_rng(3)
+        n = 10_000
+        df = pd.DataFrame(
+            {
+                "year": rng.integers(2013, 2025, n),
+                "value_usd_current": rng.normal(0, 300, n),
+                "value_eur_current": rng.lognormal(2, 3, n).astype("float32"),
+                # Past Int32 once in units.
+                "value_gbp_current": rng.normal(0, 3_000, n),
+                "pct_total_donor": rng.random(n),
+            }
+        )
+        df.loc[df.index[::13], ["value_usd_current", "value_eur_current"]] = np.nan
+        df["value_cad_current"] = pd.array([np.nan] * n, dtype="Float32")
+        return df
+
+    def test_matches_converting_whole_columns(self, wide, monkeypatch):
+        # Chunks far smaller than the frame, and not a divisor of its length.
+        monkeypatch.setattr(transformations, "_UNITS_CHUNK_ROWS", 999)
+        expected = self._whole_columns(wide)
+
+        result = convert_values_to_units(wide)
+
+        pd.testing.assert_frame_equal(result, expected)
+        assert result["value_usd_current"].dtype == "Int32"
+        assert result["value_gbp_current"].dtype == "Int64"
+
+    def test_rounds_float32_values_in_float64(self):
+        # 1234.5677 as float32 is 1234.5677490234375: float64 rounding keeps every digit,
+        # where float32 arithmetic would land on a multiple of 128.
+        df = pd.DataFrame({"value_usd_current": np.array([1234.5677], dtype="float32")})
+        assert convert_values_to_units(df)["value_usd_current"].tolist() == [1_234_567_749]
+
+    def test_converts_in_place(self, wide):
+        assert convert_values_to_units(wide) is wide
+        assert wide["value_usd_current"].dtype == "Int32"
+
+    def test_widens_each_column_to_float_once(self, wide, monkeypatch):
+        widened = []
+        as_float = transformations._as_float_values
+
+        def counting(series):
+            widened.append(series.name)
+            return as_float(series)
+
+        monkeypatch.setattr(transformations, "_as_float_values", counting)
+        wide["value_usd_current"] = wide["value_usd_current"].astype("Float64")
+        convert_values_to_units(wide)
+
+        value_cols = [c for c in wide.columns if c.startswith("value_")]
+        assert sorted(widened) == sorted(value_cols)
+
+    def test_refuses_infinite_values(self):
+        df = pd.DataFrame({"value_usd_current": [1.0, np.inf]})
+        with pytest.raises(ValueError, match="infinite"):
+            convert_values_to_units(df)
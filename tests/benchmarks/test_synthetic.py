@@ -0,0 +1,112 @@
+"""Tests for the synthetic OECD data the builders run on offline."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.data.analysis_tools.transformations import CURRENCY_PRICE_PAIRS
+from src.data.config import FINANCING_TIME
+
+ROOT = Path(__file__).resolve().parents[2]
+FINANCING = ROOT / "src" / "data" / "scripts" / "financing_view.parquet.py"
+
+# Run in a fresh interpreter: installing the stand-ins rebinds names across every loaded module,
+# which no test here could undo. The stand-ins are installed first, as python -m
+# benchmarks.synthetic does, and the loader is then executed as its own script would be, with
+# the network refused throughout.
+_REFUSE_NETWORK = """
+import socket
+
+def refuse(*args, **kwargs):
+    raise OSError("network access during a synthetic run")
+
+socket.socket.connect = refuse
+socket.create_connection = refuse
+"""
+
+_RUN_LOADER = _REFUSE_NETWORK + """
+import json, runpy, sys
+from benchmarks import synthetic
+
+synthetic.install(0.002)
+loader = runpy.run_path(sys.argv[1])
+df = loader["get_financing_data"]()
+print(json.dumps({
+    "rows": len(df),
+    "columns": list(df.columns),
+    "years": sorted(int(year) for year in df["year"].unique()),
+    "donors": int(df["donor_name"].nunique()),
+    "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
+}))
+"""
+
+
+# A builder that hands work to spawned workers, as the sectors view does its shards. Each
+# worker re-runs the script, and must still find the stand-ins under the names it imported.
+_SPAWNING_BUILDER = """
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+from oda_data import CRSData
+
+
+def reader(_):
+    return CRSData.__module__
+
+
+if __name__ == "__main__":
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+        print(reader(None), *pool.map(reader, [None]))
+"""
+
+
+def _run(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT, env={**os.environ, "PYTHONPATH": str(ROOT)},
+        capture_output=True, text=True, timeout=300, check=False,
+    )
+
+
+@pytest.fixture(scope="module")
+def financing():
+    """The financing view's frame, built offline from synthetic data at a tiny scale."""
+    run = _run("-c", _RUN_LOADER, str(FINANCING))
+    assert run.returncode == 0, run.stderr[-3000:]
+    return json.loads(run.stdout.strip().splitlines()[-1]), run.stderr
+
+
+class TestSyntheticInstall:
+    def test_the_stand_ins_replace_the_oecd_readers(self, financing):
+        _, log = financing
+        assert "Using synthetic OECD data at 0.002x scale" in log
+
+    def test_the_runner_installs_them_in_spawned_workers_too(self, tmp_path):
+        builder = tmp_path / "builder.py"
+        builder.write_text(_SPAWNING_BUILDER)
+        run = _run("-m", "benchmarks.synthetic", "0.002", str(builder))
+        assert run.returncode == 0, run.stderr[-3000:]
+        assert run.stdout.split() == ["benchmarks.synthetic", "benchmarks.synthetic"]
+
+    def test_config_leaves_the_real_readers_in_place(self):
+        run = _run("-c", "import sys, src.data.config; print('benchmarks' in sys.modules)")
+        assert run.returncode == 0, run.stderr[-3000:]
+        assert run.stdout.split() == ["False"]
+
+    def test_a_loader_builds_its_frame_offline(self, financing):
+        frame, _ = financing
+        value_cols = sorted(
+            f"value_{currency.lower()}_{price}" for currency, price in CURRENCY_PRICE_PAIRS
+        )
+        assert frame["columns"] == [
+            "year", "donor_name", "indicator_name", "type", *value_cols,
+            "pct_of_total_oda", "pct_of_gni",
+        ]
+        assert frame["rows"] > 1_000
+        assert frame["years"] == list(range(FINANCING_TIME["start"], FINANCING_TIME["end"] + 1))
+        assert frame["donors"] > 30
+        assert {frame["dtypes"][col] for col in value_cols} <= {"Int32", "Int64"}
@@ -0,0 +1,251 @@
+"""Tests for the sectors view builder, with its data sources replaced by small fakes."""
+
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from typing import ClassVar
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.analysis_tools import transformations
+from src.data.config import CRS_RECIPIENTS
+from src.data.scripts import sectors_view
+from tests.analysis_tools.conftest import RATED_DONORS, fake_deflate, fake_exchange
+
+RECIPIENTS = sorted(CRS_RECIPIENTS)[:24]
+YEARS = range(2018, 2023)
+SUB_SECTORS = ["Basic education", "Health, General", "Agriculture", "Emergency Response"]
+
+
+def _rows(rng, donors, n, recipients=RECIPIENTS):
+    return pd.DataFrame(
+        {
+            "year": rng.choice(list(YEARS), n),
+            "donor_code": rng.choice(donors, n),
+            "recipient_code": rng.choice(recipients, n),
+            "sub_sector": rng.choice(SUB_SECTORS, n),
+            "value": rng.gamma(0.5, 20, n),
+        }
+    )
+
+
+@pytest.fixture
+def fake_sources(monkeypatch, tmp_path):
+    """Swap every reader the view calls for seeded fakes that honour the donor subset."""
+    rng = np.random.default_rng(11)
+    bilateral = _rows(rng, RATED_DONORS, 6_000).assign(
+        donor_name=lambda d: "Donor " + d["donor_code"].astype(str), indicator_name="Bilateral"
+    )
+    imputed = _rows(rng, RATED_DONORS, 4_000).assign(indicator_name="Imputed multilateral")
+    eu_imputed = _rows(rng, [1, 2, 3, 4, 5, 918], 1_000).assign(
+        indicator_name="Imputed multilateral"
+    )
+
+    def grouped(df, cols):
+        return df.groupby(cols, as_index=False)["value"].sum()
+
+    def get_bilateral(donors=None, scan=None):
+        rows = bilateral if donors is None else bilateral[bilateral["donor_code"].isin(donors)]
+        return grouped(rows, [c for c in bilateral.columns if c != "value"])
+
+    def get_imputed(donors=None):
+        rows = imputed if donors is None else imputed[imputed["donor_code"].isin(donors)]
+        return grouped(rows, [c for c in imputed.columns if c != "value"])
+
+    regions = ["South of Sahara", "North of Sahara", "Far East Asia", "South America"]
+    incomes = ["LDCs", "LMICs", "UMICs"]
+    years, codes = np.meshgrid(list(YEARS), RECIPIENTS, indexing="ij")
+    classifications = pd.DataFrame(
+        {"year": years.ravel(), "recipient_code": codes.ravel()}
+    ).assign(
+        recipient_name=lambda d: "Recipient " + d["recipient_code"].astype(str),
+        recipient_region=lambda d: d["recipient_code"].map(lambda c: regions[c % 4]),
+        incomegroup_name=lambda d: d["recipient_code"].map(lambda c: incomes[c % 3]),
+    )
+
+    monkeypatch.setattr(sectors_view, "get_bilateral_by_sector", get_bilateral)
+    monkeypatch.setattr(sectors_view, "get_imputed_multi_by_sector", get_imputed)
+    monkeypatch.setattr(
+        sectors_view,
+        "get_eu27_eui_imputed",
+        lambda: grouped(eu_imputed, [c for c in eu_imputed.columns if c != "value"]),
+    )
+    monkeypatch.setattr(
+        sectors_view, "get_crs_recipient_classifications", lambda *_, **__: classifications
+    )
+    monkeypatch.setattr(transformations, "oecd_dac_exchange", fake_exchange)
+    monkeypatch.setattr(transformations, "oecd_dac_deflate", fake_deflate)
+    monkeypatch.setattr(sectors_view.PATHS, "DATA", tmp_path)
+
+
+class TestCombinedSectorsSharded:
+    AGGREGATES: ClassVar[list[str]] = [
+        "All bilateral donors", "DAC countries", "G7 countries", "EU27 countries",
+        "EU27 & EU Institutions",
+    ]
+
+    @staticmethod
+    def _sorted(df):
+        return df.sort_values(list(sectors_view.INDEX_COLS), ignore_index=True)
+
+    @pytest.mark.parametrize("n_shards, jobs", [(2, 1), (5, 1), (3, 2)])
+    def test_matches_the_in_memory_build(self, fake_sources, monkeypatch, n_shards, jobs):
+        # Forked rather than spawned workers, so they inherit the fakes.
+        monkeypatch.setattr(
+            sectors_view,
+            "_executor",
+            lambda n: ProcessPoolExecutor(n, mp_context=mp.get_context("fork")),
+        )
+        expected = self._sorted(sectors_view.combined_sectors())
+        parts = list(sectors_view.combined_sectors_sharded(n_shards, jobs=jobs))
+
+        # Parts of one dataset: same schema, and each donor in exactly one part. Only the
+        # aggregates need Int64 here, so the shards are promoted to match them.
+        dtypes = [part.dtypes.astype(str).to_dict() for part in parts]
+        assert all(d == dtypes[0] for d in dtypes)
+        assert dtypes[0]["value_usd_current"] == "Int64"
+        donors = [set(part["donor_name"].astype(str)) for part in parts]
+        assert sum(map(len, donors)) == len(set().union(*donors))
+
+        labels = {col: "object" for col in sectors_view.INDEX_COLS if col != "year"}
+        result = self._sorted(pd.concat(parts, ignore_index=True).astype(labels))
+        expected = expected.astype(labels)
+        assert list(result.columns) == list(expected.columns)
+
+        # The aggregates are sums of the shards' float32 partial sums, so they differ in the
+        # last digits only. Individual donors are checked one by one below.
+        aggregate = expected["donor_name"].isin(self.AGGREGATES).to_numpy()
+        assert aggregate.any()
+        pd.testing.assert_frame_equal(
+            result.loc[aggregate], expected.loc[aggregate], check_exact=False, rtol=1e-4
+        )
+        for donor in expected.loc[~aggregate, "donor_name"].unique():
+            self._assert_donor_matches(result, expected, donor)
+
+    @staticmethod
+    def _assert_donor_matches(result, expected, donor):
+        """One donor's rows: exact but for pct_total_recipient, whose denominators are
+        aggregates summed shard by shard. Its rounded shares may differ by one step of the
+        sixth decimal, 1e-6, where the denominators fall either side of a rounding boundary."""
+        result = result.loc[result["donor_name"] == donor].reset_index(drop=True)
+        expected = expected.loc[expected["donor_name"] == donor].reset_index(drop=True)
+        assert len(expected)
+
+        share = "pct_total_recipient"
+        pd.testing.assert_frame_equal(result.drop(columns=share), expected.drop(columns=share))
+        steps = ((result[share] - expected[share]).abs() * 1e6).round()
+        assert steps.max() <= 1
+        pd.testing.assert_series_equal(result[share].isna(), expected[share].isna())
+
+    def test_a_single_donor_matches_the_in_memory_build(self, fake_sources):
+        expected = self._sorted(sectors_view.combined_sectors())
+        parts = list(sectors_view.combined_sectors_sharded(3))
+
+        labels = {col: "object" for col in sectors_view.INDEX_COLS if col != "year"}
+        result = self._sorted(pd.concat(parts, ignore_index=True).astype(labels))
+        self._assert_donor_matches(result, expected.astype(labels), "Donor 302")
+
+    def test_slugs_must_be_unique_across_shards(self, fake_sources, monkeypatch):
+        monkeypatch.setattr(sectors_view, "slugify", lambda name: "same")
+        with pytest.raises(ValueError, match="slugs are not unique"):
+            list(sectors_view.combined_sectors_sharded(2))
+
+
+class TestCheckpoints:
+    @staticmethod
+    def _checkpoints(**kwargs):
+        return sectors_view.StageCheckpoints(
+            "sectors_view",
+            sectors_view.sectors_stages(),
+            sectors_view.Path(sectors_view.__file__),
+            **kwargs,
+        )
+
+    def test_resumed_build_matches_a_fresh_one(self, fake_sources, monkeypatch):
+        expected = sectors_view.combined_sectors()
+
+        # The donor totals fail, as if the build were killed there.
+        build_totals = sectors_view.build_crs_donor_group_totals
+        monkeypatch.setattr(
+            sectors_view, "build_crs_donor_group_totals", lambda *a, **k: 1 / 0
+        )
+        with pytest.raises(ZeroDivisionError):
+            sectors_view.combined_sectors(self._checkpoints(save=True))
+
+        # Resuming must not read anything again.
+        monkeypatch.setattr(sectors_view, "build_crs_donor_group_totals", build_totals)
+        for reader in ("get_bilateral_by_sector", "get_imputed_multi_by_sector",
+                       "get_eu27_eui_imputed", "get_crs_recipient_classifications"):
+            monkeypatch.setattr(sectors_view, reader, lambda *a, **k: 1 / 0)
+        result = sectors_view.combined_sectors(self._checkpoints(resume=True))
+
+        pd.testing.assert_frame_equal(result, expected)
+
+
+class TestRollupTiers:
+    def test_each_tier_sums_the_rows_under_it(self, fake_sources):
+        sectors = sectors_view.combined_sectors()
+        tiers = sectors_view.rollup_tiers(sectors)
+
+        assert list(tiers) == list(sectors_view.DATASETS)[1:]
+        for name, tier in tiers.items():
+            keys = sectors_view.DATASETS[name]["keys"]
+            expected = sectors.groupby(keys, observed=True)["value_usd_current"].sum()
+            result = tier.set_index(keys)["value_usd_current"]
+            assert len(tier) == len(expected)
+            pd.testing.assert_series_equal(
+                result.loc[expected.index], expected, check_dtype=False, check_names=False
+            )
+
+    def test_shares_are_worked_out_from_the_summed_values(self, fake_sources):
+        sectors = sectors_view.combined_sectors()
+        tiers = sectors_view.rollup_tiers(sectors)
+        shares = ["pct_total_donor", "pct_total_recipient"]
+
+        for tier in tiers.values():
+            recomputed = transformations.add_shares(
+                tier.drop(columns=shares),
+                [sectors_view.SHARE_OF_DONOR, sectors_view.SHARE_OF_RECIPIENT],
+            )
+            for col in shares:
+                assert tier[col].notna().any()
+                assert tier[col].dtype == sectors[col].dtype
+                np.testing.assert_array_equal(
+                    tier[col], recomputed[col].astype(sectors[col].dtype)
+                )
+
+    def test_totals_are_partitioned_by_donor_alone(self, fake_sources):
+        totals = sectors_view.rollup_tiers(sectors_view.combined_sectors())[
+            "sectors_view_totals"
+        ]
+
+        assert sectors_view.DATASETS["sectors_view_totals"]["partition_cols"] == ["donor_slug"]
+        assert "recipient_slug" not in totals.columns
+        assert not totals.duplicated(sectors_view.DATASETS["sectors_view_totals"]["keys"]).any()
+
+    def test_shard_parts_share_the_aggregates_totals(self, fake_sources):
+        expected = sectors_view.rollup_tiers(sectors_view.combined_sectors())
+        aggregates, *shards = sectors_view.combined_sectors_sharded(3)
+        reference = sectors_view.rollup_tiers(aggregates)["sectors_view_totals"]
+        parts = [sectors_view.rollup_tiers(shard, reference) for shard in shards]
+
+        for name, tier in expected.items():
+            keys = sectors_view.DATASETS[name]["keys"]
+            result = pd.concat([part[name] for part in parts], ignore_index=True)
+            result = result.astype({col: "object" for col in keys if col != "year"})
+            merged = result.merge(
+                tier.astype({col: "object" for col in keys if col != "year"}),
+                on=keys,
+                suffixes=("", "_expected"),
+            )
+            assert len(merged) == len(result) > 0
+            value_cols = [col for col in result.columns if col.startswith("value_")]
+            assert (result[value_cols].dtypes == "Int64").all()
+            # Within the shards' one-step tolerance on pct_total_recipient; see
+            # TestCombinedSectorsSharded.
+            for col in ["pct_total_donor", "pct_total_recipient"]:
+                assert merged[col].notna().any()
+                np.testing.assert_allclose(
+                    merged[col], merged[f"{col}_expected"], rtol=0, atol=1.01e-6
+                )
@@ -0,0 +1,106 @@
+"""Tests for the build-all-views orchestrator."""
+
+import threading
+import time
+
+import pytest
+
+from src.data import build
+from src.data.build import Task
+
+
+def _task(name, log, after=(), fail=False, delay=0.0):
+    def run():
+        log.append(f"start {name}")
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        log.append(f"end {name}")
+
+    return Task(name, run, after=after)
+
+
+class TestRunTasks:
+    def test_runs_each_task_after_what_it_comes_after(self):
+        log = []
+        build.run_tasks(
+            [
+                _task("rates", log, delay=0.02),
+                _task("store", log),
+                _task("classifications", log, after=("store",)),
+                _task("financing", log, after=("rates",)),
+                _task("gender", log, after=("rates", "classifications")),
+            ],
+            jobs=3,
+        )
+
+        assert log.index("end rates") < log.index("start financing")
+        assert log.index("end classifications") < log.index("start gender")
+        assert log.index("end rates") < log.index("start gender")
+        assert len(log) == 10
+
+    def test_runs_independent_tasks_concurrently(self):
+        seen = set()
+        barrier = threading.Barrier(2, timeout=5)
+
+        def meet():
+            barrier.wait()
+            seen.add(threading.current_thread().name)
+
+        build.run_tasks([Task("a", meet), Task("b", meet)], jobs=2)
+
+        assert len(seen) == 2
+
+    def test_a_failure_stops_later_tasks_and_names_what_failed(self):
+        log = []
+        with pytest.raises(RuntimeError, match="Build failed at: store"):
+            build.run_tasks(
+                [
+                    _task("store", log, fail=True),
+                    _task("classifications", log, after=("store",)),
+                ]
+            )
+
+        assert log == ["start store"]
+
+    def test_rejects_unknown_and_circular_orders(self):
+        with pytest.raises(ValueError, match="unknown tasks"):
+            build.run_tasks([_task("a", [], after=("b",))])
+        with pytest.raises(ValueError, match="come after each other"):
+            build.run_tasks([_task("a", [], after=("b",)), _task("b", [], after=("a",))])
+
+
+class TestBuildTasks:
+    def test_fetches_only_the_inputs_the_views_use(self):
+        tasks = build.build_tasks(["financing", "recipients"])
+
+        assert [t.name for t in tasks] == ["exchange_rates", "financing", "recipients"]
+        assert all(t.after == ("exchange_rates",) for t in tasks[1:])
+
+    def test_sectors_runs_after_every_other_view_with_its_shards(self, monkeypatch):
+        monkeypatch.setattr(build, "_load_loader", lambda view: None)
+        tasks = {
+            t.name: t
+            for t in build.build_tasks(
+                ["sectors", "financing", "gender"], sectors_shards=4, sectors_jobs=2
+            )
+        }
+
+        assert set(tasks["sectors"].after) == {
+            "exchange_rates", "classifications", "financing", "gender"
+        }
+        assert tasks["sectors"].run.keywords == {
+            "n_shards": 4, "jobs": 2, "incremental": False
+        }
+
+    def test_sectors_runs_alone_whatever_the_jobs(self):
+        log = []
+        tasks = [
+            _task("rates", log),
+            _task("financing", log, after=("rates",), delay=0.02),
+            _task("gender", log, after=("rates",)),
+            _task("sectors", log, after=("rates", "financing", "gender")),
+        ]
+        build.run_tasks(tasks, jobs=4)
+
+        assert log.index("start sectors") > max(log.index("end financing"), log.index("end gender"))